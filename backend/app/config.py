@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,6 +15,14 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./tebita.db"
+    # Connection pool per worker process (ignored for SQLite)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    
+    # Worker threads per process for blocking handlers and DB calls; keep it
+    # close to db_pool_size + db_max_overflow so threads don't queue on the pool
+    threadpool_size: int = 30
     
     # CORS - Allow specific origins for credentials support
     allow_origins: list[str] = [
@@ -38,6 +48,40 @@ class Settings(BaseSettings):
     # Celery/Redis
     redis_url: str = "redis://localhost:6379/0"
     
+    # How notifications reach sockets on other workers (websocket/broker.py):
+    # inprocess (single worker, no hop), redis (pub/sub) or postgres (LISTEN/NOTIFY).
+    # inprocess with web_concurrency > 1 is logged as a warning at startup
+    notification_broker: Literal["inprocess", "redis", "postgres"] = "inprocess"
+    
+    # WebSocket fan-out (websocket/manager.py): messages queued per connection
+    # before older ones are dropped, and how long one send may take
+    ws_send_queue_size: int = 64
+    ws_send_timeout_seconds: float = 10.0
+    
+    # Analytics result cache (services/result_cache.py); the Redis tier shares
+    # entries and invalidations between workers. Unset, it is on whenever
+    # web_concurrency > 1: without it a write only invalidates its own worker
+    # and the others serve stale results for up to the TTL
+    result_cache_ttl_seconds: int = 300
+    result_cache_max_entries: int = 1024
+    result_cache_redis: Optional[bool] = None
+    
+    # Authenticated users kept per process (services/principal_cache.py); how
+    # long another worker may miss a role change or deactivation
+    principal_cache_ttl_seconds: float = 30.0
+    
+    # Rendered request PDFs kept per process (services/request_pdf.py)
+    pdf_cache_max_mb: int = 64
+    # Web worker processes; gunicorn reads the same WEB_CONCURRENCY as its
+    # default --workers (the Dockerfile sets 4)
+    web_concurrency: int = 1
+    # Bulk PDF bundles: render processes and forms per bundle. Every web
+    # worker starts its own render pool, so the host runs
+    # pdf_bundle_workers x web_concurrency render processes; 0 splits the
+    # CPUs between web workers (max(1, cpu_count // web_concurrency) each)
+    pdf_bundle_workers: int = 0
+    pdf_bundle_max_requests: int = 2000
+    
     # Email Notifications
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
@@ -47,6 +91,17 @@ class Settings(BaseSettings):
     SMTP_FROM_NAME: str = "Tebita SLA System"
     FRONTEND_URL: str = "http://localhost:5174"
     
+    # Outbound email queue (services/email_queue.py), sent by the scheduler
+    # leader over pooled SMTP sessions
+    email_smtp_connections: int = 2
+    email_batch_size: int = 50
+    email_poll_seconds: float = 2.0
+    email_max_attempts: int = 6
+    email_retry_base_seconds: int = 30
+    email_smtp_timeout_seconds: int = 30
+    email_smtp_idle_seconds: int = 60
+    email_retention_days: int = 30
+    
     twilio_account_sid: str = ""
     twilio_auth_token: str = ""
     twilio_phone_number: str = ""
@@ -2,7 +2,7 @@
 KPI Calculator Module for M&E System
 Calculates all KPIs as defined in organizational requirements document.
 """
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from decimal import Decimal
 from sqlalchemy.orm import Session
@@ -13,6 +13,8 @@ from app.models import (
     FleetRequest, HRDeployment, FinanceTransaction, ICTTicket, LogisticsRequest,
     Division, Department
 )
+from app.services.sla_expressions import count_where, response_hours
+from app.services.sla_outcomes import compliance_counts, compliance_rate
 
 
 # ============================================================================
@@ -42,46 +44,11 @@ def calculate_sla_compliance_rate(
     if end_date:
         query = query.filter(Request.created_at <= end_date)
     
-    # Get completed requests with SLA time defined
-    completed_requests = query.filter(
-        Request.status == RequestStatus.COMPLETED,
-        Request.sla_completion_time_hours.isnot(None),
-        Request.created_at.isnot(None),
-        Request.actual_completion_time.isnot(None)
-    ).all()
-    
-    compliant_completed = 0
-    non_compliant_completed = 0
-    
-    # Check each completed request
-    for req in completed_requests:
-        deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-        if req.actual_completion_time <= deadline:
-            compliant_completed += 1
-        else:
-            non_compliant_completed += 1
-    
-    # Get active overdue requests
-    now = datetime.utcnow()
-    active_requests = query.filter(
-        Request.status.in_([RequestStatus.PENDING, RequestStatus.IN_PROGRESS]),
-        Request.sla_completion_time_hours.isnot(None),
-        Request.created_at.isnot(None)
-    ).all()
-    
-    overdue_active = 0
-    for req in active_requests:
-        deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-        if now > deadline:
-            overdue_active += 1
-    
-    # Total evaluated = compliant + non-compliant + overdue active
-    total_evaluated = compliant_completed + non_compliant_completed + overdue_active
+    # Completed within/past SLA and active overdue, from the stored outcomes
+    counts = compliance_counts(query)
     
-    if total_evaluated == 0:
-        return 100.0  # No requests to evaluate
-    
-    return round((compliant_completed / total_evaluated) * 100, 2)
+    # Total evaluated = compliant + non-compliant + overdue active (100% if nothing to evaluate)
+    return round(compliance_rate(counts), 2)
 
 
 def calculate_service_request_fulfillment_rate(
@@ -293,16 +260,8 @@ def calculate_deployment_average_response_time(
     if end_date:
         query = query.filter(Request.created_at <= end_date)
     
-    requests = query.all()
-    if not requests:
-        return 0.0
-    
-    total_hours = sum(
-        (r.actual_response_time - r.created_at).total_seconds() / 3600
-        for r in requests
-    )
-    
-    return round(total_hours / len(requests), 2)
+    average_hours = query.with_entities(func.avg(response_hours)).scalar()
+    return round(average_hours or 0.0, 2)
 
 
 def calculate_overtime_usage_rate(
@@ -452,16 +411,8 @@ def calculate_average_ict_response_time(
     if end_date:
         query = query.filter(Request.created_at <= end_date)
     
-    requests = query.all()
-    if not requests:
-        return 0.0
-    
-    total_hours = sum(
-        (r.actual_response_time - r.created_at).total_seconds() / 3600
-        for r in requests
-    )
-    
-    return round(total_hours / len(requests), 2)
+    average_hours = query.with_entities(func.avg(response_hours)).scalar()
+    return round(average_hours or 0.0, 2)
 
 
 def calculate_reopened_tickets_rate(
@@ -506,16 +457,14 @@ def calculate_on_time_delivery_rate(
     if end_date:
         query = query.filter(Request.created_at <= end_date)
     
-    requests = query.all()
-    if not requests:
+    total, on_time = query.with_entities(
+        func.count(LogisticsRequest.id),
+        count_where(Request.actual_completion_time <= Request.sla_completion_deadline)
+    ).one()
+    if not total:
         return 0.0
     
-    on_time = sum(
-        1 for lr in requests
-        if lr.request.actual_completion_time <= lr.request.sla_completion_deadline
-    )
-    
-    return round((on_time / len(requests)) * 100, 2)
+    return round((on_time / total) * 100, 2)
 
 
 def calculate_stock_fulfillment_rate(
@@ -736,16 +685,8 @@ def calculate_average_response_time_by_priority(
     if end_date:
         query = query.filter(Request.created_at <= end_date)
     
-    requests = query.all()
-    if not requests:
-        return 0.0
-    
-    total_hours = sum(
-        (r.actual_response_time - r.created_at).total_seconds() / 3600
-        for r in requests
-    )
-    
-    return round(total_hours / len(requests), 2)
+    average_hours = query.with_entities(func.avg(response_hours)).scalar()
+    return round(average_hours or 0.0, 2)
 
 
 def calculate_completed_in_period(
@@ -5,8 +5,9 @@ from .config import settings
 from .database import Base, engine
 from .routers import auth, divisions, departments, requests, sla, me, kpis, dashboard, pdf, uploads, resources, analytics, ws, role_dashboard, notifications, users, satisfaction, settings as settings_router_module, visual_analytics
 
-from .websocket.redis_pubsub import init_redis, start_listener, stop_listener
+from .websocket.broker import notification_broker
 from .services.scheduler import start_scheduler, stop_scheduler
+from .services.pdf_bundle import shutdown_render_pool
 
 # Create all database tables
 Base.metadata.create_all(bind=engine)
@@ -41,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Bundle-Id", "X-Bundle-Total"],
 )
 
 # Include routers
@@ -67,13 +69,18 @@ app.include_router(ws.router)
 
 
 @app.on_event("startup")
-async def _startup_redis_listener():
+async def _configure_threadpool():
+    """Bound the worker pool that runs sync handlers and offloaded DB work"""
+    import anyio.to_thread
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+
+
+@app.on_event("startup")
+async def _startup_notification_broker():
     try:
-        if settings.redis_url:
-            await init_redis(settings.redis_url)
-            start_listener()
-    except Exception:
-        pass
+        await notification_broker.start()
+    except Exception as e:
+        print(f"Failed to start {notification_broker.name} notification broker: {e}")
     
     try:
         start_scheduler()
@@ -82,9 +89,9 @@ async def _startup_redis_listener():
 
 
 @app.on_event("shutdown")
-async def _shutdown_redis_listener():
+async def _shutdown_notification_broker():
     try:
-        await stop_listener()
+        await notification_broker.stop()
     except Exception:
         pass
         
@@ -92,6 +99,8 @@ async def _shutdown_redis_listener():
         stop_scheduler()
     except Exception:
         pass
+    
+    shutdown_render_pool()
 
 
 @app.get("/health")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum as SQLEnum, Text, Numeric, JSON, Float
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum as SQLEnum, Text, Numeric, JSON, Float, Index, Date
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -162,6 +162,13 @@ class AlertType(str, enum.Enum):
     OVERDUE = "OVERDUE"
 
 
+class OutboundEmailStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+
 class ScoreRating(str, enum.Enum):
     OUTSTANDING = "OUTSTANDING"
     VERY_GOOD = "VERY_GOOD"
@@ -329,6 +336,13 @@ class Request(Base):
     actual_response_time = Column(DateTime(timezone=True))  # When first action was taken
     actual_completion_time = Column(DateTime(timezone=True))  # When request was completed
     reason_for_delay = Column(Text)  # Explanation if SLA was missed
+    
+    # SLA outcomes, stored when the request is acknowledged/completed (see services/sla_outcomes.py)
+    response_met = Column(Boolean, index=True)  # Acknowledged within sla_response_time_hours
+    completion_met = Column(Boolean, index=True)  # Completed within sla_completion_time_hours
+    response_delay_hours = Column(Float)  # Hours past the response deadline (0 when met)
+    completion_delay_hours = Column(Float)  # Hours past the completion deadline (0 when met)
+    breached_at = Column(DateTime(timezone=True), index=True)  # When the completion SLA was missed
     rejection_reason = Column(Text)  # Reason for rejection
     
     # Cost tracking (for M&E cost optimization KPIs)
@@ -377,6 +391,11 @@ class Request(Base):
     acknowledged_by = relationship("User", foreign_keys=[acknowledged_by_user_id])
     completion_validated_by = relationship("User", foreign_keys=[completion_validated_by_user_id])
 
+    __table_args__ = (
+        # Keyset pagination order for the request listings (newest first)
+        Index("ix_requests_created_at_id", "created_at", "id"),
+    )
+
 
 class RequestItem(Base):
     __tablename__ = "request_items"
@@ -429,6 +448,11 @@ class SLAAlert(Base):
     request = relationship("Request", back_populates="alerts")
     acknowledged_by = relationship("User")
 
+    __table_args__ = (
+        # One alert per (request, type); looked up in batches by the SLA monitor
+        Index("ix_sla_alerts_request_id_alert_type", "request_id", "alert_type"),
+    )
+
 
 class CustomerSatisfaction(Base):
     __tablename__ = "customer_satisfaction"
@@ -646,3 +670,110 @@ class SystemSettings(Base):
 
     def __repr__(self):
         return f"<SystemSettings {self.setting_key}={self.setting_value}>"
+
+
+class RequestIdSequence(Base):
+    """Per-prefix counter backing the REQ-XXX-YYYYMMDD-NNN request numbers"""
+    __tablename__ = "request_id_sequences"
+
+    prefix = Column(String(50), primary_key=True)  # e.g. REQ-ICT-20251201- (one row per type per day)
+    last_value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<RequestIdSequence {self.prefix}{self.last_value}>"
+
+
+class RequestDailyStat(Base):
+    """
+    Daily rollup of requests for the trend charts.
+
+    One row per (created day, requester division/department, resource type,
+    priority, current status). Rows are adjusted incrementally whenever a
+    request changes and rebuilt by scripts/backfill_daily_stats.py.
+    """
+    __tablename__ = "request_daily_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    division_id = Column(Integer, ForeignKey("divisions.id"))
+    department_id = Column(Integer, ForeignKey("departments.id"))
+    resource_type = Column(SQLEnum(ResourceType))
+    priority = Column(SQLEnum(Priority))
+    status = Column(SQLEnum(RequestStatus))
+
+    request_count = Column(Integer, nullable=False, default=0)
+    sla_evaluated_count = Column(Integer, nullable=False, default=0)  # Has both a completion time and deadline
+    on_time_count = Column(Integer, nullable=False, default=0)  # ...and finished by it
+    response_count = Column(Integer, nullable=False, default=0)
+    response_hours_sum = Column(Float, nullable=False, default=0)
+    completion_count = Column(Integer, nullable=False, default=0)
+    completion_hours_sum = Column(Float, nullable=False, default=0)
+    satisfaction_count = Column(Integer, nullable=False, default=0)
+    satisfaction_sum = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Trend queries scan a day range; the rest of the key narrows the increment updates
+        Index(
+            "ix_request_daily_stats_key",
+            "day", "division_id", "department_id", "resource_type", "priority", "status",
+        ),
+    )
+
+    def __repr__(self):
+        return f"<RequestDailyStat {self.day} {self.status} x{self.request_count}>"
+
+
+class PendingCounter(Base):
+    """
+    Open (pending or in progress) requests behind the notification badge.
+
+    One row per scope unit: every request ("all", unit 0) plus the division,
+    department, sub-department and user it is assigned to. Rows are adjusted
+    incrementally on creation and status changes (services/pending_counters.py)
+    and rebuilt by scripts/backfill_pending_counters.py.
+    """
+    __tablename__ = "pending_counters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String(20), nullable=False)  # all, division, department, subdepartment, user
+    unit_id = Column(Integer, nullable=False)
+    pending_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_pending_counters_scope_unit", "scope", "unit_id"),
+    )
+
+    def __repr__(self):
+        return f"<PendingCounter {self.scope}:{self.unit_id} x{self.pending_count}>"
+
+
+class OutboundEmail(Base):
+    """
+    An email in the outbound mail queue (services/email_queue.py).
+
+    The message is built when it is sent; inline_images holds the path,
+    Content-ID and name of each embedded image rather than its bytes.
+    """
+    __tablename__ = "outbound_emails"
+
+    id = Column(Integer, primary_key=True, index=True)
+    request_id = Column(Integer, ForeignKey("requests.id"))
+    recipients = Column(JSON, nullable=False)
+    subject = Column(String, nullable=False)
+    html_body = Column(Text, nullable=False)
+    inline_images = Column(JSON)
+    status = Column(SQLEnum(OutboundEmailStatus), nullable=False, default=OutboundEmailStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    sent_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # The sender polls for due messages
+        Index("ix_outbound_emails_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<OutboundEmail {self.id} {self.status} x{self.attempts}>"
@@ -16,7 +16,7 @@ from ..limiter import limiter
 
 @router.post("/login", response_model=schemas.Token)
 @limiter.limit("5/minute")
-async def login(
+def login(
     request: FastAPIRequest,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
@@ -40,5 +40,5 @@ async def login(
 
 
 @router.get("/me", response_model=schemas.UserRead)
-async def read_users_me(current_user: schemas.UserRead = Depends(get_current_active_user)):
+def read_users_me(current_user: schemas.UserRead = Depends(get_current_active_user)):
     return current_user
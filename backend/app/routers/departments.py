@@ -6,12 +6,13 @@ from ..database import get_db
 from ..auth import get_current_active_user
 from ..models import Department, User, UserRole
 from .. import schemas
+from ..services.org_cache import org_cache
 
 router = APIRouter(prefix="/departments", tags=["departments"])
 
 
 @router.get("/", response_model=List[schemas.DepartmentRead])
-async def get_departments(
+def get_departments(
     division_id: int = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -25,7 +26,7 @@ async def get_departments(
 
 
 @router.post("/", response_model=schemas.DepartmentRead, status_code=status.HTTP_201_CREATED)
-async def create_department(
+def create_department(
     department_in: schemas.DepartmentCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -37,12 +38,13 @@ async def create_department(
     department = Department(**department_in.model_dump())
     db.add(department)
     db.commit()
+    org_cache.invalidate()
     db.refresh(department)
     return department
 
 
 @router.get("/{department_id}", response_model=schemas.DepartmentRead)
-async def get_department(
+def get_department(
     department_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -55,7 +57,7 @@ async def get_department(
 
 
 @router.get("/{department_id}/subdepartments", response_model=List[schemas.SubDepartmentRead])
-async def get_department_subdepartments(
+def get_department_subdepartments(
     department_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -70,7 +72,7 @@ async def get_department_subdepartments(
 
 
 @router.post("/{department_id}/subdepartments", response_model=schemas.SubDepartmentRead, status_code=status.HTTP_201_CREATED)
-async def create_subdepartment(
+def create_subdepartment(
     department_id: int,
     subdepartment_in: schemas.SubDepartmentCreate,
     db: Session = Depends(get_db),
@@ -93,5 +95,6 @@ async def create_subdepartment(
     )
     db.add(subdepartment)
     db.commit()
+    org_cache.invalidate()
     db.refresh(subdepartment)
     return subdepartment
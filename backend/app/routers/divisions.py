@@ -6,12 +6,13 @@ from ..database import get_db
 from ..auth import get_current_active_user
 from ..models import Division, User, UserRole
 from .. import schemas
+from ..services.org_cache import org_cache
 
 router = APIRouter(prefix="/divisions", tags=["divisions"])
 
 
 @router.get("/", response_model=List[schemas.DivisionRead])
-async def get_divisions(
+def get_divisions(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -21,7 +22,7 @@ async def get_divisions(
 
 
 @router.post("/", response_model=schemas.DivisionRead, status_code=status.HTTP_201_CREATED)
-async def create_division(
+def create_division(
     division_in: schemas.DivisionCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -38,12 +39,13 @@ async def create_division(
     division = Division(**division_in.model_dump())
     db.add(division)
     db.commit()
+    org_cache.invalidate()
     db.refresh(division)
     return division
 
 
 @router.get("/{division_id}", response_model=schemas.DivisionRead)
-async def get_division(
+def get_division(
     division_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, case, func
 from typing import List
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -10,13 +10,16 @@ from ..auth import get_current_active_user
 from ..models import Request, User, Division, Department, RequestStatus, KPIMetric, Scorecard, ScoreRating, UserRole
 from .. import schemas
 from ..services.kpi_calculator import calculate_kpi_metrics, calculate_overdue_requests, calculate_customer_satisfaction_score  # NEW: Import KPI service
-from ..services.access_control import apply_role_based_filtering
+from ..services.access_control import apply_role_based_filtering, role_scope_key
+from ..services.result_cache import result_cache
+from ..services.sla_outcomes import compliance_columns, compliance_counts, compliance_rate
+from ..services.sla_expressions import completion_hours, count_where
 
 router = APIRouter(prefix="/kpis", tags=["kpis"])
 
 
 @router.get("/realtime")
-async def get_realtime_kpis(
+def get_realtime_kpis(
     department_id: int = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -52,7 +55,7 @@ async def get_realtime_kpis(
 
 
 @router.get("/metrics")
-async def get_kpi_metrics(
+def get_kpi_metrics(
     period: str = "month",  # day, week, month, quarter
     division_id: int = None,
     department_id: int = None,
@@ -103,7 +106,7 @@ async def get_kpi_metrics(
 
 
 @router.get("/scorecard")
-async def get_scorecard(
+def get_scorecard(
     period: str = "month",
     division_id: int = None,
     department_id: int = None,
@@ -132,146 +135,134 @@ async def get_scorecard(
     elif current_user.role != UserRole.ADMIN:
         department_id = current_user.department_id
     
-    # Check for existing scorecard
-    query = db.query(Scorecard).filter(
-        Scorecard.period_start >= start,
-        Scorecard.period_end <= now
-    )
-    query = apply_role_based_filtering(query, current_user, model=Scorecard)
-    
-    if division_id:
-        query = query.filter(Scorecard.division_id == division_id)
-    if department_id:
-        query = query.filter(Scorecard.department_id == department_id)
-    
-    existing = query.first()
-    if existing:
-        # FORCE REFRESH: Delete existing scorecard to ensure new SLA logic is applied
-        # In production, we might want a smarter cache invalidation, but for now this ensures correctness.
-        db.delete(existing)
-        db.commit()
-        # return existing  <-- Commented out to force recalculation
-    
-    # Calculate new scorecard
-    try:
-        scorecard = calculate_scorecard(db, start, now, division_id, department_id)
-        
-        # Save scorecard
-        new_scorecard = Scorecard(
-            period_start=start,
-            period_end=now,
-            division_id=division_id,
-            department_id=department_id,
-            service_efficiency_score=scorecard['service_efficiency'],
-            compliance_score=scorecard['compliance'],
-            cost_optimization_score=scorecard['cost_optimization'],
-            satisfaction_score=scorecard['satisfaction'],
-            total_score=scorecard['total'],
-            rating=scorecard['rating'],
-            created_by_user_id=current_user.id
+    def compute():
+        # Check for existing scorecard
+        query = db.query(Scorecard).filter(
+            Scorecard.period_start >= start,
+            Scorecard.period_end <= now
         )
+        query = apply_role_based_filtering(query, current_user, model=Scorecard)
+    
+        if division_id:
+            query = query.filter(Scorecard.division_id == division_id)
+        if department_id:
+            query = query.filter(Scorecard.department_id == department_id)
+    
+        existing = query.first()
+        if existing:
+            # FORCE REFRESH: Delete existing scorecard to ensure new SLA logic is applied
+            # In production, we might want a smarter cache invalidation, but for now this ensures correctness.
+            db.delete(existing)
+            db.commit()
+            # return existing  <-- Commented out to force recalculation
+    
+        # Calculate new scorecard
+        try:
+            scorecard = calculate_scorecard(db, start, now, division_id, department_id)
         
-        db.add(new_scorecard)
-        db.commit()
-        db.refresh(new_scorecard)
+            # Save scorecard
+            new_scorecard = Scorecard(
+                period_start=start,
+                period_end=now,
+                division_id=division_id,
+                department_id=department_id,
+                service_efficiency_score=scorecard['service_efficiency'],
+                compliance_score=scorecard['compliance'],
+                cost_optimization_score=scorecard['cost_optimization'],
+                satisfaction_score=scorecard['satisfaction'],
+                total_score=scorecard['total'],
+                rating=scorecard['rating'],
+                created_by_user_id=current_user.id
+            )
         
-        return new_scorecard
-    except Exception as e:
-        db.rollback()
-        # Return the calculated scorecard even if saving fails (fallback)
-        # We construct a mock object that matches the schema
-        print(f"Error saving scorecard: {e}")
-        return Scorecard(
-            period_start=start,
-            period_end=now,
-            division_id=division_id,
-            department_id=department_id,
-            service_efficiency_score=scorecard['service_efficiency'],
-            compliance_score=scorecard['compliance'],
-            cost_optimization_score=scorecard['cost_optimization'],
-            satisfaction_score=scorecard['satisfaction'],
-            total_score=scorecard['total'],
-            rating=scorecard['rating'],
-            created_by_user_id=current_user.id
-        )
+            db.add(new_scorecard)
+            db.commit()
+            db.refresh(new_scorecard)
+        
+            return new_scorecard
+        except Exception as e:
+            db.rollback()
+            # Return the calculated scorecard even if saving fails (fallback)
+            # We construct a mock object that matches the schema
+            print(f"Error saving scorecard: {e}")
+            return Scorecard(
+                period_start=start,
+                period_end=now,
+                division_id=division_id,
+                department_id=department_id,
+                service_efficiency_score=scorecard['service_efficiency'],
+                compliance_score=scorecard['compliance'],
+                cost_optimization_score=scorecard['cost_optimization'],
+                satisfaction_score=scorecard['satisfaction'],
+                total_score=scorecard['total'],
+                rating=scorecard['rating'],
+                created_by_user_id=current_user.id
+            )
+
+    return result_cache.get_or_compute(
+        "kpis/scorecard",
+        role_scope_key(current_user),
+        {"period": period, "division_id": division_id, "department_id": department_id},
+        compute
+    )
 
 
 @router.get("/dashboard")
-async def get_kpi_dashboard(
+def get_kpi_dashboard(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get KPI dashboard overview"""
     
-    now = datetime.utcnow()
-    month_start = now - timedelta(days=30)
+    def compute():
+        now = datetime.utcnow()
+        month_start = now - timedelta(days=30)
     
-    # Get all requests for the month
-    query = db.query(Request).filter(Request.created_at >= month_start)
-    query = apply_role_based_filtering(query, current_user)
-    requests = query.all()
+        # All requests of the month
+        query = db.query(Request).filter(Request.created_at >= month_start)
+        query = apply_role_based_filtering(query, current_user)
     
-    if not requests:
+        # Totals and completion time of completed requests, in one aggregate
+        timed_completion = and_(
+            Request.status == RequestStatus.COMPLETED,
+            Request.created_at.isnot(None),
+            Request.completed_at.isnot(None),
+            Request.sla_completion_time_hours != 0
+        )
+        total, avg_completion, rejected_count = query.with_entities(
+            func.count(Request.id),
+            func.avg(case((timed_completion, completion_hours))),
+            func.count(case((Request.status == RequestStatus.REJECTED, 1)))
+        ).one()
+    
+        if not total:
+            return {
+                "total_requests": 0,
+                "avg_response_time": 0,
+                "avg_completion_time": 0,
+                "sla_compliance_rate": 0,
+                "satisfaction_avg": 0,
+            }
+    
+        # SLA rate with active overdue included, from the stored outcomes
+        sla_rate = compliance_rate(compliance_counts(query))
+    
+        # Calculate satisfaction score
+        satisfaction_score = calculate_customer_satisfaction_score(db, start_date=month_start, end_date=now)
+    
+        # Calculate rejection rate
+        rejection_rate = (rejected_count / total * 100) if total > 0 else 0
+
         return {
-            "total_requests": 0,
-            "avg_response_time": 0,
-            "avg_completion_time": 0,
-            "sla_compliance_rate": 0,
-            "satisfaction_avg": 0,
+            "total_requests": total,
+            "avg_response_time": 0,  # Placeholder
+            "avg_completion_time": round(avg_completion or 0, 2),
+            "sla_compliance_rate": round(sla_rate, 2),
+            "satisfaction_avg": round(satisfaction_score, 1),
+            "rejection_rate": round(rejection_rate, 1),
         }
-    
-    # Calculate metrics
-    total = len(requests)
-    response_times = []
-    completion_times = []
-    within_sla = 0
-    
-    compliant = 0
-    non_compliant = 0
-    now = datetime.utcnow()
-    
-    # Check completed requests
-    for req in requests:
-        if req.status == RequestStatus.COMPLETED:
-            if req.created_at and req.completed_at and req.sla_completion_time_hours:
-                completion_time = (req.completed_at - req.created_at).total_seconds() / 3600
-                completion_times.append(completion_time)
-                
-                deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-                if req.actual_completion_time and req.actual_completion_time <= deadline:
-                    compliant += 1
-                else:
-                    non_compliant += 1
-    
-    # Check active overdue requests
-    overdue_active = 0
-    for req in requests:
-        if req.status in [RequestStatus.PENDING, RequestStatus.IN_PROGRESS]:
-            if req.created_at and req.sla_completion_time_hours:
-                deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-                if now > deadline:
-                    overdue_active += 1
-    
-    # Calculate SLA rate with active overdue included
-    total_evaluated = compliant + non_compliant + overdue_active
-    sla_rate = (compliant / total_evaluated * 100) if total_evaluated > 0 else 100
-    avg_completion = sum(completion_times) / len(completion_times) if completion_times else 0
-    
-    # Calculate satisfaction score
-    satisfaction_score = calculate_customer_satisfaction_score(db, start_date=month_start, end_date=now)
-    
-    # Calculate rejection rate
-    rejected_count = len([r for r in requests if r.status == RequestStatus.REJECTED])
-    rejection_rate = (rejected_count / total * 100) if total > 0 else 0
 
-    return {
-        "total_requests": total,
-        "avg_response_time": 0,  # Placeholder
-        "avg_completion_time": round(avg_completion, 2),
-        "sla_compliance_rate": round(sla_rate, 2),
-        "satisfaction_avg": round(satisfaction_score, 1),
-        "rejection_rate": round(rejection_rate, 1),
-    }
+    return result_cache.get_or_compute("kpis/dashboard", role_scope_key(current_user), {}, compute)
 
 
 def calculate_realtime_kpis(db: Session, start: datetime, end: datetime, division_id: int = None, department_id: int = None):
@@ -284,12 +275,12 @@ def calculate_realtime_kpis(db: Session, start: datetime, end: datetime, divisio
     if department_id:
         query = query.filter(Request.assigned_department_id == department_id)
     
-    requests = query.all()
-    
     # Calculate various KPIs
-    total_requests = len(requests)
-    completed = len([r for r in requests if r.status == RequestStatus.COMPLETED])
-    pending = len([r for r in requests if r.status == RequestStatus.PENDING])
+    total_requests, completed, pending = query.with_entities(
+        func.count(Request.id),
+        count_where(Request.status == RequestStatus.COMPLETED),
+        count_where(Request.status == RequestStatus.PENDING)
+    ).one()
     
     completion_rate = (completed / total_requests * 100) if total_requests > 0 else 0
     
@@ -311,9 +302,16 @@ def calculate_scorecard(db: Session, start: datetime, end: datetime, division_id
     if department_id:
         query = query.filter(Request.assigned_department_id == department_id)
     
-    requests = query.all()
-    
-    if not requests:
+    # Totals, completion time and SLA outcomes in one aggregate
+    now = datetime.utcnow()
+    stats = query.with_entities(
+        func.count(Request.id).label("total"),
+        count_where(Request.status == RequestStatus.COMPLETED).label("completed"),
+        func.sum(case((Request.status == RequestStatus.COMPLETED, completion_hours))).label("completion_hours"),
+        *compliance_columns(db, now),
+    ).one()
+    
+    if not stats.total:
         return {
             'service_efficiency': Decimal('0'),
             'compliance': Decimal('0'),
@@ -324,34 +322,17 @@ def calculate_scorecard(db: Session, start: datetime, end: datetime, division_id
         }
     
     # 1. Service Efficiency (25%) - based on completion time
-    completed = [r for r in requests if r.status == RequestStatus.COMPLETED]
-    if completed:
-        avg_time = sum([(r.completed_at - r.created_at).total_seconds() / 3600 for r in completed if r.completed_at]) / len(completed)
+    if stats.completed:
+        avg_time = (stats.completion_hours or 0) / stats.completed
         # Lower time = higher score (normalize to 0-100)
         service_efficiency = min(100, max(0, 100 - (avg_time / 72 * 100)))  # 72 hours = baseline
     else:
         service_efficiency = 0
     
-    # 2. SLA Compliance (30%)
-    within_sla = 0
-    for req in completed:
-        if req.completed_at and req.created_at and req.sla_completion_time_hours:
-            time_taken = (req.completed_at - req.created_at).total_seconds() / 3600
-            if time_taken <= req.sla_completion_time_hours:
-                within_sla += 1
-    
-    # Add active overdue requests to calculation
-    active_overdue = 0
-    now = datetime.utcnow()
-    for req in requests:
-        if req.status in [RequestStatus.PENDING, RequestStatus.IN_PROGRESS]:
-            if req.created_at and req.sla_completion_time_hours:
-                deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-                if now > deadline:
-                    active_overdue += 1
-    
-    total_evaluated = len(completed) + active_overdue
-    compliance = (within_sla / total_evaluated * 100) if total_evaluated > 0 else 100
+    # 2. SLA Compliance (30%) - active overdue requests count against it
+    compliance = compliance_rate({
+        "compliant": stats.compliant, "non_compliant": stats.non_compliant, "overdue_active": stats.overdue_active
+    })
     
     # 3. Cost Optimization (20%) - placeholder
     # Future: Calculate based on budget variance or resource utilization
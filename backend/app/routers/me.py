@@ -8,12 +8,14 @@ from ..database import get_db
 from ..auth import get_current_active_user
 from ..models import Request, User, Division, Department, RequestStatus
 from .. import schemas
+from ..services.sla_expressions import is_overdue
+from ..services.sla_outcomes import compliance_counts, compliance_rate
 
 router = APIRouter(prefix="/me", tags=["me_monitoring"])
 
 
 @router.get("/dashboard")
-async def get_me_dashboard(
+def get_me_dashboard(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -45,45 +47,18 @@ async def get_me_dashboard(
             Request.completed_at >= today_start
         )).count()
         
-        # SLA compliance (this month) - FIXED to calculate deadlines properly
-        # Uses created_at + sla_completion_time_hours instead of sla_completion_deadline
-        now = datetime.utcnow()  # Use timezone-naive to match created_at
-        
-        # Get completed requests this month with SLA time defined
-        month_completed = filter_reqs(db.query(Request).filter(
+        # SLA compliance (this month), from the stored outcomes: completions this
+        # month within/past their SLA plus requests currently overdue
+        month_counts = compliance_counts(filter_reqs(db.query(Request).filter(
             Request.status == RequestStatus.COMPLETED,
-            Request.completed_at >= month_start,
-            Request.sla_completion_time_hours.isnot(None),
-            Request.created_at.isnot(None),
-            Request.actual_completion_time.isnot(None)
-        )).all()
-        
-        within_sla_completed = 0
-        missed_sla_completed = 0
-        
-        for req in month_completed:
-            deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-            if req.actual_completion_time <= deadline:
-                within_sla_completed += 1
-            else:
-                missed_sla_completed += 1
+            Request.completed_at >= month_start
+        )))
         
-        # Get currently overdue active requests
-        active_requests = filter_reqs(db.query(Request).filter(
-            Request.status.in_([RequestStatus.PENDING, RequestStatus.IN_PROGRESS]),
-            Request.sla_completion_time_hours.isnot(None),
-            Request.created_at.isnot(None)
-        )).all()
+        # Currently overdue active requests (completion deadline passed)
+        overdue_count = filter_reqs(db.query(Request).filter(is_overdue(now))).count()
         
-        overdue_active = 0
-        for req in active_requests:
-            deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-            if now > deadline:
-                overdue_active += 1
-        
-        # Total requests to evaluate
-        total_evaluated = within_sla_completed + missed_sla_completed + overdue_active
-        sla_compliance = (within_sla_completed / total_evaluated * 100) if total_evaluated > 0 else 100
+        month_counts["overdue_active"] = overdue_count
+        sla_compliance = compliance_rate(month_counts)
         
         # Requests by division (counts)
         div_stats_query = db.query(
@@ -115,19 +90,6 @@ async def get_me_dashboard(
             for req in recent_requests
         ]
         
-        # Overdue requests - FIXED to calculate deadlines properly
-        active_requests = filter_reqs(db.query(Request).filter(
-            Request.status.in_([RequestStatus.PENDING, RequestStatus.IN_PROGRESS]),
-            Request.sla_completion_time_hours.isnot(None),
-            Request.created_at.isnot(None)
-        )).all()
-        
-        overdue_count = 0
-        for req in active_requests:
-            deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-            if now > deadline:
-                overdue_count += 1
-        
         return {
             "total_requests": total_requests,
             "status_breakdown": {
@@ -152,7 +114,7 @@ async def get_me_dashboard(
 
 
 @router.get("/validation-queue")
-async def get_validation_queue(
+def get_validation_queue(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -170,7 +132,7 @@ async def get_validation_queue(
 
 
 @router.get("/activity-log")
-async def get_activity_log(
+def get_activity_log(
     limit: int = 50,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -1,19 +1,84 @@
 """PDF Generation Router for Tebita SLA System"""
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from ..database import get_db
 from ..auth import get_current_active_user
-from ..models import Request, User, Division, Department, UserRole
-from ..services.pdf_generator import TEditaPDFGenerator
+from ..config import settings
+from ..models import Request, User
+from .. import schemas
+from ..services.access_control import apply_role_based_filtering
+from ..services.pdf_bundle import PDFBundle
+from ..services.request_pdf import pdf_cache, pdf_digest, request_pdf_data
 
 router = APIRouter(prefix="/api/requests", tags=["pdf"])
 
 
+@router.post("/pdf/bundle")
+def create_pdf_bundle(
+    bundle_in: schemas.PDFBundleRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Request forms of many requests as one ZIP, rendered in parallel and
+    streamed as each form finishes. Progress is sent to the caller as
+    pdf_bundle_progress notifications tagged with the X-Bundle-Id header.
+    """
+    if not (bundle_in.request_ids or bundle_in.department_id or bundle_in.month):
+        raise HTTPException(status_code=400, detail="Give request_ids, or a department_id and/or month")
+    
+    # Only requests the caller can see, as in the requests list
+    query = apply_role_based_filtering(db.query(Request), current_user)
+    if bundle_in.request_ids:
+        query = query.filter(Request.id.in_(bundle_in.request_ids))
+    if bundle_in.department_id:
+        query = query.filter(or_(
+            Request.requester_department_id == bundle_in.department_id,
+            Request.assigned_department_id == bundle_in.department_id
+        ))
+    if bundle_in.month:
+        month_start = datetime.strptime(bundle_in.month, "%Y-%m")
+        next_month = month_start.replace(year=month_start.year + month_start.month // 12,
+                                         month=month_start.month % 12 + 1)
+        query = query.filter(Request.created_at >= month_start, Request.created_at < next_month)
+    
+    total = query.count()
+    if total == 0:
+        raise HTTPException(status_code=404, detail="No requests match")
+    if total > settings.pdf_bundle_max_requests:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{total} requests match; bundles are limited to {settings.pdf_bundle_max_requests}"
+        )
+    
+    requests = query.options(
+        selectinload(Request.items), joinedload(Request.requester)
+    ).order_by(Request.id).all()
+    bundle = PDFBundle(current_user.id, [
+        (request.id, request_pdf_data(db, request, current_user.full_name)) for request in requests
+    ])
+    
+    return StreamingResponse(
+        bundle.stream_zip(),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="request_forms_{bundle.id}.zip"',
+            "X-Bundle-Id": bundle.id,
+            "X-Bundle-Total": str(bundle.total),
+        }
+    )
+
+
 @router.get("/{request_id}/pdf")
-async def generate_request_pdf(
+def generate_request_pdf(
     request_id: int,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -57,60 +122,19 @@ async def generate_request_pdf(
         if not has_access:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-    # Get related data
-    requester_division = db.get(Division, request.requester_division_id) if request.requester_division_id else None
-    assigned_division = db.get(Division, request.assigned_division_id) if request.assigned_division_id else None
-    requester_dept = db.get(Department, request.requester_department_id) if request.requester_department_id else None
-    assigned_dept = db.get(Department, request.assigned_department_id) if request.assigned_department_id else None
-    
-    # Get subdepartments
-    from ..models import SubDepartment
-    requester_subdept = db.get(SubDepartment, request.requester_subdepartment_id) if request.requester_subdepartment_id else None
-    assigned_subdept = db.get(SubDepartment, request.assigned_subdepartment_id) if request.assigned_subdepartment_id else None
-
-    # Prepare data for PDF
-    pdf_data = {
-        'request_id': request.request_id,
-        'date': request.created_at.strftime('%Y-%m-%d') if request.created_at else '',
-        'senderDepartment': requester_dept.name if requester_dept else 'N/A',
-        'senderDivision': requester_division.name if requester_division else 'N/A',
-        'senderSubDepartment': requester_subdept.name if requester_subdept else None,
-        'receiverDepartment': assigned_dept.name if assigned_dept else 'N/A',
-        'receiverDivision': assigned_division.name if assigned_division else 'N/A',
-        'receiverSubDepartment': assigned_subdept.name if assigned_subdept else None,
-        'requestType': request.request_type,
-        'requestDescription': request.description,
-        'priority': request.priority.value if request.priority else 'MEDIUM',
-        'signedBy': current_user.full_name,
-        'sender_email': request.requester.email if request.requester and request.requester.email else 'info@tebitambulance.com',
-        'items': [
-            {
-                'item_description': item.item_description,
-                'unit_price': item.unit_price,
-                'quantity': item.quantity,
-                'attachment_filename': item.attachment_filename,
-            }
-            for item in request.items
-        ],
-        'main_item_description': request.items[0].item_description if request.items else '',
-        'item_files': [
-            item.attachment_filename
-            for item in request.items
-            if item.attachment_filename
-        ],
-        'attachments': request.attachments or [],
-        'company_location': 'https://maps.google.com/maps/place//data=!4m2!3m1!1s0x164b85001ee00be1:0xe1a1d67bd070ea7?entry=s&sa=X&ved=2ahUKEwiY2-Owj6aRAxUzUkEAHbpiHEMQ4kB6BAgVEAA&hl=en',
+    # The form's content hash is its ETag; unchanged forms are answered
+    # with a 304 or from the rendered-PDF cache
+    pdf_data = request_pdf_data(db, request, current_user.full_name)
+    digest = pdf_digest(pdf_data)
+    etag = f'"{digest}"'
+    headers = {
+        'Content-Disposition': f'inline; filename="Request_{request.request_id}.pdf"',
+        'ETag': etag,
+        'Cache-Control': 'private, no-cache',
     }
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
     
-    # Generate PDF
-    generator = TEditaPDFGenerator()
-    pdf_buffer = generator.generate_request_pdf(pdf_data)
-    
-    # Return PDF as streaming response
-    return StreamingResponse(
-        pdf_buffer,
-        media_type='application/pdf',
-        headers={
-            'Content-Disposition': f'inline; filename="Request_{request.request_id}.pdf"'
-        }
-    )
+    # Rendered in the worker thread running this (sync) handler, off the event loop
+    pdf = pdf_cache.get_or_render(request.id, digest, pdf_data)
+    return Response(content=pdf, media_type='application/pdf', headers=headers)
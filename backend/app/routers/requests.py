@@ -1,12 +1,11 @@
-import csv
-import io
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from pydantic import Field
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from ..database import get_db
 from ..auth import get_current_active_user
@@ -24,61 +23,65 @@ from ..models import (
 from .. import schemas
 from ..services.sla_calculator import calculate_deadlines  # NEW: Import SLA service
 from ..services.notification_service import send_user_notification
+from ..services.sla_monitor import sla_monitor
+from ..services.sla_outcomes import record_sla_outcomes
+from ..services.daily_stats import record_new_request, track_request_stats
+from ..services.pending_counters import count_new_request, push_pending_counts, track_pending_counts
+from ..services.result_cache import result_cache
 from ..services.access_control import apply_role_based_filtering
-from ..services.reporting_service import format_datetime_for_export
+from ..services.reporting_service import stream_activity_log_csv
+from ..services.request_ids import allocate_request_id
+from ..services.pagination import (
+    BY_SUBMITTED_AT,
+    RequestListParams,
+    request_list_params,
+    apply_request_filters,
+    paginate_requests,
+)
 
 router = APIRouter(prefix="/requests", tags=["requests"])
 
+# Eager loads needed to serialize schemas.RequestRead without per-row lazy loads
+REQUEST_READ_OPTIONS = (
+    joinedload(Request.requester),
+    joinedload(Request.requester_division),
+    joinedload(Request.requester_department),
+    joinedload(Request.requester_subdepartment),
+    joinedload(Request.assigned_division),
+    joinedload(Request.assigned_department),
+    joinedload(Request.assigned_subdepartment),
+    selectinload(Request.items),
+)
+
 
 def generate_request_id(db: Session, request_type: str) -> str:
     """Generate unique request ID in format REQ-DEPT-DATE-XXX"""
-    from datetime import datetime
-    
-    date_str = datetime.now().strftime("%Y%m%d")
-    dept_code = request_type[:3].upper()
-    prefix = f"REQ-{dept_code}-{date_str}-"
-    
-    # Get count of requests today with this specific prefix
-    # We filter by the ID string itself to handle multiple request types sharing the same prefix
-    count = db.query(Request).filter(
-        Request.request_id.like(f"{prefix}%")
-    ).count()
-    
-    sequence = str(count + 1).zfill(3)
-    return f"{prefix}{sequence}"
+    # Backed by the per-prefix counter table: one atomic round trip, safe
+    # across concurrent creates on every worker
+    return allocate_request_id(db, request_type)
 
 
 @router.get("/", response_model=List[schemas.RequestRead])
-async def get_requests(
-    status: str = None,
+def get_requests(
+    response: Response,
+    params: RequestListParams = Depends(request_list_params),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get requests based on user role"""
-    from sqlalchemy.orm import joinedload
-    
-    query = db.query(Request).options(
-        joinedload(Request.requester),
-        joinedload(Request.requester_division),
-        joinedload(Request.requester_department),
-        joinedload(Request.requester_subdepartment),
-        joinedload(Request.assigned_division),
-        joinedload(Request.assigned_department),
-        joinedload(Request.assigned_subdepartment)
-    )
+    """Get requests based on user role (keyset-paginated when limit/cursor is given)"""
+    query = db.query(Request)
 
     # Role-based filtering
     query = apply_role_based_filtering(query, current_user)
+    query = apply_request_filters(query, params)
 
-    if status:
-        query = query.filter(Request.status == status)
-
-    requests = query.order_by(Request.created_at.desc()).all()
-    return requests
+    return paginate_requests(query, params, response, REQUEST_READ_OPTIONS)
 
 
 @router.get("/incoming", response_model=List[schemas.RequestRead])
-async def get_incoming_requests(
+def get_incoming_requests(
+    response: Response,
+    params: RequestListParams = Depends(request_list_params),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -132,22 +135,23 @@ async def get_incoming_requests(
         RequestStatus.COMPLETED,
         RequestStatus.REJECTED
     ]))
+    query = apply_request_filters(query, params)
     
-    return query.order_by(Request.submitted_at.desc()).all()
+    # Newest submissions first, as before pagination
+    return paginate_requests(query, params, response, REQUEST_READ_OPTIONS, BY_SUBMITTED_AT)
 
 
 @router.get("/sent", response_model=List[schemas.RequestRead])
-async def get_sent_requests(
+def get_sent_requests(
+    response: Response,
+    params: RequestListParams = Depends(request_list_params),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Requests created by the current user"""
-    return (
-        db.query(Request)
-        .filter(Request.requester_id == current_user.id)
-        .order_by(Request.created_at.desc())
-        .all()
-    )
+    query = db.query(Request).filter(Request.requester_id == current_user.id)
+    query = apply_request_filters(query, params)
+    return paginate_requests(query, params, response, REQUEST_READ_OPTIONS)
 
 
 @router.post("/", response_model=schemas.RequestRead, status_code=status.HTTP_201_CREATED)
@@ -157,6 +161,32 @@ async def create_request(
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new request with auto-calculated SLA deadlines"""
+    # The Session is synchronous, so all DB work runs in the bounded worker
+    # pool and only the notification fan-out stays on the event loop
+    request = await run_in_threadpool(_create_request_record, db, request_in, current_user)
+    
+    # Notify assigned user (if any) about the new request
+    try:
+        if request.assigned_to_user_id:
+            await send_user_notification(
+                str(request.assigned_to_user_id),
+                {"type": "request_created", "request_id": request.request_id, "status": str(request.status)}
+            )
+    except Exception:
+        pass
+    
+    # Queue email notification (for all priorities); sent in the background
+    await run_in_threadpool(_send_request_email, db, request)
+    
+    return request
+
+
+def _create_request_record(
+    db: Session,
+    request_in: schemas.RequestCreate,
+    current_user: User
+) -> Request:
+    """Validate and persist a new request with its items, workflow and activity log"""
     # 1. Restriction: Admins cannot create requests
     if current_user.role == UserRole.ADMIN:
         raise HTTPException(
@@ -243,22 +273,26 @@ async def create_request(
         performed_by=current_user,
         details=f"Request sent to division {request.assigned_division_id}"
     )
+    record_new_request(db, request)
+    count_new_request(db, request)
     
     db.commit()
-    db.refresh(request)
-    
-    # Notify assigned user (if any) about the new request
-    try:
-        if request.assigned_to_user_id:
-            await send_user_notification(
-                str(request.assigned_to_user_id),
-                {"type": "request_created", "request_id": request.request_id, "status": str(request.status)}
-            )
-    except Exception:
-        pass
-    
-    # Send email notification for HIGH priority requests
-    # Send email notification (for all priorities)
+    result_cache.bump("requests")
+    sla_monitor.request_changed(request.id)
+    push_pending_counts(db)
+
+    # Reload with everything RequestRead serializes so the response is not
+    # built from lazy loads on the event loop
+    return (
+        db.query(Request)
+        .options(*REQUEST_READ_OPTIONS)
+        .filter(Request.id == request.id)
+        .one()
+    )
+
+
+def _send_request_email(db: Session, request: Request):
+    """Queue an email to the users responsible for a newly created request"""
     try:
         import logging
         logger = logging.getLogger(__name__)
@@ -291,7 +325,7 @@ async def create_request(
             ).all()
         
         if assigned_users:
-            logger.info(f"Found {len(assigned_users)} assigned users, sending email...")
+            logger.info(f"Found {len(assigned_users)} assigned users, queueing email...")
             email_service.send_request_notification(db, request, assigned_users)
         else:
             logger.warning(f"No assigned users found for request {request.request_id}")
@@ -301,8 +335,6 @@ async def create_request(
         print(f"⚠️ Email notification failed (non-blocking): {e}")
         print(traceback.format_exc())
     
-    return request
-
 
 
 def _ensure_user_is_assignee(request: Request, user: User):
@@ -390,7 +422,7 @@ def _log_request_activity(
 
 
 @router.post("/{request_id}/acknowledge", response_model=schemas.RequestRead)
-async def acknowledge_request(
+def acknowledge_request(
     request_id: int,
     notes: str = "",
     db: Session = Depends(get_db),
@@ -416,10 +448,12 @@ async def acknowledge_request(
         raise HTTPException(status_code=400, detail="Request already acknowledged")
 
     # Update request status and timestamps
-    request.acknowledged_at = datetime.utcnow()
-    request.actual_response_time = datetime.utcnow()  # NEW: Log actual response time
-    request.acknowledged_by_user_id = current_user.id
-    request.status = RequestStatus.IN_PROGRESS  # Move to "In Progress" section
+    with track_request_stats(db, request), track_pending_counts(db, request):
+        request.acknowledged_at = datetime.utcnow()
+        request.actual_response_time = datetime.utcnow()  # NEW: Log actual response time
+        request.acknowledged_by_user_id = current_user.id
+        request.status = RequestStatus.IN_PROGRESS  # Move to "In Progress" section
+        record_sla_outcomes(request)
 
     workflow = RequestWorkflow(
         request_id=request.id,
@@ -436,13 +470,17 @@ async def acknowledge_request(
         details=notes
     )
     db.commit()
+    result_cache.bump("requests")
+    # Response stage is over: the monitor moves on to the completion window
+    sla_monitor.request_changed(request.id)
+    push_pending_counts(db)
     db.refresh(request)
     print(f"   Request acknowledged successfully!")
     return request
 
 
 @router.post("/{request_id}/complete", response_model=schemas.RequestRead)
-async def complete_request(
+def complete_request(
     request_id: int,
     notes: str = "",
     db: Session = Depends(get_db),
@@ -463,9 +501,11 @@ async def complete_request(
         raise HTTPException(status_code=400, detail="Request already completed")
 
     # Mark as completed
-    request.completed_at = datetime.utcnow()
-    request.actual_completion_time = datetime.utcnow()  # NEW: Log actual completion time
-    request.status = RequestStatus.COMPLETED
+    with track_request_stats(db, request), track_pending_counts(db, request):
+        request.completed_at = datetime.utcnow()
+        request.actual_completion_time = datetime.utcnow()  # NEW: Log actual completion time
+        request.status = RequestStatus.COMPLETED
+        record_sla_outcomes(request)
 
     workflow = RequestWorkflow(
         request_id=request.id,
@@ -476,13 +516,15 @@ async def complete_request(
     db.add(workflow)
     
     db.commit()
+    result_cache.bump("requests")
+    push_pending_counts(db)
     db.refresh(request)
     print(f"   Request completed successfully!")
     return request
 
 
 @router.post("/{request_id}/validate-completion", response_model=schemas.RequestRead)
-async def validate_request_completion(
+def validate_request_completion(
     request_id: int,
     notes: str = "",
     db: Session = Depends(get_db),
@@ -499,11 +541,13 @@ async def validate_request_completion(
     if request.completion_validated_at:
         raise HTTPException(status_code=400, detail="Completion already validated")
 
-    request.completion_validated_at = datetime.utcnow()
-    request.completion_validated_by_user_id = current_user.id
-    request.status = RequestStatus.COMPLETED
-    request.completed_at = request.completed_at or datetime.utcnow()
-    request.actual_completion_time = datetime.utcnow()
+    with track_request_stats(db, request), track_pending_counts(db, request):
+        request.completion_validated_at = datetime.utcnow()
+        request.completion_validated_by_user_id = current_user.id
+        request.status = RequestStatus.COMPLETED
+        request.completed_at = request.completed_at or datetime.utcnow()
+        request.actual_completion_time = datetime.utcnow()
+        record_sla_outcomes(request)
 
     workflow = RequestWorkflow(
         request_id=request.id,
@@ -513,12 +557,14 @@ async def validate_request_completion(
     )
     db.add(workflow)
     db.commit()
+    result_cache.bump("requests")
+    push_pending_counts(db)
     db.refresh(request)
     return request
 
 
 @router.get("/{request_id}", response_model=schemas.RequestRead)
-async def get_request(
+def get_request(
     request_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -571,68 +617,27 @@ async def get_request(
 
 
 @router.get("/activity/export")
-async def export_request_activity_logs(
+def export_request_activity_logs(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    division_id: Optional[int] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    """Activity logs as CSV, streamed in chunks so memory does not grow with the log"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Only administrators can export activity logs")
 
-    logs = (
-        db.query(RequestActivityLog)
-        .options(
-            joinedload(RequestActivityLog.request),
-            joinedload(RequestActivityLog.performed_by),
-            joinedload(RequestActivityLog.performed_department),
-            joinedload(RequestActivityLog.performed_division),
-            joinedload(RequestActivityLog.target_department),
-            joinedload(RequestActivityLog.target_division),
-        )
-        .order_by(RequestActivityLog.created_at.desc())
-        .all()
-    )
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "Log ID",
-        "Request Number",
-        "Action",
-        "Performed By",
-        "Performed Dept",
-        "Performed Division",
-        "Target Dept",
-        "Target Division",
-        "Details",
-        "Timestamp",
-    ])
-
-    for log in logs:
-        writer.writerow([
-            log.id,
-            log.request.request_id if log.request else "",
-            log.action.value,
-            log.performed_by.full_name if log.performed_by else "",
-            log.performed_department.name if log.performed_department else "",
-            log.performed_division.name if log.performed_division else "",
-            log.target_department.name if log.target_department else "",
-            log.target_division.name if log.target_division else "",
-            log.details or "",
-            format_datetime_for_export(log.created_at),
-        ])
-
-    output.seek(0)
     filename = f"request_activity_logs_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-    content = output.getvalue().encode("utf-8")
     return StreamingResponse(
-        io.BytesIO(content),
+        stream_activity_log_csv(start_date, end_date, division_id),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 @router.patch("/{request_id}/status", response_model=schemas.RequestRead)
-async def update_request_status(
+def update_request_status(
     request_id: int,
     status_update: dict,
     db: Session = Depends(get_db),
@@ -648,20 +653,22 @@ async def update_request_status(
     
     # Update request status
     old_status = request.status
-    request.status = RequestStatus(new_status)
-    
-    # Update timestamps based on status
-    if new_status == RequestStatus.APPROVED:
-        request.approved_at = datetime.utcnow()
-        request.approved_by_user_id = current_user.id
-    elif new_status == RequestStatus.IN_PROGRESS:
-        request.started_at = datetime.utcnow()
-        # NEW: Track actual response time on first status change to IN_PROGRESS
-        if not request.actual_response_time:
-            request.actual_response_time = datetime.utcnow()
-    elif new_status == RequestStatus.COMPLETED:
-        request.completed_at = datetime.utcnow()
-        request.actual_completion_time = datetime.utcnow()
+    with track_request_stats(db, request), track_pending_counts(db, request):
+        request.status = RequestStatus(new_status)
+        
+        # Update timestamps based on status
+        if new_status == RequestStatus.APPROVED:
+            request.approved_at = datetime.utcnow()
+            request.approved_by_user_id = current_user.id
+        elif new_status == RequestStatus.IN_PROGRESS:
+            request.started_at = datetime.utcnow()
+            # NEW: Track actual response time on first status change to IN_PROGRESS
+            if not request.actual_response_time:
+                request.actual_response_time = datetime.utcnow()
+        elif new_status == RequestStatus.COMPLETED:
+            request.completed_at = datetime.utcnow()
+            request.actual_completion_time = datetime.utcnow()
+        record_sla_outcomes(request)
     
     # Add workflow entry
     workflow_step_map = {
@@ -681,12 +688,14 @@ async def update_request_status(
     db.add(workflow)
     
     db.commit()
+    result_cache.bump("requests")
+    push_pending_counts(db)
     db.refresh(request)
     return request
 
 
 @router.post("/{request_id}/approve", response_model=schemas.RequestRead)
-async def approve_request(
+def approve_request(
     request_id: int,
     notes: str = "",
     db: Session = Depends(get_db),
@@ -700,9 +709,10 @@ async def approve_request(
     if request.status != RequestStatus.PENDING and request.status != RequestStatus.APPROVAL_PENDING:
         raise HTTPException(status_code=400, detail="Request cannot be approved in current status")
     
-    request.status = RequestStatus.APPROVED
-    request.approved_at = datetime.utcnow()
-    request.approved_by_user_id = current_user.id
+    with track_request_stats(db, request), track_pending_counts(db, request):
+        request.status = RequestStatus.APPROVED
+        request.approved_at = datetime.utcnow()
+        request.approved_by_user_id = current_user.id
     
     # Add workflow entry
     workflow = RequestWorkflow(
@@ -714,12 +724,14 @@ async def approve_request(
     db.add(workflow)
     
     db.commit()
+    result_cache.bump("requests")
+    push_pending_counts(db)
     db.refresh(request)
     return request
 
 
 @router.post("/{request_id}/reject", response_model=schemas.RequestRead)
-async def reject_request(
+def reject_request(
     request_id: int,
     reason: str,
     db: Session = Depends(get_db),
@@ -730,9 +742,10 @@ async def reject_request(
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
     
-    request.status = RequestStatus.REJECTED
-    request.rejection_reason = reason
-    request.completed_at = datetime.utcnow()
+    with track_request_stats(db, request), track_pending_counts(db, request):
+        request.status = RequestStatus.REJECTED
+        request.rejection_reason = reason
+        request.completed_at = datetime.utcnow()
     
     # Add workflow entry
     workflow = RequestWorkflow(
@@ -744,12 +757,14 @@ async def reject_request(
     db.add(workflow)
     
     db.commit()
+    result_cache.bump("requests")
+    push_pending_counts(db)
     db.refresh(request)
     return request
 
 # NEW ENDPOINT: Satisfaction Rating Submission
 @router.post("/{request_id}/satisfaction", response_model=schemas.RequestRead)
-async def submit_satisfaction_rating(
+def submit_satisfaction_rating(
     request_id: int,
     satisfaction_data: schemas.SatisfactionSubmit,
     db: Session = Depends(get_db),
@@ -775,17 +790,19 @@ async def submit_satisfaction_rating(
         )
     
     # Update satisfaction fields
-    request.satisfaction_rating = satisfaction_data.rating
-    request.satisfaction_comment = satisfaction_data.comment
+    with track_request_stats(db, request):
+        request.satisfaction_rating = satisfaction_data.rating
+        request.satisfaction_comment = satisfaction_data.comment
     
     db.commit()
+    result_cache.bump("requests")
     db.refresh(request)
     return request
 
 
 # NEW ENDPOINT: Get SLA Status for Request
 @router.get("/{request_id}/sla-status")
-async def get_request_sla_status(
+def get_request_sla_status(
     request_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -22,6 +22,7 @@ from ..models import (
     RequestStatus
 )
 from .. import schemas
+from ..services.result_cache import result_cache
 
 router = APIRouter(prefix="/requests", tags=["resource-details"])
 
@@ -31,7 +32,7 @@ router = APIRouter(prefix="/requests", tags=["resource-details"])
 # ============================================================================
 
 @router.post("/{request_id}/fleet-details", response_model=schemas.FleetRequestRead)
-async def create_fleet_details(
+def create_fleet_details(
     request_id: int,
     fleet_data: schemas.FleetRequestCreate,
     db: Session = Depends(get_db),
@@ -54,12 +55,13 @@ async def create_fleet_details(
     
     db.add(fleet_request)
     db.commit()
+    result_cache.bump("resources")
     db.refresh(fleet_request)
     return fleet_request
 
 
 @router.get("/{request_id}/fleet-details", response_model=schemas.FleetRequestRead)
-async def get_fleet_details(
+def get_fleet_details(
     request_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -73,7 +75,7 @@ async def get_fleet_details(
 
 
 @router.patch("/{request_id}/fleet-details", response_model=schemas.FleetRequestRead)
-async def update_fleet_details(
+def update_fleet_details(
     request_id: int,
     fleet_data: schemas.FleetRequestUpdate,
     db: Session = Depends(get_db),
@@ -90,6 +92,7 @@ async def update_fleet_details(
         setattr(fleet_request, field, value)
     
     db.commit()
+    result_cache.bump("resources")
     db.refresh(fleet_request)
     return fleet_request
 
@@ -99,7 +102,7 @@ async def update_fleet_details(
 # ============================================================================
 
 @router.post("/{request_id}/hr-details", response_model=schemas.HRDeploymentRead)
-async def create_hr_details(
+def create_hr_details(
     request_id: int,
     hr_data: schemas.HRDeploymentCreate,
     db: Session = Depends(get_db),
@@ -121,12 +124,13 @@ async def create_hr_details(
     
     db.add(hr_deployment)
     db.commit()
+    result_cache.bump("resources")
     db.refresh(hr_deployment)
     return hr_deployment
 
 
 @router.get("/{request_id}/hr-details", response_model=schemas.HRDeploymentRead)
-async def get_hr_details(
+def get_hr_details(
     request_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -140,7 +144,7 @@ async def get_hr_details(
 
 
 @router.patch("/{request_id}/hr-details", response_model=schemas.HRDeploymentRead)
-async def update_hr_details(
+def update_hr_details(
     request_id: int,
     hr_data: schemas.HRDeploymentUpdate,
     db: Session = Depends(get_db),
@@ -156,6 +160,7 @@ async def update_hr_details(
         setattr(hr_deployment, field, value)
     
     db.commit()
+    result_cache.bump("resources")
     db.refresh(hr_deployment)
     return hr_deployment
 
@@ -165,7 +170,7 @@ async def update_hr_details(
 # ============================================================================
 
 @router.post("/{request_id}/finance-details", response_model=schemas.FinanceTransactionRead)
-async def create_finance_details(
+def create_finance_details(
     request_id: int,
     finance_data: schemas.FinanceTransactionCreate,
     db: Session = Depends(get_db),
@@ -187,12 +192,13 @@ async def create_finance_details(
     
     db.add(finance_transaction)
     db.commit()
+    result_cache.bump("resources")
     db.refresh(finance_transaction)
     return finance_transaction
 
 
 @router.get("/{request_id}/finance-details", response_model=schemas.FinanceTransactionRead)
-async def get_finance_details(
+def get_finance_details(
     request_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -206,7 +212,7 @@ async def get_finance_details(
 
 
 @router.patch("/{request_id}/finance-details", response_model=schemas.FinanceTransactionRead)
-async def update_finance_details(
+def update_finance_details(
     request_id: int,
     finance_data: schemas.FinanceTransactionUpdate,
     db: Session = Depends(get_db),
@@ -222,6 +228,7 @@ async def update_finance_details(
         setattr(finance_transaction, field, value)
     
     db.commit()
+    result_cache.bump("resources")
     db.refresh(finance_transaction)
     return finance_transaction
 
@@ -231,7 +238,7 @@ async def update_finance_details(
 # ============================================================================
 
 @router.post("/{request_id}/ict-details", response_model=schemas.ICTTicketRead)
-async def create_ict_details(
+def create_ict_details(
     request_id: int,
     ict_data: schemas.ICTTicketCreate,
     db: Session = Depends(get_db),
@@ -253,12 +260,13 @@ async def create_ict_details(
     
     db.add(ict_ticket)
     db.commit()
+    result_cache.bump("resources")
     db.refresh(ict_ticket)
     return ict_ticket
 
 
 @router.get("/{request_id}/ict-details", response_model=schemas.ICTTicketRead)
-async def get_ict_details(
+def get_ict_details(
     request_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -272,7 +280,7 @@ async def get_ict_details(
 
 
 @router.patch("/{request_id}/ict-details", response_model=schemas.ICTTicketRead)
-async def update_ict_details(
+def update_ict_details(
     request_id: int,
     ict_data: schemas.ICTTicketUpdate,
     db: Session = Depends(get_db),
@@ -288,6 +296,7 @@ async def update_ict_details(
         setattr(ict_ticket, field, value)
     
     db.commit()
+    result_cache.bump("resources")
     db.refresh(ict_ticket)
     return ict_ticket
 
@@ -297,7 +306,7 @@ async def update_ict_details(
 # ============================================================================
 
 @router.post("/{request_id}/logistics-details", response_model=schemas.LogisticsRequestRead)
-async def create_logistics_details(
+def create_logistics_details(
     request_id: int,
     logistics_data: schemas.LogisticsRequestCreate,
     db: Session = Depends(get_db),
@@ -319,12 +328,13 @@ async def create_logistics_details(
     
     db.add(logistics_request)
     db.commit()
+    result_cache.bump("resources")
     db.refresh(logistics_request)
     return logistics_request
 
 
 @router.get("/{request_id}/logistics-details", response_model=schemas.LogisticsRequestRead)
-async def get_logistics_details(
+def get_logistics_details(
     request_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -338,7 +348,7 @@ async def get_logistics_details(
 
 
 @router.patch("/{request_id}/logistics-details", response_model=schemas.LogisticsRequestRead)
-async def update_logistics_details(
+def update_logistics_details(
     request_id: int,
     logistics_data: schemas.LogisticsRequestUpdate,
     db: Session = Depends(get_db),
@@ -354,5 +364,6 @@ async def update_logistics_details(
         setattr(logistics_request, field, value)
     
     db.commit()
+    result_cache.bump("resources")
     db.refresh(logistics_request)
     return logistics_request
@@ -1,18 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from typing import Dict, Any, List
+from sqlalchemy import func, and_, case
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
 from ..database import get_db
 from ..auth import get_current_active_user
-from ..models import User, Request, RequestStatus, Division, Department, SubDepartment
+from ..models import User, Request, RequestStatus
+from ..services.org_cache import org_cache
 
 router = APIRouter(prefix="/dashboard", tags=["role-dashboards"])
 
 
+def _status_summary(db: Session, *criteria) -> Dict[str, int]:
+    """Total, pending, in-progress and completed counts of matching requests in one query"""
+    def count_status(status):
+        return func.coalesce(func.sum(case((Request.status == status, 1), else_=0)), 0)
+    
+    total, pending, in_progress, completed = db.query(
+        func.count(Request.id),
+        count_status(RequestStatus.PENDING),
+        count_status(RequestStatus.IN_PROGRESS),
+        count_status(RequestStatus.COMPLETED)
+    ).filter(*criteria).one()
+    return {
+        "total_requests": total,
+        "pending": pending,
+        "in_progress": in_progress,
+        "completed": completed
+    }
+
+
+def _request_counts_by(db: Session, column, ids: Optional[List[int]] = None) -> Dict[int, int]:
+    """Number of requests per value of an assignment column (one GROUP BY)"""
+    query = db.query(column, func.count(Request.id)).filter(column.isnot(None))
+    if ids is not None:
+        query = query.filter(column.in_(ids))
+    return dict(query.group_by(column).all())
+
+
 @router.get("/admin")
-async def get_admin_dashboard(
+def get_admin_dashboard(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -20,50 +48,40 @@ async def get_admin_dashboard(
     if current_user.role != "ADMIN":
         raise HTTPException(status_code=403, detail="Admin access required")
     
+    org = org_cache.get(db)
+    
     # System-wide statistics
-    total_requests = db.query(Request).count()
-    pending = db.query(Request).filter(Request.status == RequestStatus.PENDING).count()
-    in_progress = db.query(Request).filter(Request.status == RequestStatus.IN_PROGRESS).count()
-    completed = db.query(Request).filter(Request.status == RequestStatus.COMPLETED).count()
+    summary = _status_summary(db)
     
     # Division breakdown
-    divisions = db.query(Division).all()
-    division_stats = []
-    for div in divisions:
-        div_requests = db.query(Request).filter(
-            Request.assigned_division_id == div.id
-        ).count()
-        division_stats.append({
+    division_counts = _request_counts_by(db, Request.assigned_division_id)
+    division_stats = [
+        {
             "id": div.id,
             "name": div.name,
-            "total_requests": div_requests
-        })
+            "total_requests": division_counts.get(div.id, 0)
+        }
+        for div in org.divisions
+    ]
     
     # Department breakdown
-    departments = db.query(Department).all()
-    dept_stats = []
-    for dept in departments:
-        dept_requests = db.query(Request).filter(
-            Request.assigned_department_id == dept.id
-        ).count()
-        dept_stats.append({
+    dept_counts = _request_counts_by(db, Request.assigned_department_id)
+    dept_stats = [
+        {
             "id": dept.id,
             "name": dept.name,
             "division_id": dept.division_id,
-            "total_requests": dept_requests
-        })
+            "total_requests": dept_counts.get(dept.id, 0)
+        }
+        for dept in org.departments
+    ]
     
     # Recent activity
     recent_requests = db.query(Request).order_by(Request.created_at.desc()).limit(10).all()
     
     return {
         "role": "ADMIN",
-        "summary": {
-            "total_requests": total_requests,
-            "pending": pending,
-            "in_progress": in_progress,
-            "completed": completed
-        },
+        "summary": summary,
         "divisions": division_stats,
         "departments": dept_stats,
         "recent_requests": [
@@ -79,7 +97,7 @@ async def get_admin_dashboard(
 
 
 @router.get("/division-manager")
-async def get_division_dashboard(
+def get_division_dashboard(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -91,51 +109,24 @@ async def get_division_dashboard(
         raise HTTPException(status_code=400, detail="User not assigned to a division")
     
     # Division statistics
-    division = db.query(Division).filter(Division.id == current_user.division_id).first()
+    division = org_cache.division(db, current_user.division_id)
     if not division:
         raise HTTPException(status_code=404, detail="Division not found")
     
     # Requests for this division
-    total_requests = db.query(Request).filter(
-        Request.assigned_division_id == current_user.division_id
-    ).count()
-    
-    pending = db.query(Request).filter(
-        and_(
-            Request.assigned_division_id == current_user.division_id,
-            Request.status == RequestStatus.PENDING
-        )
-    ).count()
-    
-    in_progress = db.query(Request).filter(
-        and_(
-            Request.assigned_division_id == current_user.division_id,
-            Request.status == RequestStatus.IN_PROGRESS
-        )
-    ).count()
-    
-    completed = db.query(Request).filter(
-        and_(
-            Request.assigned_division_id == current_user.division_id,
-            Request.status == RequestStatus.COMPLETED
-        )
-    ).count()
+    summary = _status_summary(db, Request.assigned_division_id == current_user.division_id)
     
     # Department breakdown within division
-    departments = db.query(Department).filter(
-        Department.division_id == current_user.division_id
-    ).all()
-    
-    dept_stats = []
-    for dept in departments:
-        dept_requests = db.query(Request).filter(
-            Request.assigned_department_id == dept.id
-        ).count()
-        dept_stats.append({
+    departments = org_cache.get(db).departments_of(current_user.division_id)
+    dept_counts = _request_counts_by(db, Request.assigned_department_id, [dept.id for dept in departments])
+    dept_stats = [
+        {
             "id": dept.id,
             "name": dept.name,
-            "total_requests": dept_requests
-        })
+            "total_requests": dept_counts.get(dept.id, 0)
+        }
+        for dept in departments
+    ]
     
     return {
         "role": "DIVISION_MANAGER",
@@ -144,18 +135,13 @@ async def get_division_dashboard(
             "name": division.name,
             "type": division.type.value
         },
-        "summary": {
-            "total_requests": total_requests,
-            "pending": pending,
-            "in_progress": in_progress,
-            "completed": completed
-        },
+        "summary": summary,
         "departments": dept_stats
     }
 
 
 @router.get("/department-head")
-async def get_department_dashboard(
+def get_department_dashboard(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -167,51 +153,26 @@ async def get_department_dashboard(
         raise HTTPException(status_code=400, detail="User not assigned to a department")
     
     # Department statistics
-    department = db.query(Department).filter(Department.id == current_user.department_id).first()
+    department = org_cache.department(db, current_user.department_id)
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     
     # Requests for this department
-    total_requests = db.query(Request).filter(
-        Request.assigned_department_id == current_user.department_id
-    ).count()
-    
-    pending = db.query(Request).filter(
-        and_(
-            Request.assigned_department_id == current_user.department_id,
-            Request.status == RequestStatus.PENDING
-        )
-    ).count()
-    
-    in_progress = db.query(Request).filter(
-        and_(
-            Request.assigned_department_id == current_user.department_id,
-            Request.status == RequestStatus.IN_PROGRESS
-        )
-    ).count()
-    
-    completed = db.query(Request).filter(
-        and_(
-            Request.assigned_department_id == current_user.department_id,
-            Request.status == RequestStatus.COMPLETED
-        )
-    ).count()
+    summary = _status_summary(db, Request.assigned_department_id == current_user.department_id)
     
     # Sub-department breakdown
-    subdepartments = db.query(SubDepartment).filter(
-        SubDepartment.department_id == current_user.department_id
-    ).all()
-    
-    subdept_stats = []
-    for subdept in subdepartments:
-        subdept_requests = db.query(Request).filter(
-            Request.assigned_subdepartment_id == subdept.id
-        ).count()
-        subdept_stats.append({
+    subdepartments = org_cache.get(db).subdepartments_of(current_user.department_id)
+    subdept_counts = _request_counts_by(
+        db, Request.assigned_subdepartment_id, [subdept.id for subdept in subdepartments]
+    )
+    subdept_stats = [
+        {
             "id": subdept.id,
             "name": subdept.name,
-            "total_requests": subdept_requests
-        })
+            "total_requests": subdept_counts.get(subdept.id, 0)
+        }
+        for subdept in subdepartments
+    ]
     
     return {
         "role": "DEPARTMENT_HEAD",
@@ -220,18 +181,13 @@ async def get_department_dashboard(
             "name": department.name,
             "division_id": department.division_id
         },
-        "summary": {
-            "total_requests": total_requests,
-            "pending": pending,
-            "in_progress": in_progress,
-            "completed": completed
-        },
+        "summary": summary,
         "subdepartments": subdept_stats
     }
 
 
 @router.get("/staff")
-async def get_staff_dashboard(
+def get_staff_dashboard(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -7,13 +7,16 @@ from ..database import get_db
 from ..auth import get_current_active_user
 from ..models import User, Request, CustomerSatisfaction, RequestStatus, Department
 from ..schemas import SatisfactionRatingCreate, SatisfactionRatingResponse, DepartmentRatingStats, UserBasic
-from ..services.access_control import apply_role_based_filtering
+from ..services.access_control import apply_role_based_filtering, role_scope_key
+from ..services.daily_stats import track_request_stats
+from ..services.result_cache import result_cache
+from ..services.satisfaction_stats import department_rating_stats, ranked_department_ratings
 
 router = APIRouter(prefix="/satisfaction", tags=["satisfaction"])
 
 
 @router.post("/requests/{request_id}/rate", response_model=SatisfactionRatingResponse, status_code=status.HTTP_201_CREATED)
-async def submit_rating(
+def submit_rating(
     request_id: int,
     rating: SatisfactionRatingCreate,
     db: Session = Depends(get_db),
@@ -72,10 +75,12 @@ async def submit_rating(
     db.add(new_rating)
     
     # Sync to Request table for dashboard compatibility
-    request.satisfaction_rating = rating.overall_score
-    request.satisfaction_comment = rating.comments
+    with track_request_stats(db, request):
+        request.satisfaction_rating = rating.overall_score
+        request.satisfaction_comment = rating.comments
     
     db.commit()
+    result_cache.bump("requests")
     db.refresh(new_rating)
     
     # 6. Return response
@@ -99,7 +104,7 @@ async def submit_rating(
 
 
 @router.get("/requests/{request_id}", response_model=SatisfactionRatingResponse)
-async def get_rating(
+def get_rating(
     request_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -132,7 +137,7 @@ async def get_rating(
 
 
 @router.get("/department/{department_id}/stats", response_model=DepartmentRatingStats)
-async def get_department_stats(
+def get_department_stats(
     department_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -143,54 +148,17 @@ async def get_department_stats(
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     
-    # Get all ratings for requests assigned to this department
-    ratings_query = db.query(CustomerSatisfaction).join(Request).filter(
-        Request.assigned_department_id == department_id
-    )
-    
-    ratings = ratings_query.all()
-    total_ratings = len(ratings)
-    
-    if total_ratings == 0:
-        return DepartmentRatingStats(
-            department_id=department_id,
-            department_name=department.name,
-            total_ratings=0,
-            average_overall=0.0,
-            average_timeliness=0.0,
-            average_quality=0.0,
-            average_communication=0.0,
-            average_professionalism=0.0,
-            rating_distribution={"5": 0, "4": 0, "3": 0, "2": 0, "1": 0}
-        )
-    
-    # Calculate averages
-    avg_overall = sum(r.overall_score for r in ratings) / total_ratings
-    avg_timeliness = sum(r.timeliness_score for r in ratings) / total_ratings
-    avg_quality = sum(r.quality_score for r in ratings) / total_ratings
-    avg_communication = sum(r.communication_score for r in ratings) / total_ratings
-    avg_professionalism = sum(r.professionalism_score for r in ratings) / total_ratings
-    
-    # Calculate rating distribution
-    distribution = {"5": 0, "4": 0, "3": 0, "2": 0, "1": 0}
-    for rating in ratings:
-        distribution[str(rating.overall_score)] += 1
+    stats = department_rating_stats(db, department_id)
     
     return DepartmentRatingStats(
         department_id=department_id,
         department_name=department.name,
-        total_ratings=total_ratings,
-        average_overall=round(avg_overall, 2),
-        average_timeliness=round(avg_timeliness, 2),
-        average_quality=round(avg_quality, 2),
-        average_communication=round(avg_communication, 2),
-        average_professionalism=round(avg_professionalism, 2),
-        rating_distribution=distribution
+        **stats
     )
 
 
 @router.get("/my-ratings", response_model=List[SatisfactionRatingResponse])
-async def get_my_ratings(
+def get_my_ratings(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -222,76 +190,23 @@ async def get_my_ratings(
 
 
 @router.get("/analytics/all-departments")
-async def get_all_departments_analytics(
+def get_all_departments_analytics(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get comprehensive rating analytics for all departments with rankings"""
-    from datetime import datetime, timedelta
-    
-    # Get all departments
-    query = db.query(Department)
-    query = apply_role_based_filtering(query, current_user, model=Department)
-    departments = query.all()
-    
-    department_stats = []
-    
-    for dept in departments:
-        # Get ratings for this department
-        ratings = db.query(CustomerSatisfaction).join(Request).filter(
-            Request.assigned_department_id == dept.id
-        ).all()
-        
-        if not ratings:
-            continue  # Skip departments with no ratings
-        
-        total_ratings = len(ratings)
-        
-        # Calculate averages
-        avg_overall = sum(r.overall_score for r in ratings) / total_ratings
-        avg_timeliness = sum(r.timeliness_score for r in ratings) / total_ratings
-        avg_quality = sum(r.quality_score for r in ratings) / total_ratings
-        avg_communication = sum(r.communication_score for r in ratings) / total_ratings
-        avg_professionalism = sum(r.professionalism_score for r in ratings) / total_ratings
-        
-        # Get recent ratings (last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_ratings = [r for r in ratings if r.submitted_at >= thirty_days_ago]
-        
-        # Get ratings with comments
-        ratings_with_comments = [r for r in ratings if r.comments]
-        recent_comments = sorted(
-            [(r.comments, r.submitted_at, r.request_id) for r in ratings_with_comments[-5:]],
-            key=lambda x: x[1],
-            reverse=True
+    def compute():
+        department_stats = ranked_department_ratings(
+            db, lambda query: apply_role_based_filtering(query, current_user, model=Department)
         )
-        
-        department_stats.append({
-            "department_id": dept.id,
-            "department_name": dept.name,
-            "total_ratings": total_ratings,
-            "average_overall": round(avg_overall, 2),
-            "average_timeliness": round(avg_timeliness, 2),
-            "average_quality": round(avg_quality, 2),
-            "average_communication": round(avg_communication, 2),
-            "average_professionalism": round(avg_professionalism, 2),
-            "recent_ratings_count": len(recent_ratings),
-            "recent_comments": [
-                {
-                    "comment": c[0],
-                    "submitted_at": c[1].isoformat(),
-                    "request_id": c[2]
-                } for c in recent_comments
-            ]
-        })
-    
-    # Sort by average overall rating
-    department_stats.sort(key=lambda x: x["average_overall"], reverse=True)
-    
-    return {
-        "departments": department_stats,
-        "total_departments_rated": len(department_stats),
-        "top_performer": department_stats[0] if department_stats else None,
-        "needs_improvement": department_stats[-1] if department_stats else None
-    }
-
+        return {
+            "departments": department_stats,
+            "total_departments_rated": len(department_stats),
+            "top_performer": department_stats[0] if department_stats else None,
+            "needs_improvement": department_stats[-1] if department_stats else None
+        }
+    
+    # Ratings are written through the request endpoints, which bump "requests"
+    return result_cache.get_or_compute(
+        "satisfaction/all-departments", role_scope_key(current_user), {}, compute, depends_on=("requests",)
+    )
@@ -6,12 +6,15 @@ from datetime import datetime
 from ..database import get_db
 from ..auth import get_current_active_user
 from ..models import User, SystemSettings, Request
+from ..services.daily_stats import clear_daily_stats
+from ..services.pending_counters import clear_pending_counters
+from ..services.result_cache import result_cache
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
 
 @router.get("")
-async def get_settings(
+def get_settings(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -34,7 +37,7 @@ async def get_settings(
 
 
 @router.put("/email-notifications")
-async def update_email_notifications(
+def update_email_notifications(
     enabled: bool,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -70,7 +73,7 @@ async def update_email_notifications(
 
 
 @router.get("/email-notifications/status")
-async def get_email_notification_status(
+def get_email_notification_status(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -91,7 +94,7 @@ async def get_email_notification_status(
     }
     
 @router.put("/smtp-config")
-async def update_smtp_settings(
+def update_smtp_settings(
     config: Dict[str, str],
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -122,8 +125,76 @@ async def update_smtp_settings(
     return {"success": True, "message": "SMTP settings updated successfully"}
 
 
+@router.get("/scheduler")
+def get_scheduler_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Which worker runs the background jobs and how long they took (admin only)"""
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    from ..services.scheduler import election, job_run_stats
+    from ..services.leader_election import read_leader_record
+    
+    return {
+        "leader": read_leader_record(db),
+        "this_worker": {
+            "worker": election.identity,
+            "is_leader": election.is_leader,
+            "jobs": job_run_stats() if election.is_leader else {},
+        },
+    }
+
+
+@router.get("/email-queue")
+def get_email_queue_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Outbound email queue depth, and send counts/latency from the sending worker (admin only)"""
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    from ..services.email_queue import queue_depth
+    from ..services.leader_election import read_leader_record
+    
+    leader = read_leader_record(db) or {}
+    return {
+        "queue": queue_depth(db),
+        "sender": (leader.get("jobs") or {}).get("email_queue"),
+    }
+
+
+@router.get("/notifications")
+async def get_notification_broker_status(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Health of the notification broker in use, and a timed round trip through each available one (admin only)"""
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    from ..websocket.broker import notification_broker, probe_backends
+    
+    return {
+        "active": notification_broker.health(),
+        "probes": await probe_backends(),
+    }
+
+
+@router.get("/cache")
+def get_result_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Hit/miss statistics of the analytics result cache (admin only)"""
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return result_cache.stats()
+
+
 @router.get("/health-check")
-async def test_system_health(
+def test_system_health(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -192,7 +263,7 @@ async def test_system_health(
 
 
 @router.delete("/reset-data")
-async def reset_system_data(
+def reset_system_data(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -232,10 +303,13 @@ async def reset_system_data(
         db.query(SLAAlert).delete()
         db.query(CustomerSatisfaction).delete()
         
-        # 2. Delete Main Requests Table
+        # 2. Delete Main Requests Table (and the rollup and counters built from it)
         num_deleted = db.query(Request).delete()
+        clear_daily_stats(db)
+        clear_pending_counters(db)
         
         db.commit()
+        result_cache.bump("requests", "resources")
         
         return {
             "success": True, 
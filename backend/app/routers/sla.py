@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, or_
 from typing import List
 from datetime import datetime, timedelta
 
@@ -9,12 +9,16 @@ from ..auth import get_current_active_user
 from ..models import Request, RequestStatus, User, SLAAlert, AlertType
 from .. import schemas
 from ..services.access_control import apply_role_based_filtering
+from ..services.sla_expressions import (
+    ACTIVE_STATUSES, completion_hours, count_where, hours_overdue, is_overdue, sla_consumed_percent
+)
+from ..services.sla_outcomes import completion_outcomes, compliance_counts
 
 router = APIRouter(prefix="/sla", tags=["sla"])
 
 
 @router.get("/compliance")
-async def get_sla_compliance(
+def get_sla_compliance(
     period: str = "month",  # day, week, month, quarter
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -35,53 +39,27 @@ async def get_sla_compliance(
     query = db.query(Request).filter(Request.created_at >= start)
     query = apply_role_based_filtering(query, current_user)
     
-    # Get completed requests
-    completed_requests = query.filter(
-        Request.status == RequestStatus.COMPLETED,
-        Request.sla_completion_time_hours.isnot(None),
-        Request.created_at.isnot(None),
-        Request.actual_completion_time.isnot(None)
-    ).all()
-    
-    within_sla = 0
-    overdue_completed = 0
-    total_completion_time = 0
-    
-    DEFAULT_SLA_HOURS = 96
-    
-    # Check completed requests
-    for req in completed_requests:
-        target_hours = req.sla_completion_time_hours or DEFAULT_SLA_HOURS
-        deadline = req.created_at + timedelta(hours=target_hours)
-        
-        if req.actual_completion_time <= deadline:
-            within_sla += 1
-        else:
-            overdue_completed += 1
-        
-        if req.completed_at and req.created_at:
-            total_completion_time += (req.completed_at - req.created_at).total_seconds() / 3600
-    
-    # Get active overdue requests
-    active_requests = query.filter(
-        Request.status.in_([RequestStatus.PENDING, RequestStatus.IN_PROGRESS]),
-        Request.sla_completion_time_hours.isnot(None),
-        Request.created_at.isnot(None)
-    ).all()
-    
-    overdue_active = 0
-    for req in active_requests:
-        target_hours = req.sla_completion_time_hours or DEFAULT_SLA_HOURS
-        deadline = req.created_at + timedelta(hours=target_hours)
-        if now > deadline:
-            overdue_active += 1
+    # Completed within/past SLA and active overdue, from the stored outcomes
+    counts = compliance_counts(query)
+    within_sla = counts["compliant"]
+    completed_count = counts["compliant"] + counts["non_compliant"]
+    
+    # Active requests with an SLA, and the total completion time of the completed ones
+    active_count, total_completion_time = query.with_entities(
+        count_where(
+            Request.status.in_(ACTIVE_STATUSES),
+            Request.sla_completion_time_hours.isnot(None),
+            Request.created_at.isnot(None)
+        ),
+        func.sum(case((or_(*completion_outcomes(db)), completion_hours)))
+    ).one()
     
     # Total calculations
-    total = len(completed_requests) + len(active_requests)
-    total_evaluated = within_sla + overdue_completed + overdue_active
-    total_overdue = overdue_completed + overdue_active
+    total = completed_count + active_count
+    total_evaluated = completed_count + counts["overdue_active"]
+    total_overdue = counts["non_compliant"] + counts["overdue_active"]
     compliance_rate = (within_sla / total_evaluated * 100) if total_evaluated > 0 else 100
-    avg_time = total_completion_time / len(completed_requests) if completed_requests else 0
+    avg_time = (total_completion_time or 0) / completed_count if completed_count else 0
     
     return {
         "total_requests": total,
@@ -94,7 +72,7 @@ async def get_sla_compliance(
 
 
 @router.get("/alerts")
-async def get_active_alerts(
+def get_active_alerts(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -110,95 +88,69 @@ async def get_active_alerts(
 
 
 @router.get("/overdue")
-async def get_overdue_requests(
+def get_overdue_requests(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get requests that are overdue"""
     now = datetime.utcnow()
     
-    # Get in-progress and pending requests
-    query = db.query(Request).filter(
-        Request.status.in_([RequestStatus.PENDING, RequestStatus.IN_PROGRESS, RequestStatus.APPROVED]),
-        Request.sla_completion_time_hours.isnot(None)
+    # In-progress, pending and approved requests past their completion deadline
+    query = db.query(Request, hours_overdue(now).label("hours_overdue")).filter(
+        is_overdue(now, statuses=(RequestStatus.PENDING, RequestStatus.IN_PROGRESS, RequestStatus.APPROVED)),
+        Request.sla_completion_time_hours != 0
     )
     query = apply_role_based_filtering(query, current_user)
-    active_requests = query.all()
-    
-    overdue = []
-    for req in active_requests:
-        if req.created_at and req.sla_completion_time_hours:
-            deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-            if now > deadline:
-                time_overdue = (now - deadline).total_seconds() / 3600
-                overdue.append({
-                    "request": req,
-                    "deadline": deadline,
-                    "hours_overdue": round(time_overdue, 2),
-                })
     
-    return overdue
+    return [
+        {
+            "request": req,
+            "deadline": req.created_at + timedelta(hours=req.sla_completion_time_hours),
+            "hours_overdue": round(time_overdue, 2),
+        }
+        for req, time_overdue in query.all()
+    ]
 
 
 @router.get("/dashboard")
-async def get_sla_dashboard(
+def get_sla_dashboard(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get SLA dashboard data"""
+    """Get SLA dashboard data (one aggregate query over the visible requests)"""
     now = datetime.utcnow()
-    
-    # Active requests
-    query = db.query(Request).filter(
-        Request.status.in_([RequestStatus.PENDING, RequestStatus.IN_PROGRESS, RequestStatus.APPROVED])
-    )
-    query = apply_role_based_filtering(query, current_user)
-    active_requests = query.all()
-    
-    # Categorize by SLA status
-    on_track = 0
-    at_risk_50 = 0  # 50-80% consumed
-    critical_80 = 0  # 80%+ consumed
-    overdue_count = 0
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     
     DEFAULT_SLA_HOURS = 24
-
-    for req in active_requests:
-        if req.created_at:
-            elapsed = (now - req.created_at).total_seconds() / 3600
-            target = req.sla_completion_time_hours or DEFAULT_SLA_HOURS
-            percent_consumed = (elapsed / target * 100) if target > 0 else 0
-            
-            if percent_consumed >= 100:
-                overdue_count += 1
-            elif percent_consumed >= 80:
-                critical_80 += 1
-            elif percent_consumed >= 50:
-                at_risk_50 += 1
-            else:
-                on_track += 1
     
-    # Today's compliance
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    query = db.query(Request).filter(
-        Request.status == RequestStatus.COMPLETED,
-        Request.completed_at >= today_start
-    )
+    # Active requests, categorized by how much of their SLA is consumed
+    active = Request.status.in_([RequestStatus.PENDING, RequestStatus.IN_PROGRESS, RequestStatus.APPROVED])
+    consumed = sla_consumed_percent(now, DEFAULT_SLA_HOURS)
+    
+    query = db.query(
+        count_where(active).label("active_requests"),
+        count_where(active, consumed < 50).label("on_track"),
+        count_where(active, consumed >= 50, consumed < 80).label("at_risk_50"),  # 50-80% consumed
+        count_where(active, consumed >= 80, consumed < 100).label("critical_80"),  # 80%+ consumed
+        count_where(active, consumed >= 100).label("overdue"),
+        # Today's compliance
+        count_where(Request.status == RequestStatus.COMPLETED, Request.completed_at >= today_start).label("completed_today"),
+    ).select_from(Request)
     query = apply_role_based_filtering(query, current_user)
-    today_completed = query.count()
+    stats = query.one()
     
     return {
-        "active_requests": len(active_requests),
-        "on_track": on_track,
-        "at_risk_50_percent": at_risk_50,
-        "critical_80_percent": critical_80,
-        "overdue": overdue_count,
-        "completed_today": today_completed,
+        "active_requests": stats.active_requests,
+        "on_track": stats.on_track,
+        "at_risk_50_percent": stats.at_risk_50,
+        "critical_80_percent": stats.critical_80,
+        "overdue": stats.overdue,
+        "completed_today": stats.completed_today,
     }
 
 
 @router.post("/alerts/{alert_id}/acknowledge")
-async def acknowledge_alert(
+def acknowledge_alert(
     alert_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -87,7 +87,7 @@ async def upload_item_file(
 
 
 @router.get("/item-file/{filename}")
-async def download_item_file(
+def download_item_file(
     filename: str,
     current_user: User = Depends(get_current_user)
 ):
@@ -116,7 +116,7 @@ async def download_item_file(
 
 
 @router.delete("/item-file/{filename}")
-async def delete_item_file(
+def delete_item_file(
     filename: str,
     current_user: User = Depends(get_current_user)
 ):
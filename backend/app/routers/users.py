@@ -5,6 +5,7 @@ from ..database import get_db
 from ..models import User, UserRole
 from ..schemas import UserRead, UserCreate, UserUpdate
 from ..auth import get_current_active_user, get_password_hash
+from ..services.principal_cache import principal_cache
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -88,6 +89,7 @@ def update_user(
         
     db.commit()
     db.refresh(db_user)
+    principal_cache.invalidate(db_user.username)
     return db_user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -105,6 +107,8 @@ def delete_user(
     if db_user.id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
         
+    username = db_user.username
     db.delete(db_user)
     db.commit()
+    principal_cache.invalidate(username)
     return None
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 
 from jose import jwt, JWTError
@@ -6,13 +7,13 @@ from jose import jwt, JWTError
 from ..config import settings
 from ..websocket.manager import manager
 from ..database import SessionLocal
-from ..models import User
+from ..services.principal_cache import Principal, principal_cache
 
 router = APIRouter()
 
 
-async def _validate_token_get_user(token: str) -> Optional[User]:
-    """Validate JWT token and return the DB User record or None."""
+def _validate_token_get_user(token: str) -> Optional[Principal]:
+    """Validate JWT token and return the user's cached Principal or None."""
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         username: str = payload.get("sub")
@@ -23,8 +24,7 @@ async def _validate_token_get_user(token: str) -> Optional[User]:
 
     db = SessionLocal()
     try:
-        user = db.query(User).filter(User.username == username).first()
-        return user
+        return principal_cache.get(db, username)
     finally:
         db.close()
 
@@ -40,7 +40,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str, token: str = Qu
         await websocket.close(code=4401)  # custom close for unauthorized
         return
 
-    user = await _validate_token_get_user(token)
+    user = await run_in_threadpool(_validate_token_get_user, token)
     if not user:
         await websocket.close(code=4401)
         return
@@ -547,3 +547,11 @@ class DepartmentRatingStats(BaseModel):
     average_professionalism: float
     rating_distribution: dict  # e.g., {"5": 10, "4": 5, "3": 2, "2": 1, "1": 0}
 
+
+
+# PDF Bundle Schemas
+class PDFBundleRequest(BaseModel):
+    """Request forms to bundle: explicit ids, or a department and/or month (YYYY-MM)"""
+    request_ids: Optional[List[int]] = None
+    department_id: Optional[int] = None
+    month: Optional[str] = Field(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$")
@@ -10,6 +10,7 @@ from datetime import datetime
 from typing import Dict, Optional
 from decimal import Decimal
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 
 from app.models import Request, RequestStatus, ScoreRating
 from app.kpi_calculator import (
@@ -19,6 +20,7 @@ from app.kpi_calculator import (
     calculate_vehicle_utilization_rate,
     calculate_staff_deployment_filling_rate
 )
+from app.services.sla_expressions import count_where
 
 
 # ============================================================================
@@ -51,16 +53,15 @@ def calculate_service_efficiency_score(
     if end_date:
         query = query.filter(Request.created_at <= end_date)
     
-    requests = query.all()
-    if not requests:
+    total, response_on_time = query.with_entities(
+        func.count(Request.id),
+        count_where(Request.actual_response_time <= Request.sla_response_deadline)
+    ).one()
+    if not total:
         return 0.0
     
     # Response time score (10%)
-    response_on_time = sum(
-        1 for r in requests 
-        if r.actual_response_time <= r.sla_response_deadline
-    )
-    response_score = (response_on_time / len(requests)) * 10
+    response_score = (response_on_time / total) * 10
     
     # Completion time score (10%) - from SLA compliance
     completion_rate = calculate_sla_compliance_rate(
@@ -106,10 +107,10 @@ def calculate_compliance_score(
     if end_date:
         query = query.filter(Request.created_at <= end_date)
     
-    total_completed = query.count()
-    with_satisfaction = query.filter(
-        Request.satisfaction_rating.isnot(None)
-    ).count()
+    total_completed, with_satisfaction = query.with_entities(
+        func.count(Request.id),
+        count_where(Request.satisfaction_rating.isnot(None))
+    ).one()
     
     completeness_rate = (with_satisfaction / total_completed * 100) if total_completed > 0 else 0
     completeness_score = (completeness_rate / 100) * 5
@@ -151,15 +152,14 @@ def calculate_cost_optimization_score(
     if end_date:
         query = query.filter(Request.created_at <= end_date)
     
-    requests = query.all()
+    # Cost efficiency: actual <= estimate is good
+    total, within_budget = query.with_entities(
+        func.count(Request.id),
+        count_where(Request.actual_cost <= Request.cost_estimate)
+    ).one()
     
-    if requests:
-        # Cost efficiency: actual <= estimate is good
-        within_budget = sum(
-            1 for r in requests 
-            if r.actual_cost <= r.cost_estimate
-        )
-        cost_score = (within_budget / len(requests)) * 5
+    if total:
+        cost_score = (within_budget / total) * 5
     else:
         cost_score = 4.0  # Baseline
     
@@ -340,8 +340,10 @@ def calculate_integration_index(
     if end_date:
         query = query.filter(Request.created_at <= end_date)
     
-    total = query.count()
-    with_data = query.filter(Request.satisfaction_rating.isnot(None)).count()
+    total, with_data = query.with_entities(
+        func.count(Request.id),
+        count_where(Request.satisfaction_rating.isnot(None))
+    ).one()
     timeliness = round((with_data / total * 100) if total > 0 else 0, 2)
     
     # Collaboration (based on cross-division requests)
@@ -72,3 +72,22 @@ def apply_role_based_filtering(query: Query, user: User, model=Request) -> Query
             )
             
     return query
+
+
+def role_scope_key(user: User) -> str:
+    """
+    Identifies the slice of requests apply_role_based_filtering lets this user
+    see, so results computed for one user can be shared with users who see
+    exactly the same requests (e.g. in services/result_cache.py).
+    """
+    user_role_str = str(user.role)
+
+    if "ADMIN" in user_role_str:
+        return "admin"
+    elif "DIVISION_MANAGER" in user_role_str:
+        return f"division:{user.division_id}"
+    elif "DEPARTMENT_HEAD" in user_role_str:
+        return f"department:{user.department_id}"
+    elif "SUB_DEPARTMENT_STAFF" in user_role_str:
+        return f"staff:{user.id}:{user.subdepartment_id}"
+    return f"user:{user.id}"
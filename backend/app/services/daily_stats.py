@@ -0,0 +1,298 @@
+"""
+Daily request rollup for the trend charts.
+
+request_daily_stats holds one row per (created day, requester division,
+requester department, resource type, priority, current status) with counts and
+sums of the facts the charts average: response and completion hours, SLA
+on-time completions and satisfaction ratings.
+
+Rows are kept current incrementally: every handler that changes a request
+wraps the change in track_request_stats(), which subtracts the request's old
+contribution and adds its new one in the same transaction. Since the day and
+the organisational unit of a request never change, a transition only moves one
+request between two status rows of the same day.
+
+scripts/backfill_daily_stats.py rebuilds the table from the requests table and
+marks it ready. Until then summarize_daily_stats() computes the same figures
+with a GROUP BY over the raw requests, so the charts stay correct on databases
+that were never backfilled. Either way only one row per bucket is returned.
+"""
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, func, insert, update
+from sqlalchemy.orm import Session
+
+from app.models import Request, RequestDailyStat, RequestStatus, SystemSettings
+from app.services.sla_expressions import completion_hours, response_hours
+from app.services.sql_time import date_bucket, dialect_name
+
+ROLLUP_READY_KEY = "request_daily_stats_ready"
+
+VALUE_COLUMNS = (
+    "request_count",
+    "sla_evaluated_count",
+    "on_time_count",
+    "response_count",
+    "response_hours_sum",
+    "completion_count",
+    "completion_hours_sum",
+    "satisfaction_count",
+    "satisfaction_sum",
+)
+
+# Request columns behind each rollup key field (other than the day)
+_REQUEST_GROUP_COLUMNS = {
+    "division_id": Request.requester_division_id,
+    "department_id": Request.requester_department_id,
+    "resource_type": Request.resource_type,
+    "priority": Request.priority,
+    "status": Request.status,
+}
+
+_rollup_ready = False
+
+
+class StatKey(NamedTuple):
+    day: date
+    division_id: Optional[int]
+    department_id: Optional[int]
+    resource_type: object
+    priority: object
+    status: RequestStatus
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize DB datetimes (naive UTC on SQLite, aware on PostgreSQL)"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _hours_between(start: datetime, end: datetime) -> float:
+    return (_utc_naive(end) - _utc_naive(start)).total_seconds() / 3600
+
+
+def request_contribution(request) -> Optional[Tuple[StatKey, Dict[str, float]]]:
+    """
+    Rollup key and counters of one request, or None when it cannot be placed
+    on a day yet. Must stay in line with _request_counters().
+    """
+    created_at = _utc_naive(request.created_at)
+    if created_at is None or request.status is None:
+        return None
+
+    key = StatKey(
+        day=created_at.date(),
+        division_id=request.requester_division_id,
+        department_id=request.requester_department_id,
+        resource_type=request.resource_type,
+        priority=request.priority,
+        status=request.status,
+    )
+    values = dict.fromkeys(VALUE_COLUMNS, 0)
+    values["request_count"] = 1
+    if request.actual_response_time is not None:
+        values["response_count"] = 1
+        values["response_hours_sum"] = _hours_between(created_at, request.actual_response_time)
+    if request.completed_at is not None:
+        values["completion_count"] = 1
+        values["completion_hours_sum"] = _hours_between(created_at, request.completed_at)
+    if request.actual_completion_time is not None and request.sla_completion_deadline is not None:
+        values["sla_evaluated_count"] = 1
+        if _utc_naive(request.actual_completion_time) <= _utc_naive(request.sla_completion_deadline):
+            values["on_time_count"] = 1
+    if request.satisfaction_rating is not None:
+        values["satisfaction_count"] = 1
+        values["satisfaction_sum"] = request.satisfaction_rating
+    return key, values
+
+
+def _key_filters(key: StatKey):
+    filters = []
+    for name, value in key._asdict().items():
+        column = getattr(RequestDailyStat, name)
+        filters.append(column.is_(None) if value is None else column == value)
+    return filters
+
+
+def _apply_delta(db: Session, key: StatKey, delta: Dict[str, float]):
+    """Add delta to the rollup row of key, creating the row if needed"""
+    delta = {column: amount for column, amount in delta.items() if amount}
+    if not delta:
+        return
+
+    # Concurrent first writers may both insert a row for the same key; readers
+    # sum rows anyway, so only one of them is ever updated
+    row_id = db.query(RequestDailyStat.id).filter(*_key_filters(key)).order_by(
+        RequestDailyStat.id
+    ).limit(1).scalar()
+    if row_id is None:
+        values = dict.fromkeys(VALUE_COLUMNS, 0)
+        values.update(delta)
+        db.execute(insert(RequestDailyStat).values(**key._asdict(), **values))
+        return
+
+    db.execute(
+        update(RequestDailyStat)
+        .where(RequestDailyStat.id == row_id)
+        .values({column: getattr(RequestDailyStat, column) + amount for column, amount in delta.items()})
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _apply_change(db: Session, before, after):
+    if before and after and before[0] == after[0]:
+        _apply_delta(db, after[0], {c: after[1][c] - before[1][c] for c in VALUE_COLUMNS})
+        return
+    if before:
+        _apply_delta(db, before[0], {c: -amount for c, amount in before[1].items()})
+    if after:
+        _apply_delta(db, after[0], after[1])
+
+
+def record_new_request(db: Session, request: Request):
+    """Count a newly created request (call before committing it)"""
+    _apply_change(db, None, request_contribution(request))
+
+
+@contextmanager
+def track_request_stats(db: Session, request: Request):
+    """
+    Move a request's contribution to where the changes made inside the block
+    put it. Commit after the block so both land in the same transaction.
+    """
+    before = request_contribution(request)
+    yield
+    _apply_change(db, before, request_contribution(request))
+
+
+def clear_daily_stats(db: Session):
+    """Empty the rollup (used when all requests are deleted)"""
+    db.query(RequestDailyStat).delete(synchronize_session=False)
+
+
+def rebuild_daily_stats(db: Session, batch_size: int = 2000) -> int:
+    """Recompute the whole rollup from the requests table and mark it ready"""
+    rows = aggregate_requests(db, StatKey._fields)
+
+    clear_daily_stats(db)
+    for start in range(0, len(rows), batch_size):
+        db.execute(insert(RequestDailyStat), rows[start:start + batch_size])
+
+    setting = db.query(SystemSettings).filter(SystemSettings.setting_key == ROLLUP_READY_KEY).first()
+    if not setting:
+        setting = SystemSettings(
+            setting_key=ROLLUP_READY_KEY,
+            setting_value="",
+            description="request_daily_stats has been backfilled and is maintained incrementally"
+        )
+        db.add(setting)
+    setting.setting_value = datetime.utcnow().isoformat()
+    db.commit()
+    return len(rows)
+
+
+def rollup_ready(db: Session) -> bool:
+    """Whether the rollup has been backfilled (remembered once seen)"""
+    global _rollup_ready
+    if not _rollup_ready:
+        _rollup_ready = db.query(SystemSettings.id).filter(
+            SystemSettings.setting_key == ROLLUP_READY_KEY
+        ).first() is not None
+    return _rollup_ready
+
+
+def _request_counters():
+    """SQL aggregates matching request_contribution(), summed over a group"""
+    return [
+        func.count(Request.id).label("request_count"),
+        func.sum(case(
+            (and_(Request.actual_completion_time.isnot(None), Request.sla_completion_deadline.isnot(None)), 1),
+            else_=0
+        )).label("sla_evaluated_count"),
+        func.sum(case(
+            (Request.actual_completion_time <= Request.sla_completion_deadline, 1), else_=0
+        )).label("on_time_count"),
+        func.count(Request.actual_response_time).label("response_count"),
+        func.coalesce(func.sum(response_hours), 0).label("response_hours_sum"),
+        func.count(Request.completed_at).label("completion_count"),
+        func.coalesce(func.sum(completion_hours), 0).label("completion_hours_sum"),
+        func.count(Request.satisfaction_rating).label("satisfaction_count"),
+        func.coalesce(func.sum(Request.satisfaction_rating), 0).label("satisfaction_sum"),
+    ]
+
+
+def _as_dates(rows: List[dict], group_by: Sequence[str]) -> List[dict]:
+    if "day" in group_by:
+        for row in rows:
+            if isinstance(row["day"], str):
+                row["day"] = date.fromisoformat(row["day"])
+    return rows
+
+
+def aggregate_requests(
+    db: Session,
+    group_by: Sequence[str],
+    unit: str = "day",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    status: Optional[RequestStatus] = None,
+) -> List[dict]:
+    """
+    Rollup counters computed straight from the requests table with one
+    GROUP BY query; "day" groups by the start of the created day/month/year.
+    """
+    dialect = dialect_name(db)
+    group_columns = [
+        date_bucket(Request.created_at, unit, dialect).label("day") if name == "day"
+        else _REQUEST_GROUP_COLUMNS[name].label(name)
+        for name in group_by
+    ]
+    query = db.query(*group_columns, *_request_counters())
+    if start_date is not None:
+        query = query.filter(Request.created_at >= start_date)
+    if end_date is not None:
+        query = query.filter(Request.created_at <= end_date)
+    if status is not None:
+        query = query.filter(Request.status == status)
+    query = query.filter(Request.created_at.isnot(None), Request.status.isnot(None))
+    return _as_dates([row._asdict() for row in query.group_by(*group_columns)], group_by)
+
+
+def summarize_daily_stats(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    group_by: Sequence[str],
+    status: Optional[RequestStatus] = None,
+    unit: str = "day",
+) -> List[dict]:
+    """
+    Summed counters for requests created between start_date and end_date,
+    grouped by the given StatKey fields (e.g. ("day", "status")), with "day"
+    truncated to the start of its day/month/year bucket.
+
+    Reads the rollup (whole days) once it is backfilled, otherwise runs the
+    same aggregation over the raw requests of the window.
+    """
+    if not rollup_ready(db):
+        return aggregate_requests(db, group_by, unit, start_date, end_date, status)
+
+    dialect = dialect_name(db)
+    group_columns = [
+        (RequestDailyStat.day if unit == "day" else date_bucket(RequestDailyStat.day, unit, dialect)).label("day")
+        if name == "day" else getattr(RequestDailyStat, name)
+        for name in group_by
+    ]
+    query = db.query(
+        *group_columns,
+        *[func.sum(getattr(RequestDailyStat, column)).label(column) for column in VALUE_COLUMNS]
+    ).filter(
+        RequestDailyStat.day >= _utc_naive(start_date).date(),
+        RequestDailyStat.day <= _utc_naive(end_date).date()
+    )
+    if status is not None:
+        query = query.filter(RequestDailyStat.status == status)
+    return _as_dates([row._asdict() for row in query.group_by(*group_columns)], group_by)
@@ -0,0 +1,403 @@
+"""
+Outbound email queue.
+
+Request emails used to be sent on the request path: a new SMTP connection,
+STARTTLS and login for every created request, so a slow relay slowed down
+request creation by seconds. Emails are now stored in the outbound_emails
+table (enqueue_email()) and sent by the scheduler leader:
+
+- the sender claims due messages in batches and splits each batch over
+  EMAIL_SMTP_CONNECTIONS threads; every thread sends its share over its own
+  SMTP session, which stays logged in between batches (checked with NOOP
+  after a pause, closed after EMAIL_SMTP_IDLE_SECONDS without mail)
+- a failed message is retried with exponential backoff from
+  EMAIL_RETRY_BASE_SECONDS, up to EMAIL_MAX_ATTEMPTS; a permanent (5xx)
+  rejection fails it at once
+- messages a dead leader left SENDING are sent again by the next one, so
+  delivery is at least once
+- queue depth is counted from the table (queue_depth()); sent/failed/retry
+  counts and latencies are reported with the scheduler job stats
+
+Other workers enqueue and the leader picks the message up within
+EMAIL_POLL_SECONDS; in the leader itself enqueue_email() wakes it at once.
+"""
+import random
+import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import OutboundEmail, OutboundEmailStatus
+from app.services.email_service import EmailService, SMTPConfig
+
+MAX_RETRY_DELAY_SECONDS = 3600
+# A session that has been quiet this long is checked with NOOP before use
+NOOP_AFTER_IDLE_SECONDS = 10
+LATENCY_WINDOW = 1000
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_email(
+    db: Session,
+    recipients: List[str],
+    subject: str,
+    html_body: str,
+    inline_images: Optional[List[dict]] = None,
+    request_id: Optional[int] = None
+) -> OutboundEmail:
+    """Store an email for the sender and commit"""
+    now = _now()
+    email = OutboundEmail(
+        request_id=request_id,
+        recipients=recipients,
+        subject=subject,
+        html_body=html_body,
+        inline_images=inline_images or [],
+        status=OutboundEmailStatus.PENDING,
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+    )
+    db.add(email)
+    db.commit()
+    email_sender.wake()
+    return email
+
+
+def queue_depth(db: Session) -> Dict:
+    """Messages per status and the age of the oldest one still waiting"""
+    counts = {status.value: 0 for status in OutboundEmailStatus}
+    for status, count in db.query(OutboundEmail.status, func.count()).group_by(OutboundEmail.status):
+        counts[status.value] = count
+    oldest = db.query(func.min(OutboundEmail.created_at)).filter(
+        OutboundEmail.status.in_([OutboundEmailStatus.PENDING, OutboundEmailStatus.SENDING])
+    ).scalar()
+    if oldest is not None and oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+    return {
+        "by_status": counts,
+        "waiting": counts["PENDING"] + counts["SENDING"],
+        "oldest_waiting_seconds": round((_now() - oldest).total_seconds(), 1) if oldest else None,
+    }
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before the next try after `attempts` failed ones (doubling, +-20% jitter)"""
+    delay = min(settings.email_retry_base_seconds * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies will not change on retry; connection trouble and 4xx may"""
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        # Wrong credentials are fixed in the settings, not in the message
+        return False
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+class _SMTPSession:
+    """One SMTP connection, opened on demand and kept logged in"""
+
+    def __init__(self, config: SMTPConfig):
+        self.config = config
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self._smtp is not None
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self._last_used
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is not None and self.idle_seconds() > NOOP_AFTER_IDLE_SECONDS:
+            try:
+                if self._smtp.noop()[0] != 250:
+                    self.close()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.config.host, self.config.port, timeout=settings.email_smtp_timeout_seconds)
+            try:
+                smtp.starttls()  # Enable TLS
+                smtp.login(self.config.user, self.config.password)
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+        return self._smtp
+
+    def send(self, email: OutboundEmail) -> Dict:
+        """Send one message; returns the refused recipients (if some were accepted)"""
+        message = EmailService.build_message(
+            recipients=email.recipients,
+            subject=email.subject,
+            html_body=email.html_body,
+            sender=self.config.user,
+            images=email.inline_images,
+        )
+        try:
+            refused = self._connection().send_message(message)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server rejected this message; the session is still usable
+            # (unless it was the login that failed, which leaves it closed)
+            self._last_used = time.monotonic()
+            raise
+        except Exception:
+            self.close()
+            raise
+        self._last_used = time.monotonic()
+        return refused
+
+    def close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+
+class EmailSender:
+    """Drains the outbound queue while this worker is the scheduler leader"""
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sessions: List[_SMTPSession] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._counters = {"sent": 0, "failed": 0, "retried": 0, "batches": 0}
+        self._send_ms = deque(maxlen=LATENCY_WINDOW)
+        self._queued_seconds = deque(maxlen=LATENCY_WINDOW)
+        self._last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._requeue_abandoned()
+        self._thread = threading.Thread(target=self._run, name="email-sender", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=settings.email_smtp_timeout_seconds + 5)
+            self._thread = None
+        self._close_sessions()
+
+    def wake(self):
+        """Send newly queued mail now instead of at the next poll (this worker only)"""
+        if self.running:
+            self._wake.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            send_ms = sorted(self._send_ms)
+            queued = sorted(self._queued_seconds)
+            return {
+                **self._counters,
+                "running": self.running,
+                "open_sessions": sum(1 for session in self._sessions if session.is_open),
+                "send_ms": _summary(send_ms),
+                "queued_seconds": _summary(queued),
+                "last_error": self._last_error,
+            }
+
+    # ===== Drain loop =====
+
+    def _run(self):
+        while not self._stop.is_set():
+            handled = 0
+            try:
+                handled = self.drain_once()
+            except Exception as e:
+                self._last_error = str(e)
+                print(f"❌ Error sending queued emails: {e}")
+            self._close_idle_sessions()
+            if handled < settings.email_batch_size:
+                # Queue drained (or sending is failing): wait for new mail
+                self._wake.wait(settings.email_poll_seconds)
+                self._wake.clear()
+
+    def drain_once(self) -> int:
+        """Send one batch of due messages; returns how many were handled"""
+        db = SessionLocal()
+        try:
+            config = EmailService.smtp_config(db)
+            if config is None:
+                return 0
+            self._use_config(config)
+
+            emails = self._claim_batch(db)
+            if not emails:
+                return 0
+
+            shares = [emails[i::len(self._sessions)] for i in range(len(self._sessions))]
+            results: List[Tuple[OutboundEmail, Optional[Exception], float]] = []
+            for share_results in self._executor.map(_send_share, self._sessions, shares):
+                results.extend(share_results)
+
+            self._record(db, results)
+            return len(emails)
+        finally:
+            db.close()
+
+    def _claim_batch(self, db: Session) -> List[OutboundEmail]:
+        ids = [row.id for row in db.query(OutboundEmail.id).filter(
+            OutboundEmail.status == OutboundEmailStatus.PENDING,
+            OutboundEmail.next_attempt_at <= _now()
+        ).order_by(OutboundEmail.next_attempt_at, OutboundEmail.id).limit(settings.email_batch_size)]
+        if not ids:
+            return []
+        db.query(OutboundEmail).filter(OutboundEmail.id.in_(ids)).update(
+            {OutboundEmail.status: OutboundEmailStatus.SENDING}, synchronize_session=False
+        )
+        db.commit()
+        # Loaded after the commit so the sender threads only read loaded attributes
+        return db.query(OutboundEmail).filter(OutboundEmail.id.in_(ids)).order_by(OutboundEmail.id).all()
+
+    def _record(self, db: Session, results: List[Tuple[OutboundEmail, Optional[Exception], float]]):
+        now = _now()
+        counters = {"sent": 0, "failed": 0, "retried": 0}
+        send_ms, queued_seconds = [], []
+        for email, error, elapsed_ms in results:
+            email.attempts += 1
+            if error is None:
+                email.status = OutboundEmailStatus.SENT
+                email.sent_at = now
+                counters["sent"] += 1
+                created_at = email.created_at
+                if created_at.tzinfo is None:
+                    created_at = created_at.replace(tzinfo=timezone.utc)
+                queued_seconds.append((now - created_at).total_seconds())
+                send_ms.append(elapsed_ms)
+                continue
+
+            email.last_error = f"{type(error).__name__}: {error}"
+            if _is_permanent(error) or email.attempts >= settings.email_max_attempts:
+                email.status = OutboundEmailStatus.FAILED
+                counters["failed"] += 1
+                print(f"❌ Email {email.id} failed after {email.attempts} attempt(s): {email.last_error}")
+            else:
+                email.status = OutboundEmailStatus.PENDING
+                email.next_attempt_at = now + timedelta(seconds=retry_delay(email.attempts))
+                counters["retried"] += 1
+            self._last_error = email.last_error
+        db.commit()
+
+        with self._lock:
+            for name, count in counters.items():
+                self._counters[name] += count
+            self._counters["batches"] += 1
+            self._send_ms.extend(send_ms)
+            self._queued_seconds.extend(queued_seconds)
+
+    def _requeue_abandoned(self):
+        """Messages claimed by a leader that died before recording them"""
+        db = SessionLocal()
+        try:
+            requeued = db.query(OutboundEmail).filter(
+                OutboundEmail.status == OutboundEmailStatus.SENDING
+            ).update({OutboundEmail.status: OutboundEmailStatus.PENDING}, synchronize_session=False)
+            db.commit()
+            if requeued:
+                print(f"📧 Requeued {requeued} email(s) left unsent by the previous sender")
+        finally:
+            db.close()
+
+    # ===== SMTP sessions =====
+
+    def _use_config(self, config: SMTPConfig):
+        """(Re)create the sessions when the SMTP settings change"""
+        if self._sessions and self._sessions[0].config == config:
+            return
+        self._close_sessions()
+        self._sessions = [_SMTPSession(config) for _ in range(settings.email_smtp_connections)]
+        self._executor = ThreadPoolExecutor(max_workers=len(self._sessions), thread_name_prefix="smtp")
+
+    def _close_idle_sessions(self):
+        for session in self._sessions:
+            if session.is_open and session.idle_seconds() > settings.email_smtp_idle_seconds:
+                session.close()
+
+    def _close_sessions(self):
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for session in self._sessions:
+            session.close()
+        self._sessions = []
+
+
+def _send_share(session: _SMTPSession, emails: List[OutboundEmail]) -> List[Tuple[OutboundEmail, Optional[Exception], float]]:
+    """Send a share of a batch over one session: (email, error, milliseconds) each"""
+    results = []
+    for email in emails:
+        started = time.monotonic()
+        try:
+            refused = session.send(email)
+            if refused:
+                email.last_error = f"Refused recipients: {', '.join(refused)}"
+            results.append((email, None, (time.monotonic() - started) * 1000))
+        except Exception as e:
+            results.append((email, e, (time.monotonic() - started) * 1000))
+            if not session.is_open:
+                # Could not connect or log in, or the connection dropped: the
+                # rest of the share would fail the same way, so they are
+                # retried (with backoff) along with this one
+                results.extend((rest, e, 0.0) for rest in emails[len(results):])
+                break
+    return results
+
+
+def _summary(values: List[float]) -> Optional[Dict]:
+    """Count, average, median, p95 and max of sorted values"""
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "avg": round(sum(values) / len(values), 1),
+        "p50": round(values[len(values) // 2], 1),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+        "max": round(values[-1], 1),
+    }
+
+
+def purge_sent_emails(db: Session) -> int:
+    """Delete sent and failed messages older than EMAIL_RETENTION_DAYS"""
+    cutoff = _now() - timedelta(days=settings.email_retention_days)
+    deleted = db.query(OutboundEmail).filter(
+        OutboundEmail.status.in_([OutboundEmailStatus.SENT, OutboundEmailStatus.FAILED]),
+        OutboundEmail.created_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+# Shared outbound email sender for the process (runs in the leader only)
+email_sender = EmailSender()
@@ -1,9 +1,9 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
 from email.utils import make_msgid
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
 import logging
 from sqlalchemy.orm import Session
 import os
@@ -13,6 +13,19 @@ from ..models import Request, User, SystemSettings
 
 logger = logging.getLogger(__name__)
 
+# Email images live in the frontend's public folder:
+# services -> app -> backend -> project root
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+HEADER_IMAGE_PATH = os.path.join(PROJECT_ROOT, "frontend", "public", "tebita-email-header.png")
+ICON_IMAGE_PATH = os.path.join(PROJECT_ROOT, "frontend", "public", "tebita-email-icon.png")
+
+
+class SMTPConfig(NamedTuple):
+    host: str
+    port: int
+    user: str
+    password: str
+
 
 class EmailService:
     """Service for sending email notifications"""
@@ -41,28 +54,17 @@ class EmailService:
         assigned_users: List[User]
     ) -> bool:
         """
-        Send email notification for a new request (any priority)
+        Queue an email notification for a new request (any priority)
         
-        Returns True if email sent successfully, False otherwise
+        Returns True if the email was queued, False otherwise
         """
         # Check if email notifications are enabled globally
         if not EmailService.is_email_enabled(db):
             logger.info("Email notifications are disabled in system settings")
             return False
         
-        # Fetch SMTP settings from DB
-        smtp_host_setting = db.query(SystemSettings).filter(SystemSettings.setting_key == "smtp_host").first()
-        smtp_port_setting = db.query(SystemSettings).filter(SystemSettings.setting_key == "smtp_port").first()
-        smtp_user_setting = db.query(SystemSettings).filter(SystemSettings.setting_key == "smtp_email").first()
-        smtp_pass_setting = db.query(SystemSettings).filter(SystemSettings.setting_key == "smtp_password").first()
-        
-        # Use DB settings or fallback to env vars
-        smtp_host = smtp_host_setting.setting_value if smtp_host_setting else settings.SMTP_HOST
-        smtp_port = int(smtp_port_setting.setting_value) if smtp_port_setting else settings.SMTP_PORT
-        smtp_user = smtp_user_setting.setting_value if smtp_user_setting else settings.SMTP_USERNAME
-        smtp_pass = smtp_pass_setting.setting_value if smtp_pass_setting else settings.SMTP_PASSWORD
-        
-        if not smtp_host or not smtp_user:
+        smtp_config = EmailService.smtp_config(db)
+        if smtp_config is None:
             logger.warning("SMTP not configured, skipping email")
             return False
         
@@ -95,62 +97,50 @@ class EmailService:
                 icon_cid[1:-1]
             )
             
-            # Send email with attachments
-            try:
-                # Define image paths
-                # Current file: backend/app/services/email_service.py
-                # We need to go up 4 levels to reach project root: services -> app -> backend -> Tebita-SLA-System
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                backend_dir = os.path.dirname(os.path.dirname(current_dir))
-                project_root = os.path.dirname(backend_dir)
-                
-                header_logo_path = os.path.join(project_root, "frontend", "public", "tebita-email-header.png")
-                icon_image_path = os.path.join(project_root, "frontend", "public", "tebita-email-icon.png")
-                
-                images = []
-                
-                # Helper to load image
-                def load_image(path, cid):
-                    if os.path.exists(path):
-                        with open(path, 'rb') as f:
-                            img_data = f.read()
-                            # Pass the full CID (with brackets) for the header
-                            return {"data": img_data, "cid": cid, "name": os.path.basename(path)}
-                    return None
-
-                img1 = load_image(header_logo_path, header_cid)
-                if img1: images.append(img1)
-                
-                img2 = load_image(icon_image_path, icon_cid)
-                if img2: images.append(img2)
-
-                return EmailService._send_email(
-                    recipients=recipients,
-                    subject=subject,
-                    html_body=html_body,
-                    smtp_host=smtp_host,
-                    smtp_port=smtp_port,
-                    smtp_user=smtp_user,
-                    smtp_pass=smtp_pass,
-                    images=images
-                )
-            except Exception as e:
-                logger.error(f"Error preparing email images: {e}")
-                # Fallback to sending without images if file access fails
-                return EmailService._send_email(
-                    recipients=recipients,
-                    subject=subject,
-                    html_body=html_body,
-                    smtp_host=smtp_host,
-                    smtp_port=smtp_port,
-                    smtp_user=smtp_user,
-                    smtp_pass=smtp_pass
-                )
+            # Images are referenced by path and attached when the queue sends
+            # the message; missing files are left out
+            images = [
+                {"path": path, "cid": cid, "name": os.path.basename(path)}
+                for path, cid in ((HEADER_IMAGE_PATH, header_cid), (ICON_IMAGE_PATH, icon_cid))
+                if os.path.exists(path)
+            ]
+            
+            # Sent by the outbound queue, off the request path
+            from .email_queue import enqueue_email
+            enqueue_email(
+                db,
+                recipients=recipients,
+                subject=subject,
+                html_body=html_body,
+                inline_images=images,
+                request_id=request.id
+            )
+            logger.info(f"Email for request {request.request_id} queued for {len(recipients)} recipient(s)")
+            return True
             
         except Exception as e:
-            logger.error(f"Failed to send email notification: {e}")
+            logger.error(f"Failed to queue email notification: {e}")
             return False
     
+    @staticmethod
+    def smtp_config(db: Session) -> Optional[SMTPConfig]:
+        """SMTP server and credentials (DB settings, falling back to env vars); None if not configured"""
+        values = {
+            setting.setting_key: setting.setting_value
+            for setting in db.query(SystemSettings).filter(
+                SystemSettings.setting_key.in_(["smtp_host", "smtp_port", "smtp_email", "smtp_password"])
+            )
+        }
+        config = SMTPConfig(
+            host=values.get("smtp_host", settings.SMTP_HOST),
+            port=int(values.get("smtp_port", settings.SMTP_PORT)),
+            user=values.get("smtp_email", settings.SMTP_USERNAME),
+            password=values.get("smtp_password", settings.SMTP_PASSWORD),
+        )
+        if not config.host or not config.user:
+            return None
+        return config
+    
     @staticmethod
     def _create_email_html(request: Request, header_cid: str, icon_cid: str) -> str:
         """Create HTML email body"""
@@ -306,52 +296,41 @@ class EmailService:
         return html
     
     @staticmethod
-    def _send_email(
-        recipients: List[str], 
-        subject: str, 
+    def build_message(
+        recipients: List[str],
+        subject: str,
         html_body: str,
-        smtp_host: str,
-        smtp_port: int,
-        smtp_user: str,
-        smtp_pass: str,
+        sender: str,
         images: Optional[List[dict]] = None
-    ) -> bool:
-        """Send email using SMTP with provided credentials"""
-        try:
-            # Create message
-            msg = MIMEMultipart('related')
-            msg['From'] = f"{settings.SMTP_FROM_NAME} <{smtp_user}>"
-            msg['To'] = ", ".join(recipients)
-            msg['Subject'] = subject
-            
-            # Attach HTML body
-            html_part = MIMEText(html_body, 'html')
-            msg.attach(html_part)
-            
-            # Attach images if provided
-            if images:
-                for img in images:
-                    try:
-                        image_part = MIMEImage(img['data'], name=img['name'])
-                        # Use the CID exactly as provided (should include angle brackets)
-                        image_part.add_header('Content-ID', f"{img['cid']}")
-                        image_part.add_header('Content-Disposition', 'inline', filename=img['name'])
-                        msg.attach(image_part)
-                    except Exception as e:
-                        logger.error(f"Failed to attach image {img.get('name')}: {e}")
-            
-            # Connect to SMTP server
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
-                server.starttls()  # Enable TLS
-                server.login(smtp_user, smtp_pass)
-                server.send_message(msg)
-            
-            logger.info(f"Email sent successfully to {len(recipients)} recipient(s)")
-            return True
-            
-        except Exception as e:
-            logger.error(f"SMTP error: {e}")
-            return False
+    ) -> MIMEMultipart:
+        """HTML email with inline images ({"path", "cid", "name"}, cid with angle brackets)"""
+        msg = MIMEMultipart('related')
+        msg['From'] = f"{settings.SMTP_FROM_NAME} <{sender}>"
+        msg['To'] = ", ".join(recipients)
+        msg['Subject'] = subject
+        
+        # Attach HTML body
+        html_part = MIMEText(html_body, 'html')
+        msg.attach(html_part)
+        
+        # Attach images if provided
+        for img in images or []:
+            try:
+                image_part = MIMEImage(_image_data(img['path']), name=img['name'])
+                # Use the CID exactly as provided (should include angle brackets)
+                image_part.add_header('Content-ID', f"{img['cid']}")
+                image_part.add_header('Content-Disposition', 'inline', filename=img['name'])
+                msg.attach(image_part)
+            except Exception as e:
+                logger.error(f"Failed to attach image {img.get('name')}: {e}")
+        
+        return msg
+
+
+@lru_cache(maxsize=8)
+def _image_data(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
 
 
 # Global instance
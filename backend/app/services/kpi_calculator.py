@@ -1,20 +1,42 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case, extract
+from sqlalchemy import func, case
 from app.models import Request, RequestStatus, Priority, FleetRequest, HRDeployment, FinanceTransaction, ICTTicket, LogisticsRequest, CustomerSatisfaction
-from datetime import datetime, timedelta, timezone
+from app.services.sla_expressions import count_where, is_overdue, sla_completion_hours
+from app.services.sla_outcomes import compliance_columns
+from datetime import datetime
 
 def calculate_kpi_metrics(db: Session, department_id: int = None, division_id: int = None):
     """
     Calculates real-time KPI metrics for a given department/division (or all if None).
+    All counts come from one aggregate query over the matching requests.
     """
     query = db.query(Request)
     if department_id:
         query = query.filter(Request.assigned_department_id == department_id)
     if division_id:
         query = query.filter(Request.assigned_division_id == division_id)
-        
-    # Base stats
-    total_requests = query.count()
+
+    now = datetime.utcnow()  # Use timezone-naive to match created_at
+
+    stats = query.with_entities(
+        func.count(Request.id).label("total_requests"),
+        # 1. SLA Resolution Compliance (includes active overdue requests)
+        *compliance_columns(db, now),
+        # 2. Average Resolution Time of completed requests (to actual_completion_time)
+        func.avg(case((Request.status == RequestStatus.COMPLETED, sla_completion_hours))).label("avg_hours"),
+        # 3. Pending Requests
+        count_where(Request.status.in_([
+            RequestStatus.PENDING, RequestStatus.IN_PROGRESS, RequestStatus.APPROVAL_PENDING
+        ])).label("pending"),
+        # 4. Priority Distribution
+        count_where(Request.priority == Priority.HIGH).label("high_priority"),
+        count_where(Request.priority == Priority.MEDIUM).label("medium_priority"),
+        count_where(Request.priority == Priority.LOW).label("low_priority"),
+        # 5. Rejection Rate
+        count_where(Request.status == RequestStatus.REJECTED).label("rejected"),
+    ).one()
+
+    total_requests = stats.total_requests
     if total_requests == 0:
         return {
             "total_requests": 0,
@@ -28,87 +50,22 @@ def calculate_kpi_metrics(db: Session, department_id: int = None, division_id: i
             }
         }
 
-    # 1. SLA Resolution Compliance (includes active overdue requests)
-    # FIXED: Calculate deadline from created_at + sla_completion_time_hours
-    
-    now = datetime.utcnow()  # Use timezone-naive to match created_at
-    
-    # Get all completed requests with SLA time defined
-    completed_requests = query.filter(
-        Request.status == RequestStatus.COMPLETED,
-        Request.sla_completion_time_hours.isnot(None),
-        Request.created_at.isnot(None),
-        Request.actual_completion_time.isnot(None)
-    ).all()
-    
-    compliant_completed = 0
-    non_compliant_completed = 0
-    
-    for req in completed_requests:
-        deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-        if req.actual_completion_time <= deadline:
-            compliant_completed += 1
-        else:
-            non_compliant_completed += 1
-    
-    # Get active overdue requests
-    active_requests = query.filter(
-        Request.status.in_([RequestStatus.PENDING, RequestStatus.IN_PROGRESS]),
-        Request.sla_completion_time_hours.isnot(None),
-        Request.created_at.isnot(None)
-    ).all()
-    
-    overdue_active = 0
-    for req in active_requests:
-        deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-        if now > deadline:
-            overdue_active += 1
-    
     # Total requests to evaluate
-    total_evaluated = compliant_completed + non_compliant_completed + overdue_active
-    compliance_rate = (compliant_completed / total_evaluated * 100) if total_evaluated > 0 else 100
-
-    # 2. Average Resolution Time
-    # Avg of (actual_completion_time - created_at) for completed requests
-    # Note: This is a simplified calculation. For precise DB-side avg, we'd use func.avg with epoch extraction.
-    # Here we'll do it in Python for simplicity if volume is low, or use a hybrid approach.
-    # Let's use a DB query for efficiency.
-    avg_time_query = db.query(
-        func.avg(extract('epoch', Request.actual_completion_time) - extract('epoch', Request.created_at))
-    ).filter(Request.status == RequestStatus.COMPLETED)
-    
-    if department_id:
-        avg_time_query = avg_time_query.filter(Request.assigned_department_id == department_id)
-    if division_id:
-        avg_time_query = avg_time_query.filter(Request.assigned_division_id == division_id)
-        
-    avg_seconds = avg_time_query.scalar() or 0
-    avg_hours = round(avg_seconds / 3600, 1)
-
-    # 3. Pending Requests
-    pending_count = query.filter(
-        Request.status.in_([RequestStatus.PENDING, RequestStatus.IN_PROGRESS, RequestStatus.APPROVAL_PENDING])
-    ).count()
+    total_evaluated = stats.compliant + stats.non_compliant + stats.overdue_active
+    compliance_rate = (stats.compliant / total_evaluated * 100) if total_evaluated > 0 else 100
 
-    # 4. Priority Distribution
-    high_priority = query.filter(Request.priority == Priority.HIGH).count()
-    medium_priority = query.filter(Request.priority == Priority.MEDIUM).count()
-    low_priority = query.filter(Request.priority == Priority.LOW).count()
-
-    # 5. Rejection Rate
-    rejected_count = query.filter(Request.status == RequestStatus.REJECTED).count()
-    rejection_rate = (rejected_count / total_requests * 100) if total_requests > 0 else 0
+    rejection_rate = (stats.rejected / total_requests * 100) if total_requests > 0 else 0
 
     return {
         "total_requests": total_requests,
         "sla_compliance_rate": round(compliance_rate, 1),
-        "avg_resolution_time_hours": avg_hours,
-        "pending_requests": pending_count,
+        "avg_resolution_time_hours": round(stats.avg_hours or 0, 1),
+        "pending_requests": stats.pending,
         "rejection_rate": round(rejection_rate, 1),
         "priority_breakdown": {
-            "high": high_priority,
-            "medium": medium_priority,
-            "low": low_priority
+            "high": stats.high_priority,
+            "medium": stats.medium_priority,
+            "low": stats.low_priority
         }
     }
 
@@ -227,7 +184,7 @@ def calculate_overdue_requests(db: Session, department_id: int = None, division_
     """
     Calculates count of requests that are currently overdue.
     Includes active overdue requests (PENDING or IN_PROGRESS past their deadline).
-    FIXED: Calculate deadline from created_at + sla_completion_time_hours
+    Deadline is created_at + sla_completion_time_hours, compared in SQL.
     """
     query = db.query(Request)
     if department_id:
@@ -236,18 +193,5 @@ def calculate_overdue_requests(db: Session, department_id: int = None, division_
         query = query.filter(Request.assigned_division_id == division_id)
     
     now = datetime.utcnow()  # Use timezone-naive to match created_at
-    
-    # Get active requests with SLA time defined
-    active_requests = query.filter(
-        Request.status.in_([RequestStatus.PENDING, RequestStatus.IN_PROGRESS]),
-        Request.sla_completion_time_hours.isnot(None),
-        Request.created_at.isnot(None)
-    ).all()
-    
-    overdue_count =0
-    for req in active_requests:
-        deadline = req.created_at + timedelta(hours=req.sla_completion_time_hours)
-        if now > deadline:
-            overdue_count += 1
-    
-    return overdue_count
+
+    return query.with_entities(count_where(is_overdue(now))).scalar()
@@ -0,0 +1,258 @@
+"""
+Leader election for background jobs.
+
+Every gunicorn worker starts the scheduler, but only the worker holding the
+leader lock actually runs jobs; the others stay idle and retry the lock every
+few seconds so one of them takes over quickly when the leader dies.
+
+The lock is released by the OS/database the moment its holder goes away:
+- PostgreSQL: a session-level pg_try_advisory_lock held on a dedicated
+  connection.
+- SQLite (and anything else): an exclusive, non-blocking lock on a file next
+  to the database (fcntl.flock, or msvcrt.locking on Windows).
+
+The leader also publishes a heartbeat (who it is, since when, job timings)
+to the system_settings table so any worker can report the current leader.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.database import engine as default_engine, SessionLocal
+from app.models import SystemSettings
+
+LEADER_SETTING_KEY = "scheduler_leader"
+
+
+def worker_identity() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _AdvisoryLock:
+    """PostgreSQL session advisory lock on a connection kept open while held"""
+
+    def __init__(self, engine: Engine, name: str):
+        self.engine = engine
+        self.key = zlib.crc32(f"tebita:{name}".encode())
+        self._connection = None
+
+    def try_acquire(self) -> bool:
+        connection = self.engine.connect()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+            ).scalar()
+        except Exception:
+            connection.close()
+            raise
+        if acquired:
+            self._connection = connection
+            return True
+        connection.close()
+        return False
+
+    def is_held(self) -> bool:
+        if self._connection is None:
+            return False
+        try:
+            self._connection.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            self.release()
+            return False
+
+    def release(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+        except Exception:
+            pass
+        finally:
+            self._connection.close()
+            self._connection = None
+
+
+class _FileLock:
+    """Exclusive lock on a file, dropped by the OS if the process dies"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._handle = None
+
+    def try_acquire(self) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(self.path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._handle = handle
+        return True
+
+    def is_held(self) -> bool:
+        return self._handle is not None
+
+    def release(self):
+        if self._handle is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._handle.seek(0)
+                msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._handle.close()
+            self._handle = None
+
+
+def _default_lock_path(engine: Engine, name: str) -> Path:
+    database = engine.url.database
+    if engine.dialect.name == "sqlite" and database and database != ":memory:":
+        return Path(database).resolve().with_suffix(f".{name}.lock")
+    return Path("backups") / f"{name}.lock"
+
+
+class LeaderElection:
+    """Keeps trying to become leader; calls back on gaining/losing leadership"""
+
+    def __init__(
+        self,
+        name: str = "scheduler",
+        engine: Engine = default_engine,
+        retry_seconds: float = 5.0,
+        heartbeat_seconds: float = 15.0,
+        on_elected=None,
+        on_demoted=None,
+        status_provider=None,
+    ):
+        self.name = name
+        self.retry_seconds = retry_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.status_provider = status_provider
+        self.identity = worker_identity()
+        self.leader_since: Optional[datetime] = None
+        if engine.dialect.name == "postgresql":
+            self._lock = _AdvisoryLock(engine, name)
+        else:
+            self._lock = _FileLock(_default_lock_path(engine, name))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_heartbeat = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        return self.leader_since is not None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-election", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.retry_seconds + 1)
+        if self.is_leader:
+            self._demote()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.is_leader:
+                    if not self._lock.is_held():
+                        print(f"⚠️ Lost {self.name} leadership ({self.identity})")
+                        self._demote()
+                    else:
+                        self._maybe_heartbeat()
+                elif self._lock.try_acquire():
+                    self.leader_since = datetime.now(timezone.utc)
+                    print(f"👑 {self.identity} is now {self.name} leader")
+                    if self.on_elected:
+                        self.on_elected()
+                    self._maybe_heartbeat(force=True)
+            except Exception as e:
+                print(f"Error in {self.name} leader election: {e}")
+            self._stop.wait(self.retry_seconds)
+
+    def _demote(self):
+        self.leader_since = None
+        try:
+            if self.on_demoted:
+                self.on_demoted()
+        finally:
+            self._lock.release()
+
+    def _maybe_heartbeat(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_heartbeat < self.heartbeat_seconds:
+            return
+        self._last_heartbeat = now
+        record = {
+            "worker": self.identity,
+            "leader_since": self.leader_since.isoformat() if self.leader_since else None,
+            "heartbeat_at": datetime.now(timezone.utc).isoformat(),
+            "heartbeat_seconds": self.heartbeat_seconds,
+            "jobs": self.status_provider() if self.status_provider else {},
+        }
+        db = SessionLocal()
+        try:
+            setting = db.query(SystemSettings).filter(
+                SystemSettings.setting_key == LEADER_SETTING_KEY
+            ).first()
+            if not setting:
+                setting = SystemSettings(
+                    setting_key=LEADER_SETTING_KEY,
+                    setting_value="{}",
+                    description="Worker currently running background jobs (written by the leader)"
+                )
+                db.add(setting)
+            setting.setting_value = json.dumps(record)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error writing {self.name} heartbeat: {e}")
+        finally:
+            db.close()
+
+
+def read_leader_record(db) -> Optional[dict]:
+    """Last heartbeat published by the leader, flagged stale if it stopped"""
+    setting = db.query(SystemSettings).filter(
+        SystemSettings.setting_key == LEADER_SETTING_KEY
+    ).first()
+    if not setting:
+        return None
+    try:
+        record = json.loads(setting.setting_value)
+    except ValueError:
+        return None
+    heartbeat_at = record.get("heartbeat_at")
+    if heartbeat_at:
+        age = (datetime.now(timezone.utc) - datetime.fromisoformat(heartbeat_at)).total_seconds()
+        record["heartbeat_age_seconds"] = round(age, 1)
+        record["stale"] = age > 3 * record.get("heartbeat_seconds", 15)
+    return record
@@ -0,0 +1,125 @@
+"""
+Organization structure cache.
+
+Divisions, departments and sub-departments change rarely (admin endpoints and
+the restructure scripts) but their names are needed by every dashboard
+breakdown. The whole tree is small, so it is loaded with one query per table
+and kept in memory:
+
+- the create endpoints in routers/divisions.py and routers/departments.py
+  call org_cache.invalidate() after committing
+- the restructure scripts write to the database from another process, so
+  snapshots also expire after ORG_CACHE_TTL_SECONDS
+- a lookup of an id the snapshot does not know reloads it once, so a
+  freshly created unit is never reported as missing
+"""
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import Department, Division, SubDepartment
+
+ORG_CACHE_TTL_SECONDS = 60.0
+
+
+class DivisionInfo(NamedTuple):
+    id: int
+    name: str
+    type: object
+
+
+class DepartmentInfo(NamedTuple):
+    id: int
+    name: str
+    division_id: int
+
+
+class SubDepartmentInfo(NamedTuple):
+    id: int
+    name: str
+    department_id: int
+
+
+class OrgSnapshot:
+    """Id-ordered divisions, departments and sub-departments at one point in time"""
+
+    def __init__(self, divisions: List[DivisionInfo], departments: List[DepartmentInfo],
+                 subdepartments: List[SubDepartmentInfo]):
+        self.divisions = divisions
+        self.departments = departments
+        self.subdepartments = subdepartments
+        self.division_by_id: Dict[int, DivisionInfo] = {d.id: d for d in divisions}
+        self.department_by_id: Dict[int, DepartmentInfo] = {d.id: d for d in departments}
+        self.subdepartment_by_id: Dict[int, SubDepartmentInfo] = {s.id: s for s in subdepartments}
+
+    def departments_of(self, division_id: int) -> List[DepartmentInfo]:
+        return [d for d in self.departments if d.division_id == division_id]
+
+    def subdepartments_of(self, department_id: int) -> List[SubDepartmentInfo]:
+        return [s for s in self.subdepartments if s.department_id == department_id]
+
+
+class OrgCache:
+    def __init__(self, ttl_seconds: float = ORG_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[OrgSnapshot] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> OrgSnapshot:
+        """Current snapshot, reloaded if invalidated or older than the TTL"""
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+                self._snapshot = self._load(db)
+                self._loaded_at = time.monotonic()
+            return self._snapshot
+
+    def division(self, db: Session, division_id: int) -> Optional[DivisionInfo]:
+        info = self.get(db).division_by_id.get(division_id)
+        if info is None:
+            self.invalidate()
+            info = self.get(db).division_by_id.get(division_id)
+        return info
+
+    def department(self, db: Session, department_id: int) -> Optional[DepartmentInfo]:
+        info = self.get(db).department_by_id.get(department_id)
+        if info is None:
+            self.invalidate()
+            info = self.get(db).department_by_id.get(department_id)
+        return info
+
+    def subdepartment(self, db: Session, subdepartment_id: int) -> Optional[SubDepartmentInfo]:
+        info = self.get(db).subdepartment_by_id.get(subdepartment_id)
+        if info is None:
+            self.invalidate()
+            info = self.get(db).subdepartment_by_id.get(subdepartment_id)
+        return info
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    @staticmethod
+    def _load(db: Session) -> OrgSnapshot:
+        return OrgSnapshot(
+            divisions=[
+                DivisionInfo(*row)
+                for row in db.query(Division.id, Division.name, Division.type).order_by(Division.id)
+            ],
+            departments=[
+                DepartmentInfo(*row)
+                for row in db.query(Department.id, Department.name, Department.division_id).order_by(Department.id)
+            ],
+            subdepartments=[
+                SubDepartmentInfo(*row)
+                for row in db.query(
+                    SubDepartment.id, SubDepartment.name, SubDepartment.department_id
+                ).order_by(SubDepartment.id)
+            ],
+        )
+
+
+# Shared org structure cache for the process
+org_cache = OrgCache()
@@ -0,0 +1,162 @@
+"""
+Keyset pagination and server-side filters for request listings.
+
+Listings are ordered newest first by (created_at, id), or another SortKey (the
+incoming list uses submission time). A page is addressed by an opaque cursor
+that encodes the last row of the previous page, so fetching page N costs the
+same index range scan as page 1 no matter how much history sits behind it.
+Timestamps are compared through sql_time.time_key, so rows SQLite stored with
+and without microseconds still sort and page correctly. Pagination is opt-in: without ``limit``/``cursor`` the endpoints keep
+returning the full list, which is what the current frontend expects.
+"""
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query as QueryParam, Response, status
+from sqlalchemy import DateTime, and_, func, literal, or_
+from sqlalchemy.orm import Query
+
+from app.models import Priority, Request, RequestStatus, ResourceType
+from app.services.sql_time import time_key
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+class SortKey(NamedTuple):
+    """The timestamp a listing is ordered by: in SQL, and as read from a row"""
+    column: object
+    value: Callable[[Request], datetime]
+
+
+BY_CREATED_AT = SortKey(Request.created_at, lambda request: request.created_at)
+# Requests created before submitted_at was stamped fall back to created_at
+BY_SUBMITTED_AT = SortKey(
+    func.coalesce(Request.submitted_at, Request.created_at),
+    lambda request: request.submitted_at or request.created_at,
+)
+
+
+@dataclass
+class RequestListParams:
+    """Filters and paging options shared by the request list endpoints"""
+    status: Optional[RequestStatus] = None
+    priority: Optional[Priority] = None
+    resource_type: Optional[ResourceType] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    assigned_to_user_id: Optional[int] = None
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    include_total: bool = False
+
+
+def request_list_params(
+    status: Optional[RequestStatus] = None,
+    priority: Optional[Priority] = None,
+    resource_type: Optional[ResourceType] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    assigned_to_user_id: Optional[int] = None,
+    limit: Optional[int] = QueryParam(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+) -> RequestListParams:
+    """FastAPI dependency collecting the list query parameters"""
+    return RequestListParams(
+        status=status,
+        priority=priority,
+        resource_type=resource_type,
+        created_from=created_from,
+        created_to=created_to,
+        assigned_to_user_id=assigned_to_user_id,
+        limit=limit,
+        cursor=cursor,
+        include_total=include_total,
+    )
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Encode the (sort timestamp, id) position of a row as an opaque token"""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a token produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def apply_request_filters(query: Query, params: RequestListParams) -> Query:
+    """Apply the optional server-side filters to a Request query"""
+    if params.status:
+        query = query.filter(Request.status == params.status)
+    if params.priority:
+        query = query.filter(Request.priority == params.priority)
+    if params.resource_type:
+        query = query.filter(Request.resource_type == params.resource_type)
+    if params.created_from:
+        query = query.filter(Request.created_at >= params.created_from)
+    if params.created_to:
+        query = query.filter(Request.created_at <= params.created_to)
+    if params.assigned_to_user_id is not None:
+        query = query.filter(Request.assigned_to_user_id == params.assigned_to_user_id)
+    return query
+
+
+def paginate_requests(
+    query: Query,
+    params: RequestListParams,
+    response: Response,
+    load_options: Sequence = (),
+    sort: SortKey = BY_CREATED_AT,
+) -> List[Request]:
+    """
+    Run a filtered Request query as a keyset page, newest first by sort.
+
+    The total (when requested) and the cursor for the following page are
+    returned in the X-Total-Count and X-Next-Cursor response headers so the
+    body stays a plain list. Loader options are applied after counting so the
+    count query does not drag eager joins along.
+    """
+    if params.include_total:
+        total = query.with_entities(func.count(Request.id)).order_by(None).scalar()
+        response.headers[TOTAL_COUNT_HEADER] = str(total or 0)
+
+    key = time_key(sort.column)
+    if params.cursor:
+        cursor_time, cursor_id = decode_cursor(params.cursor)
+        cursor_key = time_key(literal(cursor_time, DateTime()))
+        query = query.filter(
+            or_(
+                key < cursor_key,
+                and_(key == cursor_key, Request.id < cursor_id)
+            )
+        )
+
+    query = query.options(*load_options).order_by(key.desc(), Request.id.desc())
+
+    limit = params.limit or (DEFAULT_PAGE_SIZE if params.cursor else None)
+    if limit is None:
+        return query.all()
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort.value(last), last.id)
+    return rows
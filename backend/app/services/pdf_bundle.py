@@ -0,0 +1,176 @@
+"""
+Bulk request form bundles.
+
+A bundle is one ZIP of request form PDFs. The forms are rendered across a
+process pool, so a large bundle uses this web worker's share of the cores
+(see render_workers) instead of one thread, and each PDF is written into
+the ZIP (and sent on to the client) as soon as it finishes:
+
+- at most RENDER_WINDOW_PER_WORKER forms per render process are in flight,
+  so rendered PDFs waiting to be written never pile up and memory stays
+  flat whatever the bundle size
+- forms already in pdf_cache (same content digest) are not rendered again;
+  bundle renders are not added to it, so a large bundle does not evict the
+  forms people are viewing
+- the ZIP is written to the response as it grows; nothing is spooled
+- progress is pushed to the requesting user as "pdf_bundle_progress"
+  notifications (over the WebSocket, through Redis when configured), at
+  most every PROGRESS_INTERVAL_SECONDS, so it works behind any worker
+
+Forms that fail to render are listed in ERRORS.txt at the end of the ZIP.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import anyio.from_thread
+
+from app.config import settings
+from app.services.notification_service import send_user_notification
+from app.services.request_pdf import pdf_cache, pdf_digest, render_request_pdf
+
+RENDER_WINDOW_PER_WORKER = 2
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def render_workers() -> int:
+    """Render processes for this web worker; by default its share of the CPUs"""
+    if settings.pdf_bundle_workers:
+        return settings.pdf_bundle_workers
+    return max(1, (os.cpu_count() or 1) // max(1, settings.web_concurrency))
+
+
+def render_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all bundles of this worker, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process runs threads
+            _pool = ProcessPoolExecutor(
+                max_workers=render_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_render_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+class PDFBundle:
+    """The forms of one bundle (request pk, form data) and its progress"""
+
+    def __init__(self, user_id: int, forms: List[Tuple[int, dict]]):
+        self.id = uuid.uuid4().hex[:12]
+        self.user_id = user_id
+        self.forms = forms
+        self.completed = 0
+        self.failed: List[str] = []
+        self._last_progress = 0.0
+
+    @property
+    def total(self) -> int:
+        return len(self.forms)
+
+    def _notify(self, payload: Dict):
+        try:
+            anyio.from_thread.run(send_user_notification, str(self.user_id), payload)
+        except Exception:
+            # Progress is best effort; the download itself carries the result
+            pass
+
+    def _report_progress(self, force: bool = False):
+        now = time.monotonic()
+        if force or now - self._last_progress >= PROGRESS_INTERVAL_SECONDS:
+            self._last_progress = now
+            self._notify({
+                "type": "pdf_bundle_progress",
+                "bundle_id": self.id,
+                "completed": self.completed,
+                "failed": len(self.failed),
+                "total": self.total,
+                "done": self.completed + len(self.failed) == self.total,
+            })
+
+    def rendered(self) -> Iterator[Tuple[str, bytes]]:
+        """(file name, PDF) of each form, in the order they finish rendering"""
+        pool = render_pool()
+        window = RENDER_WINDOW_PER_WORKER * render_workers()
+        pending: Dict[Future, dict] = {}
+        forms = iter(self.forms)
+
+        def finished(data: dict, pdf: bytes):
+            self.completed += 1
+            self._report_progress()
+            return f"Request_{data['request_id']}.pdf", pdf
+
+        try:
+            while True:
+                # Keep the window full; cached forms go straight out
+                for pk, data in forms:
+                    cached = pdf_cache.get(pk, pdf_digest(data))
+                    if cached is not None:
+                        yield finished(data, cached)
+                        continue
+                    pending[pool.submit(render_request_pdf, data)] = data
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    data = pending.pop(future)
+                    try:
+                        pdf = future.result()
+                    except Exception as e:
+                        self.failed.append(f"{data['request_id']}: {e}")
+                        continue
+                    yield finished(data, pdf)
+        finally:
+            # Client went away or a render failed hard: drop what is queued
+            for future in pending:
+                future.cancel()
+
+    def stream_zip(self) -> Iterator[bytes]:
+        """The bundle as ZIP bytes, written out as each form finishes"""
+        sink = _ZipSink()
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+            for name, pdf in self.rendered():
+                archive.writestr(name, pdf)
+                yield sink.drain()
+            if self.failed:
+                archive.writestr("ERRORS.txt", "\n".join(self.failed) + "\n")
+        yield sink.drain()
+        self._report_progress(force=True)
+
+
+class _ZipSink:
+    """Write-only file for ZipFile that hands out what was written so far"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
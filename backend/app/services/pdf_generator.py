@@ -8,8 +8,37 @@ from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 from reportlab.pdfgen import canvas
 from io import BytesIO
 from datetime import datetime
+from functools import lru_cache
 import os
 
+from PIL import Image as PILImage
+
+LOGO_PATH = os.path.join(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')), 'assets', 'tebita-logo.png'
+)
+LOGO_WIDTH = 70 * mm
+LOGO_HEIGHT = 25 * mm
+# The source logo is far larger than it is printed; it is resampled once to this resolution
+LOGO_DPI = 300
+
+
+@lru_cache(maxsize=1)
+def brand_logo_png():
+    """
+    The logo as PNG bytes at LOGO_DPI for its printed width, decoded and
+    resampled once per process (None if the asset is missing).
+    """
+    if not os.path.exists(LOGO_PATH):
+        return None
+    with PILImage.open(LOGO_PATH) as logo:
+        width = round(LOGO_WIDTH / 72 * LOGO_DPI)
+        if logo.width > width:
+            logo = logo.resize((width, round(logo.height * width / logo.width)), PILImage.LANCZOS)
+        output = BytesIO()
+        logo.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
 class TEditaPDFGenerator:
     """Generate professional Odoo-style PDFs for requests"""
     
@@ -69,11 +98,10 @@ class TEditaPDFGenerator:
         
         # 1. Header Section (Logo + REQUEST FORM)
         # We use a table to align Logo (Left) and Title (Right)
-        base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-        logo_path = os.path.join(base_dir, 'assets', 'tebita-logo.png')
+        logo_png = brand_logo_png()
         logo_img = None
-        if os.path.exists(logo_path):
-            logo_img = Image(logo_path, width=70*mm, height=25*mm)
+        if logo_png:
+            logo_img = Image(BytesIO(logo_png), width=LOGO_WIDTH, height=LOGO_HEIGHT)
             logo_img.hAlign = 'LEFT'
         
         title_para = Paragraph("REQUEST<br/>FORM", header_style)
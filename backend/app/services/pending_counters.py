@@ -0,0 +1,288 @@
+"""
+Pending request counters behind the notification badge.
+
+The badge shows how many requests are open (pending or in progress) in the
+queue a user works: every request for admins, requests assigned directly to
+their division (division managers) or department (department heads), and
+requests for their sub-department (staff). pending_counters keeps those
+numbers, plus the requests assigned to each user personally, so reading them
+is one indexed lookup instead of a COUNT over requests on every poll.
+
+Counters are kept current the same way as the daily rollup: request creation
+calls count_new_request() and every status change runs inside
+track_pending_counts(), adjusting the counters of the request's units in the
+same transaction. Since assignments never change after creation, a
+transition only moves the request in or out of the open set. After
+committing, push_pending_counts() sends the new numbers to every affected
+user over their /ws/{user_id} socket, so clients need not poll.
+
+scripts/backfill_pending_counters.py fills the table from the requests table
+and marks it ready. Until then the counts come from COUNT queries over the
+requests, so the badge stays correct on databases that were never backfilled.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import anyio.from_thread
+from sqlalchemy import and_, func, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.models import PendingCounter, Request, RequestStatus, SystemSettings, User, UserRole
+from app.services.notification_service import send_user_notification
+
+COUNTERS_READY_KEY = "pending_counters_ready"
+
+PENDING_STATUSES = (RequestStatus.PENDING, RequestStatus.IN_PROGRESS)
+
+SCOPE_ALL = "all"
+SCOPE_DIVISION = "division"
+SCOPE_DEPARTMENT = "department"
+SCOPE_SUBDEPARTMENT = "subdepartment"
+SCOPE_USER = "user"
+
+# Unit column and extra conditions of each scope (besides "all"); must stay
+# in line with request_keys()
+_SCOPE_COLUMNS = {
+    SCOPE_DIVISION: (Request.assigned_division_id, (Request.assigned_department_id.is_(None),)),
+    SCOPE_DEPARTMENT: (Request.assigned_department_id, (Request.assigned_subdepartment_id.is_(None),)),
+    SCOPE_SUBDEPARTMENT: (Request.assigned_subdepartment_id, ()),
+    SCOPE_USER: (Request.assigned_to_user_id, ()),
+}
+
+# Session.info entry collecting the counters changed in the transaction
+_CHANGED_KEYS = "pending_counter_keys"
+
+_counters_ready = False
+
+
+class CounterKey(NamedTuple):
+    scope: str
+    unit_id: int
+
+
+def request_keys(request: Request) -> List[CounterKey]:
+    """Counters an open request is counted in"""
+    keys = [CounterKey(SCOPE_ALL, 0)]
+    if request.assigned_division_id is not None and request.assigned_department_id is None:
+        keys.append(CounterKey(SCOPE_DIVISION, request.assigned_division_id))
+    if request.assigned_department_id is not None and request.assigned_subdepartment_id is None:
+        keys.append(CounterKey(SCOPE_DEPARTMENT, request.assigned_department_id))
+    if request.assigned_subdepartment_id is not None:
+        keys.append(CounterKey(SCOPE_SUBDEPARTMENT, request.assigned_subdepartment_id))
+    if request.assigned_to_user_id is not None:
+        keys.append(CounterKey(SCOPE_USER, request.assigned_to_user_id))
+    return keys
+
+
+def user_key(user: User) -> Optional[CounterKey]:
+    """The counter of the queue a user's role works, or None if they have none"""
+    if user.role == UserRole.ADMIN:
+        return CounterKey(SCOPE_ALL, 0)
+    if user.role == UserRole.DIVISION_MANAGER:
+        unit_id, scope = user.division_id, SCOPE_DIVISION
+    elif user.role == UserRole.DEPARTMENT_HEAD:
+        unit_id, scope = user.department_id, SCOPE_DEPARTMENT
+    else:
+        unit_id, scope = user.subdepartment_id, SCOPE_SUBDEPARTMENT
+    return CounterKey(scope, unit_id) if unit_id is not None else None
+
+
+def _is_pending(request: Request) -> bool:
+    return request.status in PENDING_STATUSES
+
+
+def _apply_delta(db: Session, key: CounterKey, delta: int):
+    """Add delta to the counter row of key, creating the row if needed"""
+    # Concurrent first writers may both insert a row for the same key; readers
+    # sum rows anyway, so only one of them is ever updated
+    row_id = db.query(PendingCounter.id).filter(
+        PendingCounter.scope == key.scope, PendingCounter.unit_id == key.unit_id
+    ).order_by(PendingCounter.id).limit(1).scalar()
+    if row_id is None:
+        db.execute(insert(PendingCounter).values(scope=key.scope, unit_id=key.unit_id, pending_count=delta))
+        return
+
+    db.execute(
+        update(PendingCounter)
+        .where(PendingCounter.id == row_id)
+        .values(pending_count=PendingCounter.pending_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _apply_change(db: Session, request: Request, delta: int):
+    keys = request_keys(request)
+    for key in keys:
+        _apply_delta(db, key, delta)
+    db.info.setdefault(_CHANGED_KEYS, set()).update(keys)
+
+
+def count_new_request(db: Session, request: Request):
+    """Count a newly created request (call before committing it)"""
+    if _is_pending(request):
+        _apply_change(db, request, 1)
+
+
+@contextmanager
+def track_pending_counts(db: Session, request: Request):
+    """
+    Adjust the counters if the changes made inside the block open or close
+    the request. Commit after the block, then call push_pending_counts().
+    """
+    was_pending = _is_pending(request)
+    yield
+    is_pending = _is_pending(request)
+    if is_pending != was_pending:
+        _apply_change(db, request, 1 if is_pending else -1)
+
+
+def _key_filters(key: CounterKey):
+    if key.scope == SCOPE_ALL:
+        return []
+    column, conditions = _SCOPE_COLUMNS[key.scope]
+    return [column == key.unit_id, *conditions]
+
+
+def read_counts(db: Session, keys: Iterable[CounterKey]) -> Dict[CounterKey, int]:
+    """Current value of each counter: one query once the counters are backfilled"""
+    keys = set(keys)
+    if not keys:
+        return {}
+    if not counters_ready(db):
+        return {
+            key: db.query(func.count(Request.id)).filter(
+                Request.status.in_(PENDING_STATUSES), *_key_filters(key)
+            ).scalar()
+            for key in keys
+        }
+
+    counts = dict.fromkeys(keys, 0)
+    rows = db.query(
+        PendingCounter.scope, PendingCounter.unit_id, func.sum(PendingCounter.pending_count)
+    ).filter(
+        or_(*[and_(PendingCounter.scope == key.scope, PendingCounter.unit_id == key.unit_id) for key in keys])
+    ).group_by(PendingCounter.scope, PendingCounter.unit_id)
+    for scope, unit_id, total in rows:
+        counts[CounterKey(scope, unit_id)] = int(total or 0)
+    return counts
+
+
+def _user_counts(user: User, counts: Dict[CounterKey, int]) -> Dict[str, int]:
+    key = user_key(user)
+    return {
+        "count": counts[key] if key else 0,
+        "assigned_to_me": counts[CounterKey(SCOPE_USER, user.id)],
+    }
+
+
+def _counter_keys_of(users: Iterable[User]) -> List[CounterKey]:
+    keys = []
+    for user in users:
+        keys.append(CounterKey(SCOPE_USER, user.id))
+        if user_key(user):
+            keys.append(user_key(user))
+    return keys
+
+
+def pending_counts(db: Session, user: User) -> Dict[str, int]:
+    """The badge of one user: open requests in their queue and assigned to them"""
+    return _user_counts(user, read_counts(db, _counter_keys_of([user])))
+
+
+def _affected_users(db: Session, keys: Iterable[CounterKey]) -> List[User]:
+    """Active users whose badge shows one of the counters"""
+    units: Dict[str, set] = {}
+    for key in keys:
+        units.setdefault(key.scope, set()).add(key.unit_id)
+
+    conditions = []
+    if SCOPE_ALL in units:
+        conditions.append(User.role == UserRole.ADMIN)
+    if SCOPE_DIVISION in units:
+        conditions.append(and_(
+            User.role == UserRole.DIVISION_MANAGER, User.division_id.in_(units[SCOPE_DIVISION])
+        ))
+    if SCOPE_DEPARTMENT in units:
+        conditions.append(and_(
+            User.role == UserRole.DEPARTMENT_HEAD, User.department_id.in_(units[SCOPE_DEPARTMENT])
+        ))
+    if SCOPE_SUBDEPARTMENT in units:
+        conditions.append(and_(
+            User.role.notin_([UserRole.ADMIN, UserRole.DIVISION_MANAGER, UserRole.DEPARTMENT_HEAD]),
+            User.subdepartment_id.in_(units[SCOPE_SUBDEPARTMENT])
+        ))
+    if SCOPE_USER in units:
+        conditions.append(User.id.in_(units[SCOPE_USER]))
+    return db.query(User).filter(User.is_active.isnot(False), or_(*conditions)).all()
+
+
+async def _send_all(messages: List[Tuple[str, Dict]]):
+    for user_id, payload in messages:
+        await send_user_notification(user_id, payload)
+
+
+def push_pending_counts(db: Session):
+    """
+    Send the new badge counts to the users whose counters changed in the
+    transaction just committed. Call from a handler's worker thread.
+    """
+    keys = db.info.pop(_CHANGED_KEYS, None)
+    if not keys:
+        return
+    try:
+        users = _affected_users(db, keys)
+        counts = read_counts(db, _counter_keys_of(users))
+        messages = [
+            (str(user.id), {"type": "pending_counts", **_user_counts(user, counts)})
+            for user in users
+        ]
+        anyio.from_thread.run(_send_all, messages)
+    except Exception as e:
+        # Best effort: clients still read the badge from /notifications/unread-count
+        print(f"⚠️ Failed to push pending counts: {e}")
+
+
+def clear_pending_counters(db: Session):
+    """Empty the counters (used when all requests are deleted)"""
+    db.query(PendingCounter).delete(synchronize_session=False)
+
+
+def rebuild_pending_counters(db: Session) -> int:
+    """Recompute every counter from the requests table and mark them ready"""
+    is_open = Request.status.in_(PENDING_STATUSES)
+    rows = [{
+        "scope": SCOPE_ALL,
+        "unit_id": 0,
+        "pending_count": db.query(func.count(Request.id)).filter(is_open).scalar(),
+    }]
+    for scope, (column, conditions) in _SCOPE_COLUMNS.items():
+        grouped = db.query(column, func.count(Request.id)).filter(
+            is_open, column.isnot(None), *conditions
+        ).group_by(column)
+        rows.extend({"scope": scope, "unit_id": unit_id, "pending_count": count} for unit_id, count in grouped)
+
+    clear_pending_counters(db)
+    db.execute(insert(PendingCounter), rows)
+
+    setting = db.query(SystemSettings).filter(SystemSettings.setting_key == COUNTERS_READY_KEY).first()
+    if not setting:
+        setting = SystemSettings(
+            setting_key=COUNTERS_READY_KEY,
+            setting_value="",
+            description="pending_counters has been backfilled and is maintained incrementally"
+        )
+        db.add(setting)
+    setting.setting_value = datetime.utcnow().isoformat()
+    db.commit()
+    return len(rows)
+
+
+def counters_ready(db: Session) -> bool:
+    """Whether the counters have been backfilled (remembered once seen)"""
+    global _counters_ready
+    if not _counters_ready:
+        _counters_ready = db.query(SystemSettings.id).filter(
+            SystemSettings.setting_key == COUNTERS_READY_KEY
+        ).first() is not None
+    return _counters_ready
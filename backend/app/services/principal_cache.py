@@ -0,0 +1,90 @@
+"""
+Authenticated principal cache.
+
+Every authenticated call resolves the token subject to its user, but handlers
+only read a handful of columns (id, role, division/department/sub-department,
+is_active). Those are kept in memory per username so authorization costs no
+database round trip:
+
+- routers/users.py calls principal_cache.invalidate() after committing an
+  update or delete, so role changes and deactivations apply to the next call
+  on that worker
+- other workers (and scripts writing to the database) are bounded by
+  PRINCIPAL_CACHE_TTL_SECONDS
+- each username has a version, bumped by invalidate(); a lookup that raced
+  an invalidation does not store the row it read, which may predate the change
+
+Only subjects of validly signed tokens are looked up, so the cache holds at
+most one entry per user.
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import User, UserRole
+
+
+class Principal(NamedTuple):
+    """The columns of an authenticated user, standing in for the User row"""
+    id: int
+    username: str
+    full_name: str
+    email: Optional[str]
+    phone: Optional[str]
+    role: UserRole
+    division_id: Optional[int]
+    department_id: Optional[int]
+    subdepartment_id: Optional[int]
+    is_active: Optional[bool]
+    created_at: Optional[datetime]
+
+
+_PRINCIPAL_COLUMNS = [getattr(User, field) for field in Principal._fields]
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, Principal]] = {}
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = defaultdict(int)
+
+    def get(self, db: Session, username: str) -> Optional[Principal]:
+        """The principal of username, or None if there is no such user"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry[0] > now:
+                self._stats["hits"] += 1
+                return entry[1]
+            version = self._versions[username]
+            self._stats["misses"] += 1
+
+        row = db.query(*_PRINCIPAL_COLUMNS).filter(User.username == username).first()
+        if row is None:
+            return None
+        principal = Principal(*row)
+        with self._lock:
+            if self._versions[username] == version:
+                self._entries[username] = (now + self.ttl_seconds, principal)
+        return principal
+
+    def invalidate(self, *usernames: str):
+        """Forget the named users (call after committing a change to them)"""
+        with self._lock:
+            for username in usernames:
+                self._versions[username] += 1
+                self._entries.pop(username, None)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "ttl_seconds": self.ttl_seconds, **self._stats}
+
+
+# Shared principal cache for the process
+principal_cache = PrincipalCache(ttl_seconds=settings.principal_cache_ttl_seconds)
@@ -1,13 +1,24 @@
 import csv
 import io
 from datetime import datetime, timedelta
+import tempfile
+from typing import Iterable, Iterator, List, Optional, Tuple
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from sqlalchemy.orm import Session, joinedload
-from app.models import Request
-from app.services.sla_calculator import calculate_sla_status
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session, aliased
+from app.database import SessionLocal
+from app.models import Request, RequestActivityLog, RequestItem, User, UserRole
+from app.services.access_control import apply_role_based_filtering
+from app.services.org_cache import org_cache
+from app.services.sla_calculator import sla_statuses
+
+# Rows fetched per round trip by streaming exports (server-side cursor on PostgreSQL)
+EXPORT_CHUNK_SIZE = 1000
 
 def generate_scorecard_pdf(scorecard_data: dict, division_name: str, period: str) -> io.BytesIO:
     """
@@ -79,63 +90,335 @@ def format_datetime_for_export(dt: datetime) -> str:
     # %b = Month abbr, %d = Day, %Y = Year, %I = 12h Hour, %M = Minute, %p = AM/PM
     return eat_time.strftime("%b %d, %Y, %I:%M %p").lstrip("0").replace(" 0", " ")
 
+REQUEST_EXPORT_HEADER = [
+    'Request ID', 'Type', 'Priority', 'Status', 
+    'Sender Division', 'Sender Department', 'Sender Name',
+    'Recipient Division', 'Recipient Department', 'Recipient Name',
+    'Created At', 'Submitted At', 'Acknowledged At', 
+    'Completed At', 'Validated At',
+    'SLA Deadline', 'Actual Completion (Hrs)', 'SLA Status', 'Rejection Reason'
+]
+
+REQUEST_ITEM_EXPORT_HEADER = [
+    'Request ID', 'Item', 'Quantity', 'Unit Price', 'Expected Delivery', 'Notes', 'Attachment'
+]
+
+
+def _department_name(db: Session, department_id: Optional[int]) -> str:
+    info = org_cache.department(db, department_id) if department_id else None
+    return info.name if info else ""
+
+
+def _division_name(db: Session, division_id: Optional[int]) -> str:
+    info = org_cache.division(db, division_id) if division_id else None
+    return info.name if info else ""
+
+
+def _chunks(db: Session, stmt, chunk_size: int):
+    """Rows of stmt in lists of chunk_size, fetched with a server-side cursor where supported"""
+    return db.execute(stmt.execution_options(yield_per=chunk_size)).partitions()
+
+
+def request_export_chunks(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    user: Optional[User] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[List[list]]:
+    """
+    Request export rows for requests created in the period, in chunks.
+    Plain columns only; names come from the org cache and the SLA status of
+    each chunk is evaluated in one batch. Given a user, only the requests
+    that user may see are exported.
+    """
+    requester = aliased(User)
+    assignee = aliased(User)
+    stmt = select(
+        Request.request_id,
+        Request.request_type,
+        Request.priority,
+        Request.status,
+        Request.requester_division_id,
+        Request.requester_department_id,
+        requester.full_name.label("requester_name"),
+        Request.assigned_division_id,
+        Request.assigned_department_id,
+        assignee.full_name.label("assignee_name"),
+        Request.created_at,
+        Request.submitted_at,
+        Request.acknowledged_at,
+        Request.completed_at,
+        Request.completion_validated_at,
+        Request.sla_response_deadline,
+        Request.sla_completion_deadline,
+        Request.sla_completion_time_hours,
+        Request.rejection_reason,
+    ).select_from(Request).outerjoin(
+        requester, requester.id == Request.requester_id
+    ).outerjoin(
+        assignee, assignee.id == Request.assigned_to_user_id
+    ).where(
+        Request.created_at >= start_date,
+        Request.created_at <= end_date
+    ).order_by(Request.id)
+    if user is not None:
+        stmt = apply_role_based_filtering(stmt, user)
+
+    for partition in _chunks(db, stmt, chunk_size):
+        statuses = sla_statuses(partition)
+        rows = []
+        for req, sla_status in zip(partition, statuses):
+            # Calculate actual hours if completed
+            actual_hours = ""
+            if req.completed_at and req.created_at:
+                actual_hours = f"{(req.completed_at - req.created_at).total_seconds() / 3600:.1f}"
+
+            rows.append([
+                req.request_id,
+                req.request_type,
+                req.priority.value if req.priority else "",
+                req.status.value if req.status else "",
+                _division_name(db, req.requester_division_id),
+                _department_name(db, req.requester_department_id),
+                req.requester_name or "",
+                _division_name(db, req.assigned_division_id),
+                _department_name(db, req.assigned_department_id),
+                req.assignee_name or "Unassigned",
+                format_datetime_for_export(req.created_at),
+                format_datetime_for_export(req.submitted_at),
+                format_datetime_for_export(req.acknowledged_at),
+                format_datetime_for_export(req.completed_at),
+                format_datetime_for_export(req.completion_validated_at),
+                format_datetime_for_export(req.sla_completion_deadline),
+                actual_hours,
+                sla_status,
+                req.rejection_reason or ""
+            ])
+        yield rows
+
+
+def request_item_export_chunks(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    user: Optional[User] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[List[list]]:
+    """Items of the requests created in the period (those user may see), in chunks"""
+    stmt = select(
+        Request.request_id,
+        RequestItem.item_description,
+        RequestItem.quantity,
+        RequestItem.unit_price,
+        RequestItem.expected_delivery_date,
+        RequestItem.notes,
+        RequestItem.attachment_filename,
+    ).select_from(RequestItem).join(
+        Request, Request.id == RequestItem.request_id
+    ).where(
+        Request.created_at >= start_date,
+        Request.created_at <= end_date
+    ).order_by(Request.id, RequestItem.id)
+    if user is not None:
+        stmt = apply_role_based_filtering(stmt, user)
+
+    for partition in _chunks(db, stmt, chunk_size):
+        yield [
+            [
+                item.request_id,
+                item.item_description,
+                item.quantity,
+                item.unit_price,
+                format_datetime_for_export(item.expected_delivery_date),
+                item.notes or "",
+                item.attachment_filename or "",
+            ]
+            for item in partition
+        ]
+
+
 def generate_request_export_csv(db: Session, start_date: datetime, end_date: datetime) -> io.StringIO:
     """
     Generates a CSV export of requests in the given period.
+    Builds the whole file in memory; endpoints use stream_request_export().
     """
     output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow([
-        'Request ID', 'Type', 'Priority', 'Status', 
-        'Sender Division', 'Sender Department', 'Sender Name',
-        'Recipient Division', 'Recipient Department', 'Recipient Name',
-        'Created At', 'Submitted At', 'Acknowledged At', 
-        'Completed At', 'Validated At',
-        'SLA Deadline', 'Actual Completion (Hrs)', 'SLA Status', 'Rejection Reason'
-    ])
-    
-    # Data
-    requests = db.query(Request).options(
-        joinedload(Request.requester),
-        joinedload(Request.requester_division),
-        joinedload(Request.requester_department),
-        joinedload(Request.assigned_to),
-        joinedload(Request.assigned_division),
-        joinedload(Request.assigned_department)
-    ).filter(
-        Request.created_at >= start_date,
-        Request.created_at <= end_date
-    ).all()
-    
-    for req in requests:
-        # Calculate actual hours if completed
-        actual_hours = ""
-        if req.completed_at and req.created_at:
-            actual_hours = f"{(req.completed_at - req.created_at).total_seconds() / 3600:.1f}"
-            
-        writer.writerow([
-            req.request_id,
-            req.request_type,
-            req.priority,
-            req.status,
-            req.requester_division.name if req.requester_division else "",
-            req.requester_department.name if req.requester_department else "",
-            req.requester.full_name if req.requester else "",
-            req.assigned_division.name if req.assigned_division else "",
-            req.assigned_department.name if req.assigned_department else "",
-            req.assigned_to.full_name if req.assigned_to else "Unassigned",
-            format_datetime_for_export(req.created_at),
-            format_datetime_for_export(req.submitted_at),
-            format_datetime_for_export(req.acknowledged_at),
-            format_datetime_for_export(req.completed_at),
-            format_datetime_for_export(req.completion_validated_at),
-            format_datetime_for_export(req.sla_completion_deadline),
-            actual_hours,
-            calculate_sla_status(req),
-            req.rejection_reason or ""
-        ])
-        
+    for piece in iter_csv(REQUEST_EXPORT_HEADER, request_export_chunks(db, start_date, end_date)):
+        output.write(piece.decode("utf-8"))
     output.seek(0)
     return output
+
+
+def iter_csv(header: List[str], row_chunks: Iterable[List[list]]) -> Iterator[bytes]:
+    """
+    Encodes CSV incrementally: the header, then one piece per chunk of rows,
+    so only one chunk is ever held in memory.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    writer.writerow(header)
+    yield flush()
+    for rows in row_chunks:
+        writer.writerows(rows)
+        yield flush()
+
+
+ACTIVITY_EXPORT_HEADER = [
+    "Log ID",
+    "Request Number",
+    "Action",
+    "Performed By",
+    "Performed Dept",
+    "Performed Division",
+    "Target Dept",
+    "Target Division",
+    "Details",
+    "Timestamp",
+]
+
+
+def activity_log_chunks(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    division_id: Optional[int] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[List[list]]:
+    """
+    Activity log export rows, newest first, in chunks of chunk_size.
+    Only plain columns are selected; department and division names come
+    from the org cache. division_id keeps logs performed by or targeting
+    that division.
+    """
+    stmt = select(
+        RequestActivityLog.id,
+        Request.request_id,
+        RequestActivityLog.action,
+        User.full_name,
+        RequestActivityLog.performed_by_department_id,
+        RequestActivityLog.performed_by_division_id,
+        RequestActivityLog.target_department_id,
+        RequestActivityLog.target_division_id,
+        RequestActivityLog.details,
+        RequestActivityLog.created_at,
+    ).select_from(RequestActivityLog).outerjoin(
+        Request, Request.id == RequestActivityLog.request_id
+    ).outerjoin(
+        User, User.id == RequestActivityLog.performed_by_user_id
+    )
+    if start_date is not None:
+        stmt = stmt.where(RequestActivityLog.created_at >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(RequestActivityLog.created_at <= end_date)
+    if division_id is not None:
+        stmt = stmt.where(or_(
+            RequestActivityLog.performed_by_division_id == division_id,
+            RequestActivityLog.target_division_id == division_id
+        ))
+    stmt = stmt.order_by(RequestActivityLog.created_at.desc(), RequestActivityLog.id.desc())
+
+    for partition in _chunks(db, stmt, chunk_size):
+        yield [
+            [
+                row.id,
+                row.request_id or "",
+                row.action.value,
+                row.full_name or "",
+                _department_name(db, row.performed_by_department_id),
+                _division_name(db, row.performed_by_division_id),
+                _department_name(db, row.target_department_id),
+                _division_name(db, row.target_division_id),
+                row.details or "",
+                format_datetime_for_export(row.created_at),
+            ]
+            for row in partition
+        ]
+
+
+def stream_activity_log_csv(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    division_id: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    CSV bytes of the activity log export. Runs on its own session because
+    the response body is produced after the request's session is closed.
+    """
+    db = SessionLocal()
+    try:
+        yield from iter_csv(
+            ACTIVITY_EXPORT_HEADER,
+            activity_log_chunks(db, start_date, end_date, division_id)
+        )
+    finally:
+        db.close()
+
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Chunk size of the finished workbook as it is streamed to the client
+XLSX_READ_SIZE = 64 * 1024
+
+
+def _xlsx_cell(value):
+    # openpyxl rejects control characters that XML cannot hold
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    return value
+
+
+def write_xlsx(output, sheets: Iterable[Tuple[str, List[str], Iterable[List[list]]]]):
+    """
+    Writes a workbook with one sheet per (title, header, row_chunks) to the
+    file-like output. The workbook is write-only, so rows are spooled to
+    disk as they are appended instead of being kept in memory.
+    """
+    workbook = Workbook(write_only=True)
+    for title, header, row_chunks in sheets:
+        sheet = workbook.create_sheet(title)
+        sheet.append(header)
+        for rows in row_chunks:
+            for row in rows:
+                sheet.append([_xlsx_cell(value) for value in row])
+    workbook.save(output)
+
+
+def stream_request_export(
+    start_date: datetime,
+    end_date: datetime,
+    user: User,
+    export_format: str = "csv",
+) -> Iterator[bytes]:
+    """
+    Request export for the period as CSV (requests only) or XLSX (Requests
+    and Items sheets, plus the Activity sheet for administrators, as with
+    /requests/activity/export). Requests and items are limited to those the
+    user may see. Runs on its own session because the response body is
+    produced after the request's session is closed.
+    """
+    db = SessionLocal()
+    try:
+        if export_format == "xlsx":
+            sheets = [
+                ("Requests", REQUEST_EXPORT_HEADER, request_export_chunks(db, start_date, end_date, user)),
+                ("Items", REQUEST_ITEM_EXPORT_HEADER, request_item_export_chunks(db, start_date, end_date, user)),
+            ]
+            if user.role == UserRole.ADMIN:
+                sheets.append(("Activity", ACTIVITY_EXPORT_HEADER, activity_log_chunks(db, start_date, end_date)))
+            with tempfile.TemporaryFile() as output:
+                write_xlsx(output, sheets)
+                db.close()
+                output.seek(0)
+                yield from iter(lambda: output.read(XLSX_READ_SIZE), b"")
+        else:
+            yield from iter_csv(REQUEST_EXPORT_HEADER, request_export_chunks(db, start_date, end_date, user))
+    finally:
+        db.close()
@@ -0,0 +1,103 @@
+"""
+Request number allocation.
+
+Request numbers look like REQ-ICT-20251201-007: a type code, the day, and a
+sequence that restarts every day. The sequence lives in the
+request_id_sequences table, one row per prefix, and is bumped with a single
+atomic UPDATE ... RETURNING, so allocation is one indexed round trip no matter
+how many requests exist and concurrent creates across workers never hand out
+the same number.
+
+The increment runs inside the caller's transaction: if the request insert
+rolls back, so does the counter, and numbers stay gapless.
+
+PostgreSQL and SQLite create a prefix's row with an upsert. Other databases
+insert it in a savepoint and, if another worker won the race, bump theirs.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import Request, RequestIdSequence
+
+
+def request_id_prefix(request_type: str, day: datetime = None) -> str:
+    """Prefix shared by all requests of a type created on a given day"""
+    day = day or datetime.now()
+    return f"REQ-{request_type[:3].upper()}-{day.strftime('%Y%m%d')}-"
+
+
+def _existing_max_sequence(db: Session, prefix: str) -> int:
+    """Highest sequence already used for a prefix (seeds a new counter row)"""
+    # Only runs the first time a prefix is seen, i.e. once per type per day, so
+    # numbers issued before the counter table existed are never reused
+    highest = 0
+    for (request_id,) in db.query(Request.request_id).filter(Request.request_id.like(f"{prefix}%")):
+        suffix = request_id[len(prefix):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def _bump_counter(db: Session, prefix: str) -> Optional[int]:
+    """Increment the counter row of a prefix; None if it does not exist yet"""
+    stmt = (
+        update(RequestIdSequence)
+        .where(RequestIdSequence.prefix == prefix)
+        .values(last_value=RequestIdSequence.last_value + 1)
+    )
+    if db.get_bind().dialect.update_returning:
+        return db.execute(stmt.returning(RequestIdSequence.last_value)).scalar_one_or_none()
+
+    if db.execute(stmt).rowcount == 0:
+        return None
+    # The UPDATE holds the row lock until commit, so this reads our own increment
+    return db.query(RequestIdSequence.last_value).filter(RequestIdSequence.prefix == prefix).scalar()
+
+
+def _insert_or_bump_counter(db: Session, prefix: str, start: int) -> int:
+    """Portable _insert_counter: insert in a savepoint, bump on a duplicate key"""
+    try:
+        with db.begin_nested():
+            db.execute(insert(RequestIdSequence).values(prefix=prefix, last_value=start))
+        return start
+    except IntegrityError:
+        # Another worker created the row first; take the number after theirs
+        return _bump_counter(db, prefix)
+
+
+def _insert_counter(db: Session, prefix: str, start: int) -> int:
+    """Create the counter row, or bump it if another worker created it first"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    else:
+        return _insert_or_bump_counter(db, prefix, start)
+
+    stmt = upsert(RequestIdSequence).values(prefix=prefix, last_value=start)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RequestIdSequence.prefix],
+        set_={"last_value": RequestIdSequence.last_value + 1},
+    ).returning(RequestIdSequence.last_value)
+    return db.execute(stmt).scalar_one()
+
+
+def next_request_sequence(db: Session, prefix: str) -> int:
+    """Atomically allocate the next sequence number for a prefix"""
+    bumped = _bump_counter(db, prefix)
+    if bumped is not None:
+        return bumped
+
+    return _insert_counter(db, prefix, _existing_max_sequence(db, prefix) + 1)
+
+
+def allocate_request_id(db: Session, request_type: str) -> str:
+    """Allocate a unique request number in format REQ-DEPT-DATE-XXX"""
+    prefix = request_id_prefix(request_type)
+    sequence = next_request_sequence(db, prefix)
+    return f"{prefix}{str(sequence).zfill(3)}"
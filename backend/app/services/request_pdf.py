@@ -0,0 +1,125 @@
+"""
+Request form PDFs.
+
+request_pdf_data() collects everything a request form shows (names come
+from the org cache). Its digest is the ETag of the form: a browser that
+still holds that version gets a 304, and the rendered bytes are kept per
+request id in pdf_cache until the digest changes, so an unchanged form is
+only rendered once per process.
+
+render_request_pdf() is a plain module-level function of the form data so
+it can also run in a process pool.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Request
+from app.services.org_cache import org_cache
+from app.services.pdf_generator import TEditaPDFGenerator
+
+COMPANY_LOCATION = 'https://maps.google.com/maps/place//data=!4m2!3m1!1s0x164b85001ee00be1:0xe1a1d67bd070ea7?entry=s&sa=X&ved=2ahUKEwiY2-Owj6aRAxUzUkEAHbpiHEMQ4kB6BAgVEAA&hl=en'
+
+
+def request_pdf_data(db: Session, request: Request, signed_by: str) -> dict:
+    """Fields of the request form of a request, signed by the given name"""
+    requester_division = org_cache.division(db, request.requester_division_id) if request.requester_division_id else None
+    assigned_division = org_cache.division(db, request.assigned_division_id) if request.assigned_division_id else None
+    requester_dept = org_cache.department(db, request.requester_department_id) if request.requester_department_id else None
+    assigned_dept = org_cache.department(db, request.assigned_department_id) if request.assigned_department_id else None
+    requester_subdept = (
+        org_cache.subdepartment(db, request.requester_subdepartment_id) if request.requester_subdepartment_id else None
+    )
+    assigned_subdept = (
+        org_cache.subdepartment(db, request.assigned_subdepartment_id) if request.assigned_subdepartment_id else None
+    )
+
+    return {
+        'request_id': request.request_id,
+        'date': request.created_at.strftime('%Y-%m-%d') if request.created_at else '',
+        'senderDepartment': requester_dept.name if requester_dept else 'N/A',
+        'senderDivision': requester_division.name if requester_division else 'N/A',
+        'senderSubDepartment': requester_subdept.name if requester_subdept else None,
+        'receiverDepartment': assigned_dept.name if assigned_dept else 'N/A',
+        'receiverDivision': assigned_division.name if assigned_division else 'N/A',
+        'receiverSubDepartment': assigned_subdept.name if assigned_subdept else None,
+        'requestType': request.request_type,
+        'requestDescription': request.description,
+        'priority': request.priority.value if request.priority else 'MEDIUM',
+        'signedBy': signed_by,
+        'sender_email': request.requester.email if request.requester and request.requester.email else 'info@tebitambulance.com',
+        'items': [
+            {
+                'item_description': item.item_description,
+                'unit_price': item.unit_price,
+                'quantity': item.quantity,
+                'attachment_filename': item.attachment_filename,
+            }
+            for item in request.items
+        ],
+        'main_item_description': request.items[0].item_description if request.items else '',
+        'item_files': [
+            item.attachment_filename
+            for item in request.items
+            if item.attachment_filename
+        ],
+        'attachments': request.attachments or [],
+        'company_location': COMPANY_LOCATION,
+    }
+
+
+def pdf_digest(pdf_data: dict) -> str:
+    """Content hash of the form data (the form's ETag)"""
+    encoded = json.dumps(pdf_data, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+def render_request_pdf(pdf_data: dict) -> bytes:
+    return TEditaPDFGenerator().generate_request_pdf(pdf_data).getvalue()
+
+
+class PDFCache:
+    """Latest rendered form per request id, least recently used evicted past max_bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, Tuple[str, bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, request_id: int, digest: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(request_id)
+            if entry is None or entry[0] != digest:
+                return None
+            self._entries.move_to_end(request_id)
+            return entry[1]
+
+    def put(self, request_id: int, digest: str, pdf: bytes):
+        with self._lock:
+            previous = self._entries.pop(request_id, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            if len(pdf) > self.max_bytes:
+                return
+            self._entries[request_id] = (digest, pdf)
+            self._size += len(pdf)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get_or_render(self, request_id: int, digest: str, pdf_data: dict) -> bytes:
+        pdf = self.get(request_id, digest)
+        if pdf is None:
+            pdf = render_request_pdf(pdf_data)
+            self.put(request_id, digest, pdf)
+        return pdf
+
+
+# Shared rendered-PDF cache for the process
+pdf_cache = PDFCache(max_bytes=settings.pdf_cache_max_mb * 1024 * 1024)
@@ -0,0 +1,202 @@
+"""
+Result cache for analytics endpoints.
+
+Dashboard results are cached under (endpoint, scope, parameters) where scope
+is whatever narrows the answer for the caller (see
+access_control.role_scope_key). Each entry is also keyed by the current
+generation of the data it was computed from:
+
+    "requests"   bumped after every committed change in routers/requests.py
+    "resources"  bumped after every committed change in routers/resources.py
+
+so a cached answer is reused until the data behind it actually changes, and
+a bump simply makes older entries unreachable. A TTL still bounds the age of
+entries because some figures (e.g. active overdue requests) move with time.
+
+Tiers:
+- in-process LRU (always on)
+- Redis (RESULT_CACHE_REDIS, on by default with WEB_CONCURRENCY > 1): shared
+  values and generation counters, so a bump on one worker invalidates every
+  worker. Without it each worker only sees its own bumps and other workers'
+  entries expire by TTL, which is only right for a single worker.
+Redis errors never fail a request; the Redis tier is skipped for a while.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+
+GENERATIONS = ("requests", "resources")
+
+_REDIS_PREFIX = "tebita:cache"
+_REDIS_RETRY_SECONDS = 30.0
+
+
+class ResultCache:
+    """Two-tier (LRU + optional Redis) cache with generation-based invalidation"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0, redis_url: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_url = redis_url
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._stats = defaultdict(lambda: defaultdict(int))
+
+    # ------------------------------------------------------------------
+    # Redis tier
+    # ------------------------------------------------------------------
+    def _redis_client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5, decode_responses=True
+            )
+        return self._redis
+
+    def _redis_failed(self, error: Exception):
+        print(f"⚠️ Result cache: Redis unavailable ({error}), using local cache only for {_REDIS_RETRY_SECONDS:.0f}s")
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+    # ------------------------------------------------------------------
+    # Generations
+    # ------------------------------------------------------------------
+    def generations(self, names: Sequence[str]) -> tuple:
+        client = self._redis_client()
+        if client is not None:
+            try:
+                values = client.mget([f"{_REDIS_PREFIX}:gen:{name}" for name in names])
+                return tuple(int(value or 0) for value in values)
+            except Exception as e:
+                self._redis_failed(e)
+        return tuple(self._generations[name] for name in names)
+
+    def bump(self, *names: str):
+        """Invalidate every entry computed from the named data (call after commit)"""
+        with self._lock:
+            for name in names:
+                self._generations[name] += 1
+        client = self._redis_client()
+        if client is not None:
+            try:
+                pipe = client.pipeline()
+                for name in names:
+                    pipe.incr(f"{_REDIS_PREFIX}:gen:{name}")
+                pipe.execute()
+            except Exception as e:
+                self._redis_failed(e)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def get_or_compute(
+        self,
+        endpoint: str,
+        scope: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Any],
+        depends_on: Sequence[str] = GENERATIONS,
+        ttl_seconds: Optional[float] = None,
+    ) -> Any:
+        """
+        Cached JSON-ready result of compute() for this endpoint/scope/params.
+        The result is passed through jsonable_encoder so both tiers store the
+        same thing the endpoint would have returned.
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        generations = self.generations(depends_on)
+        encoded_params = json.dumps(jsonable_encoder(params), sort_keys=True)
+        key = (endpoint, scope, encoded_params, generations)
+        now = time.monotonic()
+        stats = self._stats[endpoint]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                stats["hits"] += 1
+                return entry[1]
+
+        client = self._redis_client()
+        redis_key = None
+        if client is not None:
+            digest = hashlib.sha1(repr(key).encode()).hexdigest()
+            redis_key = f"{_REDIS_PREFIX}:{endpoint}:{digest}"
+            try:
+                cached = client.get(redis_key)
+                if cached is not None:
+                    value = json.loads(cached)
+                    self._store(key, value, now + ttl)
+                    stats["redis_hits"] += 1
+                    return value
+            except Exception as e:
+                self._redis_failed(e)
+                redis_key = None
+
+        stats["misses"] += 1
+        started = time.perf_counter()
+        value = jsonable_encoder(compute())
+        stats["compute_ms"] += int((time.perf_counter() - started) * 1000)
+        self._store(key, value, now + ttl)
+        if redis_key is not None:
+            try:
+                client.setex(redis_key, max(1, int(ttl)), json.dumps(value))
+            except Exception as e:
+                self._redis_failed(e)
+        return value
+
+    def _store(self, key: tuple, value: Any, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats[key[0]]["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        endpoints = {}
+        for endpoint, counters in list(self._stats.items()):
+            counters = dict(counters)
+            hits = counters.get("hits", 0) + counters.get("redis_hits", 0)
+            lookups = hits + counters.get("misses", 0)
+            endpoints[endpoint] = {
+                **counters,
+                "hit_rate": round(hits / lookups * 100, 1) if lookups else 0.0,
+            }
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "redis": bool(self.redis_url) and time.monotonic() >= self._redis_down_until,
+            "generations": dict(zip(GENERATIONS, self.generations(GENERATIONS))),
+            "endpoints": endpoints,
+        }
+
+
+def _use_redis() -> bool:
+    if settings.result_cache_redis is not None:
+        return settings.result_cache_redis
+    return settings.web_concurrency > 1
+
+
+# Shared cache for the process
+result_cache = ResultCache(
+    max_entries=settings.result_cache_max_entries,
+    ttl_seconds=settings.result_cache_ttl_seconds,
+    redis_url=settings.redis_url if _use_redis() else None,
+)
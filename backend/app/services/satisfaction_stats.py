@@ -0,0 +1,134 @@
+"""
+Satisfaction rating aggregates per department.
+
+A rating belongs to the department its request was assigned to. Averages of
+the five scores, the number of ratings and the 1-5 distribution of the
+overall score are computed by one grouped query, and departments are ranked
+by the database (RANK() over the rounded overall average, ties by department
+id). Recent comments come from a second query that keeps the five most
+recently submitted commented ratings per department with ROW_NUMBER(), so
+neither query loads more rows than it returns.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Query, Session
+
+from app.models import CustomerSatisfaction, Department, Request
+
+SCORE_COLUMNS = {
+    "average_overall": CustomerSatisfaction.overall_score,
+    "average_timeliness": CustomerSatisfaction.timeliness_score,
+    "average_quality": CustomerSatisfaction.quality_score,
+    "average_communication": CustomerSatisfaction.communication_score,
+    "average_professionalism": CustomerSatisfaction.professionalism_score,
+}
+
+RATING_VALUES = ("5", "4", "3", "2", "1")
+
+# Ratings submitted within this window count as recent
+RECENT_WINDOW = timedelta(days=30)
+
+RECENT_COMMENTS_PER_DEPARTMENT = 5
+
+
+def _rating_aggregates(recent_since: datetime):
+    return [
+        func.count(CustomerSatisfaction.id).label("total_ratings"),
+        *[func.avg(column).label(name) for name, column in SCORE_COLUMNS.items()],
+        *[
+            func.coalesce(func.sum(case((CustomerSatisfaction.overall_score == int(value), 1), else_=0)), 0)
+            .label(f"rated_{value}")
+            for value in RATING_VALUES
+        ],
+        func.coalesce(func.sum(case((CustomerSatisfaction.submitted_at >= recent_since, 1), else_=0)), 0)
+        .label("recent_ratings_count"),
+    ]
+
+
+def _as_stats(row) -> Dict:
+    return {
+        "total_ratings": row.total_ratings,
+        **{name: round(float(getattr(row, name) or 0), 2) for name in SCORE_COLUMNS},
+        "rating_distribution": {value: getattr(row, f"rated_{value}") for value in RATING_VALUES},
+    }
+
+
+def department_rating_stats(db: Session, department_id: int) -> Dict:
+    """Ratings of one department: count, score averages and overall-score distribution"""
+    row = db.query(*_rating_aggregates(datetime.utcnow() - RECENT_WINDOW)).select_from(
+        CustomerSatisfaction
+    ).join(Request, CustomerSatisfaction.request_id == Request.id).filter(
+        Request.assigned_department_id == department_id
+    ).one()
+    return _as_stats(row)
+
+
+def _recent_comments(db: Session, department_ids: List[int]) -> Dict[int, List[Dict]]:
+    """Latest commented ratings per department, newest submission first"""
+    latest = func.row_number().over(
+        partition_by=Request.assigned_department_id,
+        order_by=(CustomerSatisfaction.submitted_at.desc(), CustomerSatisfaction.id.desc())
+    ).label("position")
+    commented = db.query(
+        Request.assigned_department_id.label("department_id"),
+        CustomerSatisfaction.comments,
+        CustomerSatisfaction.submitted_at,
+        CustomerSatisfaction.request_id,
+        latest
+    ).join(Request, CustomerSatisfaction.request_id == Request.id).filter(
+        Request.assigned_department_id.in_(department_ids),
+        CustomerSatisfaction.comments.isnot(None),
+        CustomerSatisfaction.comments != ""
+    ).subquery()
+
+    rows = db.query(commented).filter(
+        commented.c.position <= RECENT_COMMENTS_PER_DEPARTMENT
+    ).order_by(commented.c.department_id, commented.c.submitted_at.desc()).all()
+
+    comments = {}
+    for row in rows:
+        comments.setdefault(row.department_id, []).append({
+            "comment": row.comments,
+            "submitted_at": row.submitted_at.isoformat(),
+            "request_id": row.request_id
+        })
+    return comments
+
+
+def ranked_department_ratings(db: Session, department_filter: Optional[Callable[[Query], Query]] = None) -> List[Dict]:
+    """
+    Every department with at least one rating, best average overall score
+    first, with its rank. department_filter narrows the departments query
+    (e.g. role-based filtering).
+    """
+    average_overall = func.round(func.avg(CustomerSatisfaction.overall_score), 2)
+    rank = func.rank().over(order_by=average_overall.desc()).label("rank")
+
+    query: Query = db.query(
+        Department.id.label("department_id"),
+        Department.name.label("department_name"),
+        *_rating_aggregates(datetime.utcnow() - RECENT_WINDOW),
+        rank
+    ).select_from(CustomerSatisfaction).join(
+        Request, CustomerSatisfaction.request_id == Request.id
+    ).join(
+        Department, Department.id == Request.assigned_department_id
+    )
+    if department_filter is not None:
+        query = department_filter(query)
+    rows = query.group_by(Department.id, Department.name).order_by(rank, Department.id).all()
+
+    comments = _recent_comments(db, [row.department_id for row in rows]) if rows else {}
+    return [
+        {
+            "department_id": row.department_id,
+            "department_name": row.department_name,
+            "rank": row.rank,
+            **_as_stats(row),
+            "recent_ratings_count": row.recent_ratings_count,
+            "recent_comments": comments.get(row.department_id, []),
+        }
+        for row in rows
+    ]
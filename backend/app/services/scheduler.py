@@ -1,12 +1,13 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 import logging
+import time
 
 from app.database import SessionLocal
-from app.models import Request, RequestStatus, SLAAlert, AlertType
-from app.services.sla_calculator import calculate_sla_status
+from app.services.sla_monitor import sla_monitor
 from app.services.backup_service import create_database_backup
+from app.services.email_queue import email_sender, purge_sent_emails
+from app.services.leader_election import LeaderElection
 
 # Configure logging
 logging.basicConfig()
@@ -17,52 +18,15 @@ scheduler = BackgroundScheduler()
 
 def check_sla_status_job():
     """
-    Periodic job to check all active requests for SLA breaches or warnings.
-    Creates SLAAlert records if needed.
+    Periodic sync of the SLA monitor.
+    Alerts themselves fire from the monitor's wake-up job exactly when a
+    threshold is due; this only queues requests created on other workers.
     """
-    db = SessionLocal()
-    try:
-        # Get all active requests
-        active_requests = db.query(Request).filter(
-            Request.status.notin_([
-                RequestStatus.COMPLETED, 
-                RequestStatus.REJECTED, 
-                RequestStatus.CANCELLED
-            ])
-        ).all()
-        
-        for request in active_requests:
-            status_info = calculate_sla_status(request)
-            status = status_info["status"]
-            
-            if status == "BREACHED":
-                _create_alert_if_not_exists(db, request, AlertType.OVERDUE)
-            elif status == "WARNING":
-                # Could differentiate 50% vs 80% if calculator supported it, 
-                # for now mapping WARNING to 80% (close to deadline)
-                _create_alert_if_not_exists(db, request, AlertType.PERCENT_80)
-                
-    except Exception as e:
-        print(f"Error in SLA check job: {e}")
-    finally:
-        db.close()
+    sla_monitor.sync()
 
-def _create_alert_if_not_exists(db: Session, request: Request, alert_type: AlertType):
-    """Helper to create an alert only if one of that type doesn't exist for the request"""
-    exists = db.query(SLAAlert).filter(
-        SLAAlert.request_id == request.id,
-        SLAAlert.alert_type == alert_type
-    ).first()
-    
-    if not exists:
-        alert = SLAAlert(
-            request_id=request.id,
-            alert_type=alert_type,
-            sent_at=datetime.now(timezone.utc)
-        )
-        db.add(alert)
-        db.commit()
-        print(f"⚠️ SLA Alert Created: {alert_type} for Request {request.request_id}")
+def rebuild_sla_monitor_job():
+    """Hourly safety net: re-read all active requests into the monitor"""
+    sla_monitor.rebuild()
 
 def database_backup_job():
     """
@@ -74,25 +38,107 @@ def database_backup_job():
     except Exception as e:
         print(f"❌ Error in database backup job: {e}")
 
-def start_scheduler():
-    if not scheduler.running:
-        # SLA monitoring every 5 minutes
-        scheduler.add_job(check_sla_status_job, 'interval', minutes=5)
+def purge_sent_emails_job():
+    """Daily clean-up of sent/failed messages in the outbound email queue"""
+    db = SessionLocal()
+    try:
+        purge_sent_emails(db)
+    finally:
+        db.close()
+
+# ===== Job timing =====
+
+_job_runs = {}
+
+
+def _timed(name, func):
+    """Wrap a job so its last run time, duration and outcome are recorded"""
+    def run():
+        started = time.monotonic()
+        stats = _job_runs.setdefault(name, {"runs": 0, "failures": 0})
+        stats["last_started_at"] = datetime.now(timezone.utc).isoformat()
+        try:
+            func()
+            stats["last_status"] = "ok"
+        except Exception as e:
+            stats["failures"] += 1
+            stats["last_status"] = f"error: {e}"
+            raise
+        finally:
+            stats["runs"] += 1
+            stats["last_duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+    run.__name__ = name
+    return run
+
+
+def job_run_stats() -> dict:
+    """Timings of the jobs run by this worker"""
+    stats = {name: dict(values) for name, values in _job_runs.items()}
+    stats["sla_monitor"] = sla_monitor.stats()
+    stats["email_queue"] = email_sender.stats()
+    return stats
+
+
+# ===== Leadership =====
+
+def _on_elected():
+    """This worker won the lock: start (or resume) the jobs"""
+    if scheduler.running:
+        scheduler.resume()
+    else:
+        # SLA monitoring: wake-ups are scheduled by the monitor itself at the
+        # next threshold crossing; these keep its queue in step with the DB
+        scheduler.add_job(_timed('sla_monitor_sync', check_sla_status_job), 'interval', minutes=1, id='sla_monitor_sync')
+        scheduler.add_job(_timed('sla_monitor_rebuild', rebuild_sla_monitor_job), 'interval', hours=1, id='sla_monitor_rebuild')
         
         # Database backup daily at 2:00 AM
         scheduler.add_job(
-            database_backup_job, 
+            _timed('database_backup', database_backup_job), 
             'cron', 
             hour=2, 
             minute=0,
             id='database_backup'
         )
-        
+        scheduler.add_job(
+            _timed('email_queue_purge', purge_sent_emails_job),
+            'cron',
+            hour=3,
+            minute=0,
+            id='email_queue_purge'
+        )
         scheduler.start()
-        print("⏰ Background Scheduler started:")
-        print("   - SLA Monitoring: Every 5 minutes")
-        print("   - Database Backup: Daily at 2:00 AM")
+    sla_monitor.attach(scheduler)
+    email_sender.start()
+    print("⏰ Background Scheduler started:")
+    print("   - SLA Monitoring: At each threshold crossing (sync every minute)")
+    print("   - Outbound Email: Sent as queued")
+    print("   - Database Backup: Daily at 2:00 AM")
+
+
+def _on_demoted():
+    """Leadership lost: stay idle until the lock is won again"""
+    sla_monitor.detach()
+    email_sender.stop()
+    if scheduler.running:
+        scheduler.pause()
+    print("⏸️ Background Scheduler paused (not leader)")
+
+
+election = LeaderElection(
+    name="scheduler",
+    on_elected=_on_elected,
+    on_demoted=_on_demoted,
+    status_provider=job_run_stats,
+)
+
+
+def start_scheduler():
+    """Join the leader election; jobs run only in the elected worker"""
+    election.start()
 
 def stop_scheduler():
+    election.stop()
+    email_sender.stop()
     if scheduler.running:
+        sla_monitor.detach()
         scheduler.shutdown()
@@ -2,7 +2,7 @@ from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from app.models import Request, RequestStatus
 from .sla_policy import get_sla_standards
-from app.sla_utils import get_sla_policy
+from .sla_policy_resolver import sla_policy_resolver, policy_key_for
 
 def calculate_deadlines(request: Request, db: Session = None):
     """
@@ -20,14 +20,7 @@ def calculate_deadlines(request: Request, db: Session = None):
     
     # Try policy-based lookup if db session provided
     if db and hasattr(request, 'activity_type') and request.activity_type:
-        policy = get_sla_policy(
-            db=db,
-            resource_type=request.resource_type,
-            activity_type=request.activity_type,
-            priority=request.priority,
-            division_id=request.assigned_division_id,
-            department_id=request.assigned_department_id
-        )
+        policy = sla_policy_resolver.resolve(db, *policy_key_for(request))
         
         if policy:
             response_hours = policy.response_time_hours
@@ -50,12 +43,13 @@ def calculate_deadlines(request: Request, db: Session = None):
     request.sla_completion_deadline = request.created_at + timedelta(hours=resolution_hours)
 
 
-def calculate_sla_status(request: Request) -> dict:
+def calculate_sla_status(request: Request, now: datetime = None) -> dict:
     """
     Determines the current SLA status of a request.
     Returns a dict with 'status' (BREACHED, WARNING, ON_TRACK) and 'time_remaining_str'.
+    Works on anything with the request's SLA columns (e.g. rows of a column query).
     """
-    now = datetime.now(timezone.utc)
+    now = now or datetime.now(timezone.utc)
     
     # 1. Check Response SLA (if not yet acknowledged)
     if not request.acknowledged_at:
@@ -100,3 +94,9 @@ def calculate_sla_status(request: Request) -> dict:
 
     # 3. Completed
     return {"status": "COMPLETED", "message": "Request completed"}
+
+
+def sla_statuses(requests, now: datetime = None) -> list:
+    """SLA status of a batch of requests (or request rows), all evaluated at the same instant"""
+    now = now or datetime.now(timezone.utc)
+    return [calculate_sla_status(request, now)["status"] for request in requests]
@@ -0,0 +1,90 @@
+"""
+SLA column expressions for aggregate queries.
+
+Compliance and timing KPIs used to load requests and compare
+created_at + timedelta(hours=sla_*_time_hours) in Python. The expressions
+below say the same thing in SQL, built on sql_time.hours_between() so they
+compile to julianday() arithmetic on SQLite and interval arithmetic on
+PostgreSQL. They can be used in filters or summed with count_where():
+
+    query.with_entities(
+        count_where(completed_within_sla),
+        count_where(is_overdue(now)),
+        func.avg(completion_hours),
+    ).one()
+
+Expressions that take `now` compare against that instant (naive UTC, as
+datetime.utcnow() returns). A request whose created_at or SLA hours are NULL
+never satisfies any of them.
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, and_, case, func, literal
+
+from app.models import Request, RequestStatus
+from app.services.sql_time import hours_between
+
+# Requests whose completion SLA is still running
+ACTIVE_STATUSES = (RequestStatus.PENDING, RequestStatus.IN_PROGRESS)
+
+# Requests that still await a first response (dashboard overdue count)
+AWAITING_RESPONSE_STATUSES = (RequestStatus.PENDING, RequestStatus.APPROVAL_PENDING, RequestStatus.IN_PROGRESS)
+
+# Hours from creation to first response / to completion
+response_hours = hours_between(Request.created_at, Request.actual_response_time)
+completion_hours = hours_between(Request.created_at, Request.completed_at)
+
+# Hours the completion SLA is judged on: up to actual_completion_time, which
+# validate_request_completion moves to the validation time (completed_at stays)
+sla_completion_hours = hours_between(Request.created_at, Request.actual_completion_time)
+
+# Completed requests that can be evaluated against their completion SLA
+completed_with_sla = and_(
+    Request.status == RequestStatus.COMPLETED,
+    Request.created_at.isnot(None),
+    Request.actual_completion_time.isnot(None),
+    Request.sla_completion_time_hours.isnot(None)
+)
+
+# ...and those completed within it (what sla_outcomes stores as completion_met)
+completed_within_sla = and_(
+    completed_with_sla,
+    sla_completion_hours <= Request.sla_completion_time_hours
+)
+
+
+def count_where(*conditions):
+    """Number of rows matching all conditions, as an aggregate (0 for no rows)"""
+    return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+
+
+def hours_since_created(now: datetime):
+    return hours_between(Request.created_at, literal(now, DateTime()))
+
+
+def hours_overdue(now: datetime):
+    """Hours past the completion deadline (negative while still within it)"""
+    return hours_since_created(now) - Request.sla_completion_time_hours
+
+
+def is_overdue(now: datetime, statuses=ACTIVE_STATUSES):
+    """Active request whose completion deadline has passed"""
+    return and_(
+        Request.status.in_(statuses),
+        hours_overdue(now) > 0
+    )
+
+
+def response_overdue(now: datetime):
+    """Request still awaiting a response past its (non-zero) response SLA"""
+    return and_(
+        Request.status.in_(AWAITING_RESPONSE_STATUSES),
+        Request.sla_response_time_hours != 0,
+        hours_since_created(now) > Request.sla_response_time_hours
+    )
+
+
+def sla_consumed_percent(now: datetime, default_hours: int):
+    """Share of the completion SLA used so far, in percent (default_hours when unset or 0)"""
+    target = func.coalesce(func.nullif(Request.sla_completion_time_hours, 0), default_hours)
+    return hours_since_created(now) / target * 100
@@ -0,0 +1,335 @@
+"""
+Deadline-driven SLA monitor.
+
+Instead of rescanning every open request on a fixed interval, the monitor
+keeps the next threshold crossing of each active request in a min-heap and
+asks the scheduler to wake it exactly when the earliest one is due.
+
+Thresholds are measured on the stage the request is in: the response window
+(created_at -> sla_response_deadline) until it is acknowledged, then the
+completion window (created_at -> sla_completion_deadline):
+
+    50% of the window elapsed  -> AlertType.PERCENT_50
+    80% of the window elapsed  -> AlertType.PERCENT_80
+    deadline passed            -> AlertType.OVERDUE
+
+Each alert type is raised at most once per request, as before. When several
+thresholds were crossed while nobody was watching (startup, downtime) only
+the most severe one is raised.
+
+Independently of the stage, an active request whose completion deadline
+(created_at + sla_completion_time_hours) passes gets breached_at set, which
+records when the SLA was missed (see services/sla_outcomes.py). That
+deadline is queued like any threshold.
+
+On wake-up only the requests that are due are re-read (one query for their
+deadlines, one for their existing alerts), their alerts are inserted in one
+batch and committed once, and their following threshold is pushed back on
+the heap. Work per tick therefore scales with the alerts due, not with the
+number of open requests. Requests created on other workers are picked up by
+a cheap incremental sync (id > last seen id); a periodic rebuild re-reads
+everything as a safety net.
+"""
+import heapq
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import AlertType, Request, RequestStatus, SLAAlert
+from app.services.sla_expressions import ACTIVE_STATUSES
+from app.services.sla_outcomes import completion_deadline, mark_breached
+
+TERMINAL_STATUSES = (RequestStatus.COMPLETED, RequestStatus.REJECTED, RequestStatus.CANCELLED)
+
+# Fraction of the stage window at which each alert becomes due (ascending)
+THRESHOLDS = (
+    (0.5, AlertType.PERCENT_50),
+    (0.8, AlertType.PERCENT_80),
+    (1.0, AlertType.OVERDUE),
+)
+
+WAKEUP_JOB_ID = "sla_monitor_wakeup"
+
+_FACT_COLUMNS = (
+    Request.id,
+    Request.request_id,
+    Request.status,
+    Request.created_at,
+    Request.acknowledged_at,
+    Request.sla_response_deadline,
+    Request.sla_completion_deadline,
+    Request.sla_completion_time_hours,
+    Request.breached_at,
+)
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize DB datetimes (naive UTC on SQLite, aware on PostgreSQL)"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def stage_thresholds(facts) -> List[Tuple[datetime, AlertType]]:
+    """Crossing times of the current stage's thresholds, in order"""
+    created_at = _utc_naive(facts.created_at)
+    if facts.acknowledged_at is None:
+        deadline = _utc_naive(facts.sla_response_deadline)
+    else:
+        deadline = _utc_naive(facts.sla_completion_deadline)
+    if created_at is None or deadline is None:
+        return []
+
+    window = deadline - created_at
+    if window <= timedelta(0):
+        return [(deadline, AlertType.OVERDUE)]
+    return [(created_at + window * fraction, alert_type) for fraction, alert_type in THRESHOLDS]
+
+
+def plan_request(facts, alerted: Set[AlertType], now: datetime):
+    """
+    Decide what to do with a request right now.
+
+    Returns (alert_to_raise, next_due) where alert_to_raise is the most
+    severe crossed threshold not yet alerted (or None) and next_due is the
+    crossing time of the first future threshold not yet alerted (or None).
+    """
+    if facts.status in TERMINAL_STATUSES:
+        return None, None
+
+    fire = None
+    next_due = None
+    for due, alert_type in stage_thresholds(facts):
+        if due <= now:
+            fire = alert_type
+        elif alert_type not in alerted:
+            next_due = due
+            break
+
+    if fire in alerted:
+        fire = None
+    return fire, next_due
+
+
+def pending_breach(facts) -> Optional[datetime]:
+    """Completion deadline of an active request not yet marked as breached"""
+    if facts.status not in ACTIVE_STATUSES or facts.breached_at is not None:
+        return None
+    return completion_deadline(facts)
+
+
+class SLAMonitor:
+    """Priority queue of upcoming SLA threshold crossings"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._heap: List[Tuple[datetime, int]] = []
+        self._scheduled: Dict[int, datetime] = {}
+        self._last_seen_id = 0
+        self._lock = threading.RLock()
+        self._scheduler = None
+        self.alerts_raised = 0
+        self.breaches_marked = 0
+        self.last_tick_at: Optional[datetime] = None
+        self.last_tick_due = 0
+
+    # ------------------------------------------------------------------
+    # Queue maintenance
+    # ------------------------------------------------------------------
+    def _push(self, request_id: int, due: datetime):
+        current = self._scheduled.get(request_id)
+        if current is not None and current <= due:
+            return
+        self._scheduled[request_id] = due
+        heapq.heappush(self._heap, (due, request_id))
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        due_ids = []
+        while self._heap and self._heap[0][0] <= now:
+            due, request_id = heapq.heappop(self._heap)
+            # Lazily skip entries superseded by an earlier push
+            if self._scheduled.get(request_id) == due:
+                del self._scheduled[request_id]
+                due_ids.append(request_id)
+        return due_ids
+
+    @property
+    def next_due(self) -> Optional[datetime]:
+        while self._heap and self._scheduled.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    @property
+    def pending(self) -> int:
+        return len(self._scheduled)
+
+    def _schedule_wakeup(self):
+        if self._scheduler is None:
+            return
+        due = self.next_due
+        if due is None:
+            return
+        self._scheduler.add_job(
+            self.process_due,
+            'date',
+            run_date=due.replace(tzinfo=timezone.utc),
+            id=WAKEUP_JOB_ID,
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def _existing_alerts(self, db: Session, request_ids: Iterable[int]) -> Dict[int, Set[AlertType]]:
+        alerted: Dict[int, Set[AlertType]] = {}
+        request_ids = list(request_ids)
+        if not request_ids:
+            return alerted
+        rows = db.query(SLAAlert.request_id, SLAAlert.alert_type).filter(
+            SLAAlert.request_id.in_(request_ids)
+        )
+        for request_id, alert_type in rows:
+            alerted.setdefault(request_id, set()).add(alert_type)
+        return alerted
+
+    def _evaluate(self, db: Session, facts_rows, now: datetime, alerted: Dict[int, Set[AlertType]] = None) -> int:
+        """Raise due alerts for the given requests in one batch and re-queue them"""
+        facts_rows = list(facts_rows)
+        if alerted is None:
+            alerted = self._existing_alerts(db, (facts.id for facts in facts_rows))
+
+        new_alerts = []
+        breaches = {}
+        for facts in facts_rows:
+            self._last_seen_id = max(self._last_seen_id, facts.id)
+            fire, next_due = plan_request(facts, alerted.get(facts.id, set()), now)
+            if fire is not None:
+                new_alerts.append({
+                    "request_id": facts.id,
+                    "alert_type": fire,
+                    "sent_at": now.replace(tzinfo=timezone.utc),
+                })
+                print(f"⚠️ SLA Alert Created: {fire} for Request {facts.request_id}")
+            if next_due is not None:
+                self._push(facts.id, next_due)
+
+            breach_due = pending_breach(facts)
+            if breach_due is not None:
+                if breach_due <= now:
+                    breaches[facts.id] = breach_due
+                else:
+                    self._push(facts.id, breach_due)
+
+        if new_alerts:
+            db.execute(insert(SLAAlert), new_alerts)
+        mark_breached(db, breaches)
+        if new_alerts or breaches:
+            db.commit()
+            self.alerts_raised += len(new_alerts)
+            self.breaches_marked += len(breaches)
+        return len(new_alerts)
+
+    def rebuild(self):
+        """Re-read every active request and rebuild the queue from scratch"""
+        with self._lock:
+            db = self._session_factory()
+            try:
+                facts_rows = db.query(*_FACT_COLUMNS).filter(
+                    Request.status.notin_(TERMINAL_STATUSES)
+                ).all()
+                alerted: Dict[int, Set[AlertType]] = {}
+                alert_rows = db.query(SLAAlert.request_id, SLAAlert.alert_type).join(
+                    Request, Request.id == SLAAlert.request_id
+                ).filter(Request.status.notin_(TERMINAL_STATUSES))
+                for request_id, alert_type in alert_rows:
+                    alerted.setdefault(request_id, set()).add(alert_type)
+
+                self._heap = []
+                self._scheduled = {}
+                self._evaluate(db, facts_rows, datetime.utcnow(), alerted)
+            except Exception as e:
+                db.rollback()
+                print(f"Error rebuilding SLA monitor: {e}")
+            finally:
+                db.close()
+            self._schedule_wakeup()
+
+    def sync(self):
+        """Queue requests created since the last sync (possibly on other workers)"""
+        with self._lock:
+            db = self._session_factory()
+            try:
+                facts_rows = db.query(*_FACT_COLUMNS).filter(
+                    Request.id > self._last_seen_id,
+                    Request.status.notin_(TERMINAL_STATUSES)
+                ).all()
+                if facts_rows:
+                    self._evaluate(db, facts_rows, datetime.utcnow())
+            except Exception as e:
+                db.rollback()
+                print(f"Error syncing SLA monitor: {e}")
+            finally:
+                db.close()
+            self._schedule_wakeup()
+
+    def process_due(self):
+        """Raise every alert that is due now; scheduled for the earliest crossing"""
+        with self._lock:
+            now = datetime.utcnow()
+            due_ids = self._pop_due(now)
+            self.last_tick_at = now
+            self.last_tick_due = len(due_ids)
+            if due_ids:
+                db = self._session_factory()
+                try:
+                    facts_rows = db.query(*_FACT_COLUMNS).filter(Request.id.in_(due_ids)).all()
+                    self._evaluate(db, facts_rows, now)
+                except Exception as e:
+                    db.rollback()
+                    # Put them back so the next tick retries
+                    for request_id in due_ids:
+                        self._push(request_id, now + timedelta(minutes=1))
+                    print(f"Error in SLA check job: {e}")
+                finally:
+                    db.close()
+            self._schedule_wakeup()
+
+    def request_changed(self, request_id: int):
+        """Re-plan a request after a transition in this process (no-op when idle)"""
+        if self._scheduler is None:
+            return
+        with self._lock:
+            self._push(request_id, datetime.utcnow())
+            self._schedule_wakeup()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def attach(self, scheduler):
+        """Start driving wake-ups through an APScheduler instance"""
+        self._scheduler = scheduler
+        self.rebuild()
+
+    def detach(self):
+        self._scheduler = None
+
+    def stats(self) -> dict:
+        next_due = self.next_due
+        return {
+            "active": self._scheduler is not None,
+            "pending_requests": self.pending,
+            "next_due": next_due.isoformat() if next_due else None,
+            "alerts_raised": self.alerts_raised,
+            "breaches_marked": self.breaches_marked,
+            "last_tick_at": self.last_tick_at.isoformat() if self.last_tick_at else None,
+            "last_tick_due": self.last_tick_due,
+        }
+
+
+# Shared monitor for the process
+sla_monitor = SLAMonitor()
@@ -0,0 +1,199 @@
+"""
+Stored SLA outcomes of a request.
+
+Whether a request met its response and completion SLA used to be worked out
+on every read, by loading rows and comparing against
+created_at + timedelta(hours=sla_*_time_hours). The outcome is fixed once the
+request is acknowledged or completed, so it is now stored on the request:
+
+    response_met / response_delay_hours      set when it is acknowledged
+    completion_met / completion_delay_hours  set when it is completed
+    breached_at                              the completion deadline, once it
+                                             has passed without completion
+
+record_sla_outcomes() runs inside the transition that sets
+actual_response_time / actual_completion_time; the SLA monitor sets
+breached_at on active requests when their completion deadline passes; and
+scripts/backfill_sla_outcomes.py fills in existing rows and marks the
+outcomes ready. Until then the columns are NULL on requests that predate
+them, so completion_outcomes() tests the timestamps in SQL instead, with
+the same result.
+
+Every compliance figure uses the same definition (see compliance_columns()):
+- compliant / non-compliant: completion_met, i.e. actual_completion_time
+  within created_at + sla_completion_time_hours. Validating a completion
+  moves actual_completion_time, so a late validation is a late completion
+  (sla_expressions.completed_within_sla is the same test in SQL)
+- overdue: active requests whose deadline has passed as of now
+  (sla_expressions.is_overdue). breached_at records when that happened for
+  alerts; it lags by up to one monitor run, so counts do not use it
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import and_, update
+from sqlalchemy.orm import Query, Session
+
+from app.models import Request, RequestStatus, SystemSettings
+from app.services.sla_expressions import (
+    ACTIVE_STATUSES, completed_with_sla, completed_within_sla, count_where, is_overdue
+)
+
+OUTCOMES_READY_KEY = "request_sla_outcomes_ready"
+
+_outcomes_ready = False
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize DB datetimes (naive UTC on SQLite, aware on PostgreSQL)"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _deadline(created_at: Optional[datetime], hours: Optional[int]) -> Optional[datetime]:
+    if created_at is None or hours is None:
+        return None
+    return _utc_naive(created_at) + timedelta(hours=hours)
+
+
+def completion_deadline(request) -> Optional[datetime]:
+    return _deadline(request.created_at, request.sla_completion_time_hours)
+
+
+def _outcome(actual: Optional[datetime], deadline: Optional[datetime]):
+    """(met, delay_hours) of something done at actual against deadline"""
+    if actual is None or deadline is None:
+        return None, None
+    delay = (_utc_naive(actual) - deadline).total_seconds() / 3600
+    return delay <= 0, round(max(delay, 0.0), 2)
+
+
+def sla_outcome_values(request, now: Optional[datetime] = None) -> Dict:
+    """Outcome column values of a request as it stands (now is used for breached_at)"""
+    response_met, response_delay = _outcome(
+        request.actual_response_time,
+        _deadline(request.created_at, request.sla_response_time_hours)
+    )
+    deadline = completion_deadline(request)
+    completion_met, completion_delay = _outcome(request.actual_completion_time, deadline)
+
+    breached_at = request.breached_at
+    if breached_at is None and deadline is not None:
+        missed = completion_met is False or (
+            completion_met is None
+            and request.status in ACTIVE_STATUSES
+            and deadline < (now or datetime.utcnow())
+        )
+        if missed:
+            breached_at = deadline.replace(tzinfo=timezone.utc)
+
+    return {
+        "response_met": response_met,
+        "response_delay_hours": response_delay,
+        "completion_met": completion_met,
+        "completion_delay_hours": completion_delay,
+        "breached_at": breached_at,
+    }
+
+
+def record_sla_outcomes(request: Request):
+    """Store the outcomes of a request after its response/completion time was set"""
+    for name, value in sla_outcome_values(request).items():
+        setattr(request, name, value)
+
+
+def mark_breached(db: Session, breaches: Dict[int, datetime]):
+    """Set breached_at (request id -> completion deadline) in one statement batch"""
+    if breaches:
+        db.execute(update(Request), [
+            {"id": request_id, "breached_at": deadline.replace(tzinfo=timezone.utc)}
+            for request_id, deadline in breaches.items()
+        ])
+
+
+def backfill_sla_outcomes(db: Session, batch_size: int = 1000) -> int:
+    """Recompute the outcome columns of every request, committing per batch, and mark them ready"""
+    now = datetime.utcnow()
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            Request.id,
+            Request.status,
+            Request.created_at,
+            Request.sla_response_time_hours,
+            Request.sla_completion_time_hours,
+            Request.actual_response_time,
+            Request.actual_completion_time,
+            Request.breached_at,
+        ).filter(Request.id > last_id).order_by(Request.id).limit(batch_size).all()
+        if not rows:
+            _mark_outcomes_ready(db)
+            return updated
+
+        db.execute(update(Request), [{"id": row.id, **sla_outcome_values(row, now)} for row in rows])
+        db.commit()
+        updated += len(rows)
+        last_id = rows[-1].id
+
+
+def _mark_outcomes_ready(db: Session):
+    setting = db.query(SystemSettings).filter(SystemSettings.setting_key == OUTCOMES_READY_KEY).first()
+    if not setting:
+        setting = SystemSettings(
+            setting_key=OUTCOMES_READY_KEY,
+            setting_value="",
+            description="SLA outcome columns of requests have been backfilled"
+        )
+        db.add(setting)
+    setting.setting_value = datetime.utcnow().isoformat()
+    db.commit()
+
+
+def outcomes_ready(db: Session) -> bool:
+    """Whether the outcome columns have been backfilled (remembered once seen)"""
+    global _outcomes_ready
+    if not _outcomes_ready:
+        _outcomes_ready = db.query(SystemSettings.id).filter(
+            SystemSettings.setting_key == OUTCOMES_READY_KEY
+        ).first() is not None
+    return _outcomes_ready
+
+
+def completion_outcomes(db: Session) -> Tuple:
+    """
+    Conditions for requests completed within / past their completion SLA:
+    completion_met once backfilled, otherwise the same test on the timestamps
+    """
+    if outcomes_ready(db):
+        completed = Request.status == RequestStatus.COMPLETED
+        return and_(completed, Request.completion_met.is_(True)), and_(completed, Request.completion_met.is_(False))
+    return completed_within_sla, and_(completed_with_sla, ~completed_within_sla)
+
+
+def compliance_columns(db: Session, now: Optional[datetime] = None):
+    """
+    Aggregates behind compliance_counts(), labelled with its keys, for queries
+    that compute other figures in the same pass
+    """
+    met, missed = completion_outcomes(db)
+    return (
+        count_where(met).label("compliant"),
+        count_where(missed).label("non_compliant"),
+        count_where(is_overdue(now or datetime.utcnow())).label("overdue_active"),
+    )
+
+
+def compliance_counts(query: Query, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Completion SLA counts of the requests a Request query selects:
+    completed within / past their SLA and active requests now overdue.
+    """
+    return query.with_entities(*compliance_columns(query.session, now)).one()._asdict()
+
+
+def compliance_rate(counts: Dict[str, int], default: float = 100.0) -> float:
+    """Compliant completions over everything evaluated (compliant, late, overdue)"""
+    evaluated = counts["compliant"] + counts["non_compliant"] + counts["overdue_active"]
+    return (counts["compliant"] / evaluated * 100) if evaluated else default
@@ -0,0 +1,104 @@
+"""
+Dialect-aware date arithmetic for aggregate queries.
+
+SQLite and PostgreSQL spell date truncation and interval math differently
+(strftime/julianday vs date_trunc/EXTRACT), so aggregate queries build these
+expressions through the helpers below instead of loading rows and doing the
+datetime work in Python. Anything that is not SQLite is treated as
+PostgreSQL, matching app.database.
+
+hours_between() compiles itself for whichever database runs the statement,
+so expressions built from it (see services/sla_expressions.py) can be
+defined once at import time. date_bucket() also depends on the column type
+and takes the dialect name explicitly.
+"""
+from sqlalchemy import Float, func, literal_column
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+BUCKET_UNITS = ("day", "month", "year")
+
+_SQLITE_FORMATS = {
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m-01",
+    "year": "%Y-01-01",
+}
+
+
+def _inline(value: str):
+    """Constant rendered into the SQL text, so the same expression can appear
+    in both SELECT and GROUP BY without separate bind parameters"""
+    return literal_column(f"'{value}'")
+
+
+def dialect_name(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def date_bucket(column, unit: str, dialect: str):
+    """
+    Start of the day/month/year containing a date or timestamp column, as
+    'YYYY-MM-DD' text so both dialects return the same value.
+    """
+    if unit not in BUCKET_UNITS:
+        raise ValueError(f"Unsupported bucket unit: {unit}")
+    if dialect == "sqlite":
+        return func.strftime(_inline(_SQLITE_FORMATS[unit]), column)
+
+    # Timestamps with time zone are bucketed on UTC days, like SQLite's naive UTC
+    if getattr(column.type, "timezone", False):
+        column = func.timezone(_inline("UTC"), column)
+    return func.to_char(func.date_trunc(_inline(unit), column), _inline("YYYY-MM-DD"))
+
+
+class hours_between(FunctionElement):
+    """Hours from start to end, fractional (NULL if either is NULL)"""
+    type = Float()
+    name = "hours_between"
+    inherit_cache = True
+
+    def __init__(self, start, end):
+        super().__init__(start, end)
+
+
+@compiles(hours_between)
+def _hours_between_postgresql(element, compiler, **kw):
+    start, end = element.clauses
+    return "(EXTRACT(EPOCH FROM %s - %s) / 3600)" % (
+        compiler.process(end, **kw), compiler.process(start, **kw)
+    )
+
+
+@compiles(hours_between, "sqlite")
+def _hours_between_sqlite(element, compiler, **kw):
+    start, end = element.clauses
+    return "((julianday(%s) - julianday(%s)) * 24)" % (
+        compiler.process(end, **kw), compiler.process(start, **kw)
+    )
+
+
+class time_key(FunctionElement):
+    """
+    A timestamp column as a value that compares and sorts chronologically.
+    SQLite stores timestamps as text, with or without microseconds depending
+    on who wrote the row (the ORM, CURRENT_TIMESTAMP defaults, raw inserts),
+    so text comparison puts '10:30:00' before '10:30:00.000000'; there the
+    key is julianday(). Elsewhere it is the column itself, so indexes apply.
+    """
+    type = Float()
+    name = "time_key"
+    inherit_cache = True
+
+    def __init__(self, column):
+        super().__init__(column)
+
+
+@compiles(time_key)
+def _time_key_postgresql(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(time_key, "sqlite")
+def _time_key_sqlite(element, compiler, **kw):
+    return "julianday(%s)" % compiler.process(element.clauses, **kw)
@@ -2,18 +2,32 @@
 Trend Calculator Service
 Calculates time-series data for visual analytics dashboard
 Supports daily, weekly, monthly, and yearly aggregations
+
+Charts are built from GROUP BY aggregates (see services/daily_stats.py):
+each chart reads one summed row per bucket and group (e.g. per month and
+status) from the request_daily_stats rollup, or from the requests table
+before the rollup is backfilled, instead of every request in the window.
 """
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Literal
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
 from collections import defaultdict
 
-from app.models import Request, RequestStatus, Priority, ResourceType, Division, Department
+from app.models import RequestStatus, Priority, ResourceType, Division
+from app.services.daily_stats import summarize_daily_stats
 
 
 TimePeriod = Literal["daily", "weekly", "monthly", "yearly"]
 
+# SQL bucket each period is aggregated on. Weeks are assembled from days:
+# "Week %U" restarts at new year, so no SQL week truncation matches it.
+BUCKET_UNIT = {
+    "daily": "day",
+    "weekly": "day",
+    "monthly": "month",
+    "yearly": "year",
+}
+
 
 def get_time_range(period: TimePeriod, custom_start:Optional[datetime] = None, custom_end: Optional[datetime] = None):
     """Get start and end dates for a time period"""
@@ -59,6 +73,22 @@ def generate_time_labels(start_date: datetime, end_date: datetime, period: TimeP
     return labels
 
 
+def period_label(moment, period: TimePeriod) -> str:
+    """Chart label of the bucket a date/datetime falls in"""
+    if period == "daily":
+        return moment.strftime("%b %d")
+    elif period == "weekly":
+        return moment.strftime("Week %U")
+    elif period == "monthly":
+        return moment.strftime("%b %Y")
+    else:  # yearly
+        return moment.strftime("%Y")
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else None
+
+
 def calculate_request_volume_trend(
     db: Session,
     period: TimePeriod = "monthly",
@@ -72,37 +102,25 @@ def calculate_request_volume_trend(
     start_date, end_date = get_time_range(period, custom_start, custom_end)
     labels = generate_time_labels(start_date, end_date, period)
     
-    # Query all requests in period
-    requests = db.query(Request).filter(
-        Request.created_at >= start_date,
-        Request.created_at <= end_date
-    ).all()
-    
     # Initialize data buckets
     total_data = {label: 0 for label in labels}
     pending_data = {label: 0 for label in labels}
     completed_data = {label: 0 for label in labels}
     rejected_data = {label: 0 for label in labels}
     
-    # Aggregate by time period
-    for request in requests:
-        if period == "daily":
-            label = request.created_at.strftime("%b %d")
-        elif period == "weekly":
-            label = request.created_at.strftime("Week %U")
-        elif period == "monthly":
-            label = request.created_at.strftime("%b %Y")
-        else:  # yearly
-            label = request.created_at.strftime("%Y")
-        
+    # Aggregate daily counts per status into the chart buckets
+    for row in summarize_daily_stats(
+        db, start_date, end_date, ("day", "status"), unit=BUCKET_UNIT[period]
+    ):
+        label = period_label(row["day"], period)
         if label in total_data:
-            total_data[label] += 1
-            if request.status == RequestStatus.PENDING:
-                pending_data[label] += 1
-            elif request.status == RequestStatus.COMPLETED:
-                completed_data[label] += 1
-            elif request.status == RequestStatus.REJECTED:
-                rejected_data[label] += 1
+            total_data[label] += row["request_count"]
+            if row["status"] == RequestStatus.PENDING:
+                pending_data[label] += row["request_count"]
+            elif row["status"] == RequestStatus.COMPLETED:
+                completed_data[label] += row["request_count"]
+            elif row["status"] == RequestStatus.REJECTED:
+                rejected_data[label] += row["request_count"]
     
     return {
         "labels": labels,
@@ -128,33 +146,17 @@ def calculate_sla_compliance_trend(
     start_date, end_date = get_time_range(period, custom_start, custom_end)
     labels = generate_time_labels(start_date, end_date, period)
     
-    # Query completed requests in period
-    requests = db.query(Request).filter(
-        Request.created_at >= start_date,
-        Request.created_at <= end_date,
-        Request.status == RequestStatus.COMPLETED,
-        Request.actual_completion_time.isnot(None),
-        Request.sla_completion_deadline.isnot(None)
-    ).all()
-    
-    # Calculate compliance for each period
+    # Completed requests that have both a completion time and a deadline
     total_per_period = {label: 0 for label in labels}
     on_time_per_period = {label: 0 for label in labels}
     
-    for request in requests:
-        if period == "daily":
-            label = request.created_at.strftime("%b %d")
-        elif period == "weekly":
-            label = request.created_at.strftime("Week %U")
-        elif period == "monthly":
-            label = request.created_at.strftime("%b %Y")
-        else:
-            label = request.created_at.strftime("%Y")
-        
+    for row in summarize_daily_stats(
+        db, start_date, end_date, ("day",), status=RequestStatus.COMPLETED, unit=BUCKET_UNIT[period]
+    ):
+        label = period_label(row["day"], period)
         if label in total_per_period:
-            total_per_period[label] += 1
-            if request.actual_completion_time <= request.sla_completion_deadline:
-                on_time_per_period[label] += 1
+            total_per_period[label] += row["sla_evaluated_count"]
+            on_time_per_period[label] += row["on_time_count"]
     
     # Calculate percentages
     compliance_data = []
@@ -187,18 +189,16 @@ def calculate_requests_by_division(
     if not end_date:
         end_date = datetime.utcnow()
     
-    # Query with division join
-    results = db.query(
-        Division.name,
-        func.count(Request.id).label('count')
-    ).join(Request, Request.requester_division_id == Division.id).filter(
-        Request.created_at >= start_date,
-        Request.created_at <= end_date
-    ).group_by(Division.name).all()
+    division_names = dict(db.query(Division.id, Division.name).all())
+    counts = defaultdict(int)
+    for row in summarize_daily_stats(db, start_date, end_date, ("division_id",)):
+        name = division_names.get(row["division_id"])
+        if name is not None and row["request_count"]:
+            counts[name] += row["request_count"]
     
     return {
-        "labels": [r[0] for r in results],
-        "data": [r[1] for r in results]
+        "labels": list(counts.keys()),
+        "data": list(counts.values())
     }
 
 
@@ -215,32 +215,21 @@ def calculate_requests_by_priority(
     start_date, end_date = get_time_range(period, custom_start, custom_end)
     labels = generate_time_labels(start_date, end_date, period)
     
-    requests = db.query(Request).filter(
-        Request.created_at >= start_date,
-        Request.created_at <= end_date
-    ).all()
-    
     high_data = {label: 0 for label in labels}
     medium_data = {label: 0 for label in labels}
     low_data = {label: 0 for label in labels}
     
-    for request in requests:
-        if period == "daily":
-            label = request.created_at.strftime("%b %d")
-        elif period == "weekly":
-            label = request.created_at.strftime("Week %U")
-        elif period == "monthly":
-            label = request.created_at.strftime("%b %Y")
-        else:
-            label = request.created_at.strftime("%Y")
-        
+    for row in summarize_daily_stats(
+        db, start_date, end_date, ("day", "priority"), unit=BUCKET_UNIT[period]
+    ):
+        label = period_label(row["day"], period)
         if label in high_data:
-            if request.priority == Priority.HIGH:
-                high_data[label] += 1
-            elif request.priority == Priority.MEDIUM:
-                medium_data[label] += 1
+            if row["priority"] == Priority.HIGH:
+                high_data[label] += row["request_count"]
+            elif row["priority"] == Priority.MEDIUM:
+                medium_data[label] += row["request_count"]
             else:
-                low_data[label] += 1
+                low_data[label] += row["request_count"]
     
     return {
         "labels": labels,
@@ -269,22 +258,18 @@ def calculate_response_time_by_resource(
     resource_types = [ResourceType.FLEET, ResourceType.HR, ResourceType.FINANCE, 
                       ResourceType.ICT, ResourceType.LOGISTICS, ResourceType.FACILITIES]
     
+    by_resource = {
+        row["resource_type"]: row
+        for row in summarize_daily_stats(db, start_date, end_date, ("resource_type",))
+    }
+    
     labels = []
     data = []
     
     for resource_type in resource_types:
-        requests = db.query(Request).filter(
-            Request.resource_type == resource_type,
-            Request.actual_response_time.isnot(None),
-            Request.created_at >= start_date,
-            Request.created_at <= end_date
-        ).all()
-        
-        if requests:
-            avg_response = sum(
-                (r.actual_response_time - r.created_at).total_seconds() / 3600
-                for r in requests
-            ) / len(requests)
+        row = by_resource.get(resource_type)
+        avg_response = _ratio(row["response_hours_sum"], row["response_count"]) if row else None
+        if avg_response is not None:
             labels.append(resource_type.value)
             data.append(round(avg_response, 2))
     
@@ -308,17 +293,14 @@ def calculate_request_status_distribution(
     if not end_date:
         end_date = datetime.utcnow()
     
-    results = db.query(
-        Request.status,
-        func.count(Request.id).label('count')
-    ).filter(
-        Request.created_at >= start_date,
-        Request.created_at <= end_date
-    ).group_by(Request.status).all()
+    results = [
+        row for row in summarize_daily_stats(db, start_date, end_date, ("status",))
+        if row["request_count"]
+    ]
     
     return {
-        "labels": [r[0].value for r in results],
-        "data": [r[1] for r in results]
+        "labels": [r["status"].value for r in results],
+        "data": [r["request_count"] for r in results]
     }
 
 
@@ -335,36 +317,22 @@ def calculate_satisfaction_trend(
     start_date, end_date = get_time_range(period, custom_start, custom_end)
     labels = generate_time_labels(start_date, end_date, period)
     
-    requests = db.query(Request).filter(
-        Request.created_at >= start_date,
-        Request.created_at <= end_date,
-        Request.satisfaction_rating.isnot(None)
-    ).all()
-    
-    # Calculate average satisfaction for each period
-    total_per_period = {label: [] for label in labels}
+    rating_sum = {label: 0 for label in labels}
+    rating_count = {label: 0 for label in labels}
     
-    for request in requests:
-        if period == "daily":
-            label = request.created_at.strftime("%b %d")
-        elif period == "weekly":
-            label = request.created_at.strftime("Week %U")
-        elif period == "monthly":
-            label = request.created_at.strftime("%b %Y")
-        else:
-            label = request.created_at.strftime("%Y")
-        
-        if label in total_per_period:
-            total_per_period[label].append(request.satisfaction_rating)
+    for row in summarize_daily_stats(
+        db, start_date, end_date, ("day",), unit=BUCKET_UNIT[period]
+    ):
+        label = period_label(row["day"], period)
+        if label in rating_sum:
+            rating_sum[label] += row["satisfaction_sum"]
+            rating_count[label] += row["satisfaction_count"]
     
     # Calculate averages
     satisfaction_data = []
     for label in labels:
-        if total_per_period[label]:
-            avg = sum(total_per_period[label]) / len(total_per_period[label])
-            satisfaction_data.append(round(avg, 2))
-        else:
-            satisfaction_data.append(0)
+        avg = _ratio(rating_sum[label], rating_count[label])
+        satisfaction_data.append(round(avg, 2) if avg is not None else 0)
     
     return {
         "labels": labels,
@@ -388,36 +356,23 @@ def calculate_service_efficiency_trend(
     start_date, end_date = get_time_range(period, custom_start, custom_end)
     labels = generate_time_labels(start_date, end_date, period)
     
-    # Query completed requests in period
-    requests = db.query(Request).filter(
-        Request.created_at >= start_date,
-        Request.created_at <= end_date,
-        Request.status == RequestStatus.COMPLETED,
-        Request.completed_at.isnot(None)
-    ).all()
-    
-    # Group by period
-    period_requests = {label: [] for label in labels}
-    
-    for request in requests:
-        if period == "daily":
-            label = request.created_at.strftime("%b %d")
-        elif period == "weekly":
-            label = request.created_at.strftime("Week %U")
-        elif period == "monthly":
-            label = request.created_at.strftime("%b %Y")
-        else:
-            label = request.created_at.strftime("%Y")
-        
-        if label in period_requests:
-            period_requests[label].append(request)
+    # Completion hours of completed requests, per period
+    hours_sum = {label: 0 for label in labels}
+    hours_count = {label: 0 for label in labels}
+    
+    for row in summarize_daily_stats(
+        db, start_date, end_date, ("day",), status=RequestStatus.COMPLETED, unit=BUCKET_UNIT[period]
+    ):
+        label = period_label(row["day"], period)
+        if label in hours_sum:
+            hours_sum[label] += row["completion_hours_sum"]
+            hours_count[label] += row["completion_count"]
             
     # Calculate efficiency for each period
     efficiency_data = []
     for label in labels:
-        reqs = period_requests[label]
-        if reqs:
-            avg_time = sum([(r.completed_at - r.created_at).total_seconds() / 3600 for r in reqs]) / len(reqs)
+        avg_time = _ratio(hours_sum[label], hours_count[label])
+        if avg_time is not None:
             # 72 hours baseline
             score = min(100, max(0, 100 - (avg_time / 72 * 100)))
             efficiency_data.append(round(score, 2))
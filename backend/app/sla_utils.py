@@ -59,57 +59,19 @@ def get_sla_policy(
     Returns:
         SLAPolicy object or None if no policy found
     """
-    # Build query filters in order of specificity
-    query_attempts = []
-    
-    # Attempt 1: Most specific - Division + Department + Resource + Activity + Priority
-    if division_id and department_id and activity_type:
-        query_attempts.append([
-            SLAPolicy.division_id == division_id,
-            SLAPolicy.department_id == department_id,
-            SLAPolicy.resource_type == resource_type,
-            SLAPolicy.activity_type == activity_type,
-            SLAPolicy.priority == priority,
-            SLAPolicy.is_active == True
-        ])
-    
-    # Attempt 2: Division + Resource + Activity + Priority
-    if division_id and activity_type:
-        query_attempts.append([
-            SLAPolicy.division_id == division_id,
-            SLAPolicy.department_id.is_(None),
-            SLAPolicy.resource_type == resource_type,
-            SLAPolicy.activity_type == activity_type,
-            SLAPolicy.priority == priority,
-            SLAPolicy.is_active == True
-        ])
-    
-    # Attempt 3: Resource + Activity + Priority (global policy)
-    if activity_type:
-        query_attempts.append([
-            SLAPolicy.division_id.is_(None),
-            SLAPolicy.department_id.is_(None),
-            SLAPolicy.resource_type == resource_type,
-            SLAPolicy.activity_type == activity_type,
-            SLAPolicy.priority == priority,
-            SLAPolicy.is_active == True
-        ])
-    
-    # Attempt 4: Resource + Priority only (activity=NULL, global policy)
-    query_attempts.append([
-        SLAPolicy.division_id.is_(None),
-        SLAPolicy.department_id.is_(None),
-        SLAPolicy.resource_type == resource_type,
-        SLAPolicy.activity_type.is_(None),
-        SLAPolicy.priority == priority,
-        SLAPolicy.is_active == True
-    ])
-    
-    # Try each query in order, return first match
-    for filters in query_attempts:
-        policy = db.query(SLAPolicy).filter(*filters).first()
-        if policy:
-            return policy
+    # Resolved from the in-process policy map (no per-attempt queries)
+    from app.services.sla_policy_resolver import sla_policy_resolver
+
+    resolved = sla_policy_resolver.resolve(
+        db,
+        resource_type=resource_type,
+        activity_type=activity_type,
+        priority=priority,
+        division_id=division_id,
+        department_id=department_id
+    )
+    if resolved:
+        return db.get(SLAPolicy, resolved.policy_id)
     
     return None
 
@@ -0,0 +1,191 @@
+"""
+Notification brokers.
+
+A notification has to reach the sockets of its user on whichever worker
+holds them. NOTIFICATION_BROKER selects how:
+
+- inprocess: straight to this worker's ConnectionManager, no hop. Only
+  correct when every socket lives in the publishing process (one worker);
+  it warns at startup when WEB_CONCURRENCY says otherwise.
+- redis: Redis pub/sub (websocket/redis_pubsub.py).
+- postgres: LISTEN/NOTIFY on the application's PostgreSQL database
+  (websocket/pg_notify.py); no extra service, payloads up to 8000 bytes.
+
+The remote brokers publish one channel per user ("notifications:user:<id>")
+plus the "notifications" broadcast channel, and every worker listens only to
+the channels of users connected to it. If publishing fails the error is
+counted and reported by health(), and the sockets on this worker still get
+the message.
+
+probe_backends() times a round trip through every backend this deployment
+could use, so operators can pick the cheapest one for their topology.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Set
+
+from ..config import settings
+from .manager import manager
+
+BROADCAST_CHANNEL = "notifications"
+USER_CHANNEL_PREFIX = "notifications:user:"
+PROBE_CHANNEL_PREFIX = "notifications:probe:"
+PROBE_TIMEOUT_SECONDS = 2.0
+LATENCY_WINDOW = 1000
+
+
+def user_channel(user_id: str) -> str:
+    return f"{USER_CHANNEL_PREFIX}{user_id}"
+
+
+def wanted_channels() -> Set[str]:
+    """Channels this worker has sockets for: broadcast plus one per connected user"""
+    return {BROADCAST_CHANNEL} | {user_channel(user_id) for user_id in list(manager.active_connections)}
+
+
+async def deliver(channel: str, text: str):
+    """Hand a message received on a channel to the local sockets"""
+    if channel == BROADCAST_CHANNEL:
+        await manager.broadcast(text)
+    elif channel.startswith(USER_CHANNEL_PREFIX):
+        await manager.send_personal_message(text, channel[len(USER_CHANNEL_PREFIX):])
+
+
+def _summary(values) -> Optional[Dict]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50": round(ordered[len(ordered) // 2], 2),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+async def timed_probe(round_trip) -> Dict[str, Any]:
+    """Run a probe coroutine (returning milliseconds) with a timeout"""
+    try:
+        round_trip_ms = await asyncio.wait_for(round_trip, PROBE_TIMEOUT_SECONDS)
+        return {"ok": True, "round_trip_ms": round(round_trip_ms, 2), "error": None}
+    except asyncio.TimeoutError:
+        return {"ok": False, "round_trip_ms": None, "error": f"no reply within {PROBE_TIMEOUT_SECONDS}s"}
+    except Exception as e:
+        return {"ok": False, "round_trip_ms": None, "error": f"{type(e).__name__}: {e}"}
+
+
+class NotificationBroker:
+    """Publishes notifications; subclasses move them between workers"""
+
+    name = "base"
+
+    def __init__(self):
+        self.published = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.listening = False
+        self.warning: Optional[str] = None
+        self._publish_ms = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def _publish(self, channel: str, text: str):
+        raise NotImplementedError
+
+    async def send_to_user(self, user_id: str, payload: Dict[str, Any]):
+        message = payload.copy()
+        message["user_id"] = user_id
+        await self._send(user_channel(user_id), json.dumps(message))
+
+    async def broadcast(self, payload: Dict[str, Any]):
+        await self._send(BROADCAST_CHANNEL, json.dumps(payload))
+
+    async def _send(self, channel: str, text: str):
+        started = time.perf_counter()
+        try:
+            await self._publish(channel, text)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            # Other workers miss it, but sockets on this one still get it
+            await deliver(channel, text)
+            return
+        self._publish_ms.append((time.perf_counter() - started) * 1000)
+        self.published += 1
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "listening": self.listening,
+            "published": self.published,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "warning": self.warning,
+            "publish_ms": _summary(self._publish_ms),
+        }
+
+
+class InProcessBroker(NotificationBroker):
+    """Delivers to this worker's sockets only"""
+
+    name = "inprocess"
+
+    async def start(self):
+        self.listening = True
+        if settings.web_concurrency > 1:
+            self.warning = (
+                f"NOTIFICATION_BROKER=inprocess with WEB_CONCURRENCY={settings.web_concurrency}: "
+                "notifications only reach sockets on the worker that sent them; "
+                "set NOTIFICATION_BROKER=redis or postgres"
+            )
+            print(f"⚠️ {self.warning}")
+
+    async def _publish(self, channel: str, text: str):
+        await deliver(channel, text)
+
+    @staticmethod
+    async def probe() -> Dict[str, Any]:
+        async def round_trip():
+            started = time.perf_counter()
+            await deliver(f"{PROBE_CHANNEL_PREFIX}local", "probe")
+            return (time.perf_counter() - started) * 1000
+        return await timed_probe(round_trip())
+
+
+def create_broker(name: str) -> NotificationBroker:
+    if name == "redis":
+        from .redis_pubsub import RedisBroker
+        return RedisBroker(settings.redis_url)
+    if name == "postgres":
+        from ..database import engine
+        from .pg_notify import PostgresBroker
+        return PostgresBroker(engine)
+    return InProcessBroker()
+
+
+async def probe_backends() -> Dict[str, Dict[str, Any]]:
+    """Round trip through each backend available here (in-process, Redis, PostgreSQL)"""
+    from ..database import engine
+    from .pg_notify import PostgresBroker
+    from .redis_pubsub import RedisBroker
+
+    results = {"inprocess": await InProcessBroker.probe()}
+    if settings.redis_url:
+        results["redis"] = await RedisBroker.probe(settings.redis_url)
+    else:
+        results["redis"] = {"ok": False, "round_trip_ms": None, "error": "REDIS_URL is not set"}
+    if engine.dialect.name == "postgresql":
+        results["postgres"] = await PostgresBroker.probe(engine)
+    else:
+        results["postgres"] = {"ok": False, "round_trip_ms": None, "error": "database is not PostgreSQL"}
+    return results
+
+
+# Shared notification broker for the process
+notification_broker = create_broker(settings.notification_broker)
@@ -1,50 +1,192 @@
-from typing import Dict, List
+"""
+WebSocket connections of this process.
+
+Every connection has its own bounded outbound queue and a writer task that
+sends from it, so sending a message only queues it: a broadcast reaches all
+queues at once and a slow client holds up nobody but itself.
+
+A client that stops reading fills its queue; further messages then replace
+the oldest queued one (newer notifications supersede older ones). Once it
+has missed a full queue's worth, or a single send takes longer than
+WS_SEND_TIMEOUT_SECONDS, the connection is closed (1013, try again later)
+and the client is expected to reconnect and refetch.
+
+Messages may be given as text or as a JSON-serializable payload; a payload
+is serialized once, however many connections it goes to.
+"""
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional, Union
+
 from starlette.websockets import WebSocket
 
+from ..config import settings
+
+Message = Union[str, Dict[str, Any]]
+
+# Close code for consumers that cannot keep up ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def _as_text(message: Message) -> str:
+    return message if isinstance(message, str) else json.dumps(message)
+
+
+class _Connection:
+    """One WebSocket with its outbound queue and writer task"""
+
+    def __init__(self, websocket: WebSocket, user_id: str, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.manager = manager
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ws_send_queue_size)
+        self.dropped = 0
+        self.closed = False
+        self.writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.writer = asyncio.get_running_loop().create_task(self._write())
+
+    def offer(self, text: str):
+        """Queue a message without waiting; coalesce or close when the client lags"""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(text)
+            return
+        except asyncio.QueueFull:
+            pass
+        # Full: the newest message replaces the oldest
+        self.queue.get_nowait()
+        self.queue.put_nowait(text)
+        self.dropped += 1
+        self.manager.dropped_messages += 1
+        if self.dropped >= self.queue.maxsize:
+            self.abort()
+
+    async def _write(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(text), settings.ws_send_timeout_seconds)
+                self.dropped = 0
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.abort()
+        except Exception:
+            # client went away; the endpoint notices and disconnects it
+            self.closed = True
+            self.manager._remove(self)
+
+    def abort(self):
+        """Drop a client that cannot keep up"""
+        if self.closed:
+            return
+        self.closed = True
+        self.manager.slow_consumers_closed += 1
+        self.manager._remove(self)
+        if self.writer is not None and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        self.manager._spawn(self._close())
+
+    async def _close(self):
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE), settings.ws_send_timeout_seconds
+            )
+        except Exception:
+            pass
+
+    def stop(self):
+        self.closed = True
+        if self.writer is not None:
+            self.writer.cancel()
+
 
 class ConnectionManager:
     def __init__(self):
-        # Map user_id -> list of WebSocket connections
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        # Map user_id -> connections of that user
+        self.active_connections: Dict[str, List[_Connection]] = {}
+        self.dropped_messages = 0
+        self.slow_consumers_closed = 0
+        self._tasks = set()
+        self._presence_listeners: List[Callable[[str, bool], None]] = []
+
+    def add_presence_listener(self, listener: Callable[[str, bool], None]):
+        """Call listener(user_id, connected) when a user's first socket opens / last one closes"""
+        self._presence_listeners.append(listener)
+
+    def remove_presence_listener(self, listener: Callable[[str, bool], None]):
+        if listener in self._presence_listeners:
+            self._presence_listeners.remove(listener)
+
+    def _presence_changed(self, user_id: str, connected: bool):
+        for listener in self._presence_listeners:
+            listener(user_id, connected)
 
     async def connect(self, websocket: WebSocket, user_id: str):
         await websocket.accept()
-        self.active_connections.setdefault(user_id, []).append(websocket)
+        connection = _Connection(websocket, user_id, self)
+        connection.start()
+        conns = self.active_connections.setdefault(user_id, [])
+        conns.append(connection)
+        if len(conns) == 1:
+            self._presence_changed(user_id, True)
 
     def disconnect(self, websocket: WebSocket, user_id: str):
-        conns = self.active_connections.get(user_id)
+        for connection in list(self.active_connections.get(user_id, [])):
+            if connection.websocket is websocket:
+                connection.stop()
+                self._remove(connection)
+
+    def _remove(self, connection: _Connection):
+        conns = self.active_connections.get(connection.user_id)
         if not conns:
             return
         try:
-            conns.remove(websocket)
+            conns.remove(connection)
         except ValueError:
             pass
         if not conns:
-            self.active_connections.pop(user_id, None)
-
-    async def send_personal_message(self, message: str, user_id: str):
-        conns = self.active_connections.get(user_id, [])
-        for ws in list(conns):
-            try:
-                await ws.send_text(message)
-            except Exception:
-                # ignore send errors; client may have disconnected
-                try:
-                    conns.remove(ws)
-                except ValueError:
-                    pass
-
-    async def broadcast(self, message: str):
-        # Send to all connected clients
-        for user_id, conns in list(self.active_connections.items()):
-            for ws in list(conns):
-                try:
-                    await ws.send_text(message)
-                except Exception:
-                    try:
-                        conns.remove(ws)
-                    except ValueError:
-                        pass
+            self.active_connections.pop(connection.user_id, None)
+            self._presence_changed(connection.user_id, False)
+
+    def _spawn(self, coroutine):
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def send_personal_message(self, message: Message, user_id: str):
+        conns = self.active_connections.get(user_id)
+        if not conns:
+            return
+        text = _as_text(message)
+        for connection in list(conns):
+            connection.offer(text)
+
+    async def broadcast(self, message: Message):
+        # Queue for all connected clients; their writers send concurrently
+        text = _as_text(message)
+        for conns in list(self.active_connections.values()):
+            for connection in list(conns):
+                connection.offer(text)
+
+    def connection_count(self) -> int:
+        return sum(len(conns) for conns in self.active_connections.values())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connections": self.connection_count(),
+            "queued_messages": sum(
+                connection.queue.qsize()
+                for conns in self.active_connections.values()
+                for connection in conns
+            ),
+            "dropped_messages": self.dropped_messages,
+            "slow_consumers_closed": self.slow_consumers_closed,
+        }
 
 
 # single shared manager instance used by the app
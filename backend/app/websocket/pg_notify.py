@@ -0,0 +1,175 @@
+"""
+PostgreSQL LISTEN/NOTIFY notification broker (NOTIFICATION_BROKER=postgres).
+
+Uses the application database, so a PostgreSQL deployment needs no other
+service to reach sockets on every worker:
+
+- publishing is SELECT pg_notify(channel, payload) on a pooled connection
+  (in the thread pool); payloads are limited to 8000 bytes
+- each worker keeps one dedicated autocommit connection that LISTENs to the
+  broadcast channel and the channels of its connected users (following
+  connects and disconnects, like the Redis broker). The event loop watches
+  its socket, so no thread sits waiting for notifications.
+- a broken listener connection is reopened after RECONNECT_SECONDS
+"""
+import asyncio
+import select
+import time
+import uuid
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from .broker import (
+    PROBE_CHANNEL_PREFIX, PROBE_TIMEOUT_SECONDS, NotificationBroker, deliver, timed_probe, wanted_channels
+)
+from .manager import manager
+
+RECONNECT_SECONDS = 1.0
+# NOTIFY payloads must be shorter than 8000 bytes
+MAX_PAYLOAD_BYTES = 7999
+
+
+def _quote(channel: str) -> str:
+    return '"' + channel.replace('"', '""') + '"'
+
+
+def _connect(engine: Engine):
+    """New DBAPI connection outside the pool, in autocommit mode"""
+    cargs, cparams = engine.dialect.create_connect_args(engine.url)
+    connection = engine.dialect.connect(*cargs, **cparams)
+    connection.autocommit = True
+    return connection
+
+
+async def _wait_any(*events: asyncio.Event):
+    waiters = [asyncio.ensure_future(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
+class PostgresBroker(NotificationBroker):
+    name = "postgres"
+
+    def __init__(self, engine: Engine):
+        super().__init__()
+        self.engine = engine
+        self.listened: Set[str] = set()
+        self._listener_task: Optional[asyncio.Task] = None
+        self._subscriptions_changed: Optional[asyncio.Event] = None
+
+    async def start(self):
+        if self._listener_task is not None:
+            return
+        self._subscriptions_changed = asyncio.Event()
+        manager.add_presence_listener(self._on_presence_changed)
+        self._listener_task = asyncio.get_running_loop().create_task(self._listener())
+
+    async def stop(self):
+        manager.remove_presence_listener(self._on_presence_changed)
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+    async def _publish(self, channel: str, payload: str):
+        if len(payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+            raise ValueError(f"notification of {len(payload)} characters is too long for NOTIFY")
+        await run_in_threadpool(self._notify, channel, payload)
+
+    def _notify(self, channel: str, payload: str):
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+            connection.commit()
+
+    def _on_presence_changed(self, user_id: str, connected: bool):
+        self._subscriptions_changed.set()
+
+    def _sync_listens(self, connection):
+        """LISTEN to the channels of newly connected users, UNLISTEN departed ones"""
+        wanted = wanted_channels()
+        with connection.cursor() as cursor:
+            for channel in wanted - self.listened:
+                cursor.execute(f"LISTEN {_quote(channel)}")
+            for channel in self.listened - wanted:
+                cursor.execute(f"UNLISTEN {_quote(channel)}")
+        self.listened = wanted
+
+    async def _drain(self, connection):
+        connection.poll()
+        notifies = list(connection.notifies)
+        del connection.notifies[:]
+        for notify in notifies:
+            await deliver(notify.channel, notify.payload)
+
+    async def _listener(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            connection = None
+            readable = asyncio.Event()
+            try:
+                connection = await run_in_threadpool(_connect, self.engine)
+                self.listened = set()
+                await run_in_threadpool(self._sync_listens, connection)
+                loop.add_reader(connection.fileno(), readable.set)
+                self.listening = True
+                while True:
+                    await _wait_any(readable, self._subscriptions_changed)
+                    if self._subscriptions_changed.is_set():
+                        self._subscriptions_changed.clear()
+                        await run_in_threadpool(self._sync_listens, connection)
+                    readable.clear()
+                    # LISTEN may have read notifications too, so always drain
+                    await self._drain(connection)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"listener: {e}"
+                print(f"⚠️ PostgreSQL notification listener error: {e}; reconnecting")
+                await asyncio.sleep(RECONNECT_SECONDS)
+            finally:
+                self.listening = False
+                if connection is not None:
+                    try:
+                        loop.remove_reader(connection.fileno())
+                    except Exception:
+                        pass
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def health(self) -> Dict[str, Any]:
+        return {**super().health(), "subscribed_channels": len(self.listened)}
+
+    @staticmethod
+    def _round_trip(engine: Engine, timeout: float) -> float:
+        connection = _connect(engine)
+        try:
+            channel = f"{PROBE_CHANNEL_PREFIX}{uuid.uuid4().hex}"
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {_quote(channel)}")
+                started = time.perf_counter()
+                cursor.execute("SELECT pg_notify(%s, 'probe')", (channel,))
+            deadline = started + timeout
+            while not connection.notifies:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not select.select([connection], [], [], remaining)[0]:
+                    raise TimeoutError("no notification received")
+                connection.poll()
+            return (time.perf_counter() - started) * 1000
+        finally:
+            connection.close()
+
+    @staticmethod
+    async def probe(engine: Engine) -> Dict[str, Any]:
+        """NOTIFY a fresh channel and time until the LISTENing connection has it"""
+        return await timed_probe(run_in_threadpool(PostgresBroker._round_trip, engine, PROBE_TIMEOUT_SECONDS))
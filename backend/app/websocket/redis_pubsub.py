@@ -1,83 +1,147 @@
+"""
+Redis pub/sub notification broker (NOTIFICATION_BROKER=redis).
+
+Each worker subscribes to the broadcast channel plus the channels of the
+users that have a socket open on it, following connects and disconnects,
+so it only receives what it can deliver and forwards the published text
+without decoding it.
+
+The listener blocks on the subscription (no polling) and reconnects when
+Redis goes away.
+
+REDIS_URL=fakeredis:// uses an in-process fakeredis server instead, for
+tests and local runs without Redis (pip install fakeredis).
+"""
 import asyncio
-import json
-from typing import Any, Dict, Optional
+import time
+import uuid
+from typing import Any, Dict, Optional, Set
 
 import redis.asyncio as aioredis
 
+from .broker import PROBE_CHANNEL_PREFIX, NotificationBroker, deliver, timed_probe, wanted_channels
 from .manager import manager
 
-_redis: Optional[aioredis.Redis] = None
-_listener_task: Optional[asyncio.Task] = None
-_stopping = False
-
-
-async def init_redis(url: str):
-    global _redis
-    _redis = aioredis.from_url(url, decode_responses=True)
-
-
-async def publish_notification(channel: str, payload: Dict[str, Any]):
-    if _redis is None:
-        raise RuntimeError("Redis not initialized")
-    message = json.dumps(payload)
-    await _redis.publish(channel, message)
-
-
-async def _listener(channel: str = "notifications"):
-    global _redis, _stopping
-    if _redis is None:
-        return
-    pubsub = _redis.pubsub()
-    await pubsub.subscribe(channel)
-    try:
-        while not _stopping:
-            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if message is None:
-                await asyncio.sleep(0.1)
-                continue
-            # message is a dict: {'type': 'message', 'pattern': None, 'channel': 'notifications', 'data': '...'}
-            data = message.get("data")
-            if not data:
-                continue
+RECONNECT_SECONDS = 1.0
+
+
+def _client(url: str) -> aioredis.Redis:
+    if url.startswith("fakeredis://"):
+        import fakeredis
+        return fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return aioredis.from_url(url, decode_responses=True)
+
+
+class RedisBroker(NotificationBroker):
+    name = "redis"
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self.redis: Optional[aioredis.Redis] = None
+        self.subscribed: Set[str] = set()
+        self._listener_task: Optional[asyncio.Task] = None
+        # Set when a user's first socket opens or last one closes
+        self._subscriptions_changed: Optional[asyncio.Event] = None
+
+    async def start(self):
+        if self._listener_task is not None:
+            return
+        self.redis = _client(self.url)
+        self._subscriptions_changed = asyncio.Event()
+        manager.add_presence_listener(self._on_presence_changed)
+        self._listener_task = asyncio.get_running_loop().create_task(self._listener())
+
+    async def stop(self):
+        manager.remove_presence_listener(self._on_presence_changed)
+        if self._listener_task:
+            self._listener_task.cancel()
             try:
-                payload = json.loads(data)
-            except Exception:
-                payload = {"message": data}
-
-            # Deliver to specific user if provided, otherwise broadcast
-            user_id = None
-            if isinstance(payload, dict):
-                user_id = payload.get("user_id")
-
-            if user_id:
-                # manager expects string user_id
-                await manager.send_personal_message(json.dumps(payload), str(user_id))
-            else:
-                await manager.broadcast(json.dumps(payload))
-    finally:
-        try:
-            await pubsub.unsubscribe(channel)
-            await pubsub.close()
-        except Exception:
-            pass
-
-
-def start_listener(loop: Optional[asyncio.AbstractEventLoop] = None, channel: str = "notifications"):
-    global _listener_task, _stopping
-    if _listener_task is not None:
-        return
-    _stopping = False
-    if loop is None:
-        loop = asyncio.get_event_loop()
-    _listener_task = loop.create_task(_listener(channel))
-
-
-async def stop_listener():
-    global _listener_task, _stopping
-    _stopping = True
-    if _listener_task:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+    async def _publish(self, channel: str, text: str):
+        if self.redis is None:
+            raise RuntimeError("Redis not initialized")
+        await self.redis.publish(channel, text)
+
+    def _on_presence_changed(self, user_id: str, connected: bool):
+        self._subscriptions_changed.set()
+
+    async def _sync_subscriptions(self, pubsub):
+        """Subscribe to the channels of newly connected users, drop those of departed ones"""
+        wanted = wanted_channels()
+        added = wanted - self.subscribed
+        removed = self.subscribed - wanted
+        if added:
+            await pubsub.subscribe(*added)
+        if removed:
+            await pubsub.unsubscribe(*removed)
+        self.subscribed = wanted
+
+    async def _follow_connections(self, pubsub):
+        while True:
+            await self._subscriptions_changed.wait()
+            self._subscriptions_changed.clear()
+            await self._sync_subscriptions(pubsub)
+
+    async def _deliver(self, pubsub):
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                await deliver(message["channel"], message["data"])
+
+    async def _listener(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            self.subscribed = set()
+            try:
+                await self._sync_subscriptions(pubsub)
+                self.listening = True
+                # Either task failing (Redis gone) cancels the other and reconnects
+                async with asyncio.TaskGroup() as tasks:
+                    tasks.create_task(self._follow_connections(pubsub))
+                    tasks.create_task(self._deliver(pubsub))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"listener: {e}"
+                print(f"⚠️ Redis notification listener error: {e}; reconnecting")
+                await asyncio.sleep(RECONNECT_SECONDS)
+            finally:
+                self.listening = False
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def health(self) -> Dict[str, Any]:
+        return {**super().health(), "subscribed_channels": len(self.subscribed)}
+
+    @staticmethod
+    async def probe(url: str) -> Dict[str, Any]:
+        """Publish on a fresh channel and time until the subscription receives it"""
+        client = _client(url)
+        pubsub = client.pubsub()
+        channel = f"{PROBE_CHANNEL_PREFIX}{uuid.uuid4().hex}"
+
+        async def round_trip():
+            await pubsub.subscribe(channel)
+            started = time.perf_counter()
+            await client.publish(channel, "probe")
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    return (time.perf_counter() - started) * 1000
+
         try:
-            await _listener_task
-        except asyncio.CancelledError:
-            pass
-        _listener_task = None
+            return await timed_probe(round_trip())
+        finally:
+            try:
+                await pubsub.aclose()
+                await client.aclose()
+            except Exception:
+                pass
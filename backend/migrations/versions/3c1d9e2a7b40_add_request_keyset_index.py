@@ -0,0 +1,26 @@
+"""add request keyset index
+
+Revision ID: 3c1d9e2a7b40
+Revises: 50f7602a57c9
+Create Date: 2026-10-17 09:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1d9e2a7b40'
+down_revision: Union[str, None] = '50f7602a57c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_requests_created_at_id', 'requests', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_requests_created_at_id', table_name='requests')
@@ -0,0 +1,32 @@
+"""add request id sequences
+
+Revision ID: 6f2b8d41c9e3
+Revises: 3c1d9e2a7b40
+Create Date: 2026-10-17 10:02:18.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2b8d41c9e3'
+down_revision: Union[str, None] = '3c1d9e2a7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'request_id_sequences',
+        sa.Column('prefix', sa.String(length=50), nullable=False),
+        sa.Column('last_value', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('prefix')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('request_id_sequences')
@@ -0,0 +1,26 @@
+"""add sla alert lookup index
+
+Revision ID: 9d4e7a1f2c65
+Revises: 6f2b8d41c9e3
+Create Date: 2026-10-17 11:20:05.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4e7a1f2c65'
+down_revision: Union[str, None] = '6f2b8d41c9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_sla_alerts_request_id_alert_type', 'sla_alerts', ['request_id', 'alert_type'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sla_alerts_request_id_alert_type', table_name='sla_alerts')
@@ -0,0 +1,69 @@
+"""add request daily stats
+
+Revision ID: b7e3c5a90d18
+Revises: 9d4e7a1f2c65
+Create Date: 2026-10-17 14:21:05.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3c5a90d18'
+down_revision: Union[str, None] = '9d4e7a1f2c65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Enum types already exist (created with the requests table)
+resource_type_enum = postgresql.ENUM(
+    'FLEET', 'HR', 'FINANCE', 'ICT', 'LOGISTICS', 'FACILITIES', 'GENERAL',
+    name='resourcetype', create_type=False
+)
+priority_enum = postgresql.ENUM('HIGH', 'MEDIUM', 'LOW', name='priority', create_type=False)
+request_status_enum = postgresql.ENUM(
+    'PENDING', 'APPROVAL_PENDING', 'APPROVED', 'IN_PROGRESS', 'COMPLETED', 'REJECTED', 'CANCELLED',
+    name='requeststatus', create_type=False
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'request_daily_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('division_id', sa.Integer(), nullable=True),
+        sa.Column('department_id', sa.Integer(), nullable=True),
+        sa.Column('resource_type', resource_type_enum, nullable=True),
+        sa.Column('priority', priority_enum, nullable=True),
+        sa.Column('status', request_status_enum, nullable=True),
+        sa.Column('request_count', sa.Integer(), nullable=False),
+        sa.Column('sla_evaluated_count', sa.Integer(), nullable=False),
+        sa.Column('on_time_count', sa.Integer(), nullable=False),
+        sa.Column('response_count', sa.Integer(), nullable=False),
+        sa.Column('response_hours_sum', sa.Float(), nullable=False),
+        sa.Column('completion_count', sa.Integer(), nullable=False),
+        sa.Column('completion_hours_sum', sa.Float(), nullable=False),
+        sa.Column('satisfaction_count', sa.Integer(), nullable=False),
+        sa.Column('satisfaction_sum', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['department_id'], ['departments.id'], ),
+        sa.ForeignKeyConstraint(['division_id'], ['divisions.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_request_daily_stats_id'), 'request_daily_stats', ['id'], unique=False)
+    op.create_index(
+        'ix_request_daily_stats_key',
+        'request_daily_stats',
+        ['day', 'division_id', 'department_id', 'resource_type', 'priority', 'status'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_request_daily_stats_key', table_name='request_daily_stats')
+    op.drop_index(op.f('ix_request_daily_stats_id'), table_name='request_daily_stats')
+    op.drop_table('request_daily_stats')
@@ -0,0 +1,55 @@
+"""add outbound emails
+
+Revision ID: c5f8a2d14e67
+Revises: e4a1c7b93f20
+Create Date: 2026-10-17 19:12:37.204851
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f8a2d14e67'
+down_revision: Union[str, None] = 'e4a1c7b93f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+outbound_email_status_enum = sa.Enum('PENDING', 'SENDING', 'SENT', 'FAILED', name='outboundemailstatus')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbound_emails',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('request_id', sa.Integer(), nullable=True),
+        sa.Column('recipients', sa.JSON(), nullable=False),
+        sa.Column('subject', sa.String(), nullable=False),
+        sa.Column('html_body', sa.Text(), nullable=False),
+        sa.Column('inline_images', sa.JSON(), nullable=True),
+        sa.Column('status', outbound_email_status_enum, nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['request_id'], ['requests.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbound_emails_id'), 'outbound_emails', ['id'], unique=False)
+    op.create_index(
+        'ix_outbound_emails_status_next_attempt_at',
+        'outbound_emails',
+        ['status', 'next_attempt_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbound_emails_status_next_attempt_at', table_name='outbound_emails')
+    op.drop_index(op.f('ix_outbound_emails_id'), table_name='outbound_emails')
+    op.drop_table('outbound_emails')
+    outbound_email_status_enum.drop(op.get_bind(), checkfirst=True)
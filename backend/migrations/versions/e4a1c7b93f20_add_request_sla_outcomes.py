@@ -0,0 +1,43 @@
+"""add request sla outcomes
+
+Revision ID: e4a1c7b93f20
+Revises: b7e3c5a90d18
+Create Date: 2026-10-17 16:02:44.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a1c7b93f20'
+down_revision: Union[str, None] = 'b7e3c5a90d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('requests', sa.Column('response_met', sa.Boolean(), nullable=True))
+    op.add_column('requests', sa.Column('completion_met', sa.Boolean(), nullable=True))
+    op.add_column('requests', sa.Column('response_delay_hours', sa.Float(), nullable=True))
+    op.add_column('requests', sa.Column('completion_delay_hours', sa.Float(), nullable=True))
+    op.add_column('requests', sa.Column('breached_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_requests_response_met'), 'requests', ['response_met'], unique=False)
+    op.create_index(op.f('ix_requests_completion_met'), 'requests', ['completion_met'], unique=False)
+    op.create_index(op.f('ix_requests_breached_at'), 'requests', ['breached_at'], unique=False)
+    # Existing rows are filled in by scripts/backfill_sla_outcomes.py, which
+    # marks the outcomes ready; until then compliance is computed from the
+    # timestamps (services/sla_outcomes.completion_outcomes)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_requests_breached_at'), table_name='requests')
+    op.drop_index(op.f('ix_requests_completion_met'), table_name='requests')
+    op.drop_index(op.f('ix_requests_response_met'), table_name='requests')
+    op.drop_column('requests', 'breached_at')
+    op.drop_column('requests', 'completion_delay_hours')
+    op.drop_column('requests', 'response_delay_hours')
+    op.drop_column('requests', 'completion_met')
+    op.drop_column('requests', 'response_met')
@@ -0,0 +1,37 @@
+"""add pending counters
+
+Revision ID: f3b9d6e21a84
+Revises: c5f8a2d14e67
+Create Date: 2026-10-17 21:04:52.630117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d6e21a84'
+down_revision: Union[str, None] = 'c5f8a2d14e67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pending_counters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=20), nullable=False),
+        sa.Column('unit_id', sa.Integer(), nullable=False),
+        sa.Column('pending_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pending_counters_id'), 'pending_counters', ['id'], unique=False)
+    op.create_index('ix_pending_counters_scope_unit', 'pending_counters', ['scope', 'unit_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pending_counters_scope_unit', table_name='pending_counters')
+    op.drop_index(op.f('ix_pending_counters_id'), table_name='pending_counters')
+    op.drop_table('pending_counters')
@@ -0,0 +1,37 @@
+"""
+Backfill the request_daily_stats rollup
+
+Recomputes every rollup row from the requests table and marks the rollup as
+ready, after which the trend charts read it instead of raw requests. Safe to
+re-run at any time (e.g. after importing requests directly into the database);
+run it while traffic is low since it replaces the whole table in one
+transaction.
+
+    cd backend
+    python scripts/backfill_daily_stats.py
+"""
+import sys
+import time
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal
+from app.services.daily_stats import rebuild_daily_stats
+
+
+def main():
+    db = SessionLocal()
+    try:
+        print("Rebuilding request_daily_stats...")
+        started = time.perf_counter()
+        rows = rebuild_daily_stats(db)
+        print(f"✅ {rows} rollup rows written in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Backfill the pending request counters
+
+Recounts the open requests of every unit from the requests table and marks
+the counters as ready, after which /notifications/unread-count and the
+WebSocket pushes read them instead of counting requests. Safe to re-run at
+any time (e.g. after importing requests directly into the database); run it
+while traffic is low since it replaces the whole table in one transaction.
+
+    cd backend
+    python scripts/backfill_pending_counters.py
+"""
+import sys
+import time
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal
+from app.services.pending_counters import rebuild_pending_counters
+
+
+def main():
+    db = SessionLocal()
+    try:
+        print("Rebuilding pending_counters...")
+        started = time.perf_counter()
+        rows = rebuild_pending_counters(db)
+        print(f"✅ {rows} counter rows written in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Backfill the stored SLA outcome columns of requests
+
+Sets response_met / completion_met, the delay hours and breached_at on every
+request from its timestamps, the same way the request endpoints and the SLA
+monitor set them going forward, then marks them ready. Until it has run,
+compliance figures test the timestamps in SQL instead of reading the
+columns, so run it once after the add_request_sla_outcomes migration to
+switch to the indexed columns; safe to re-run (e.g. after importing
+requests directly into the database). Commits every --batch-size requests.
+
+    cd backend
+    python scripts/backfill_sla_outcomes.py
+"""
+import argparse
+import sys
+import time
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal
+from app.services.sla_outcomes import backfill_sla_outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print("Backfilling SLA outcomes...")
+        started = time.perf_counter()
+        count = backfill_sla_outcomes(db, batch_size=args.batch_size)
+        print(f"✅ {count} requests updated in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Per-worker concurrency benchmark.
+
+Drives a single running worker with a mix of dashboard reads and request
+creates and reports latency percentiles per endpoint. Start ONE worker so the
+numbers reflect a single event loop, e.g.:
+
+    uvicorn app.main:app --port 8000 --workers 1
+
+then run:
+
+    python scripts/benchmark_concurrency.py --admin admin:admin123 --creator staff:staff123
+
+Compare runs before/after a change with the same --concurrency and --duration.
+A handler that blocks the event loop shows up as a p99 that tracks the slowest
+dashboard query instead of the endpoint's own cost.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+DASHBOARD_ENDPOINTS = [
+    "/api/dashboard/stats",
+    "/visual-analytics/dashboard?period=monthly",
+    "/kpis/dashboard",
+    "/sla/dashboard",
+    "/me/dashboard",
+]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def login(client: httpx.AsyncClient, credentials: str) -> dict:
+    username, password = credentials.split(":", 1)
+    response = await client.post("/auth/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def build_create_payload(client: httpx.AsyncClient, headers: dict) -> dict:
+    """Request body sent from the creator's unit to some other division"""
+    me = (await client.get("/auth/me", headers=headers)).json()
+    divisions = (await client.get("/divisions/", headers=headers)).json()
+    for division in divisions:
+        if division["id"] != me.get("division_id"):
+            return {
+                "request_type": "ICT",
+                "requester_division_id": me["division_id"],
+                "requester_department_id": me.get("department_id"),
+                "requester_subdepartment_id": me.get("subdepartment_id"),
+                "assigned_division_id": division["id"],
+                "priority": "MEDIUM",
+                "description": "Concurrency benchmark request",
+            }
+    raise SystemExit("Need at least two divisions to create cross-division requests")
+
+
+async def worker(client, admin_headers, creator_headers, create_payload, create_ratio, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        if random.random() < create_ratio:
+            name = "POST /requests"
+            call = client.post("/requests/", headers=creator_headers, json=create_payload)
+        else:
+            path = random.choice(DASHBOARD_ENDPOINTS)
+            name = f"GET {path.split('?')[0]}"
+            call = client.get(path, headers=admin_headers)
+
+        started = time.perf_counter()
+        try:
+            response = await call
+            if response.status_code >= 400:
+                errors[name] += 1
+        except httpx.HTTPError:
+            errors[name] += 1
+        latencies[name].append((time.perf_counter() - started) * 1000)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--admin", default="admin:admin123", help="username:password used for dashboard reads")
+    parser.add_argument("--creator", required=True, help="username:password of a non-admin user that creates requests")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--create-ratio", type=float, default=0.2, help="share of traffic that creates requests")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0, limits=limits) as client:
+        admin_headers = await login(client, args.admin)
+        creator_headers = await login(client, args.creator)
+        create_payload = await build_create_payload(client, creator_headers)
+
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        print(f"🚀 {args.concurrency} clients for {args.duration:.0f}s against {args.base_url} "
+              f"({args.create_ratio:.0%} creates)")
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            worker(client, admin_headers, creator_headers, create_payload,
+                   args.create_ratio, deadline, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"\n{'endpoint':<36}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name in sorted(latencies):
+        samples = latencies[name]
+        print(f"{name:<36}{len(samples):>8}{errors[name]:>8}"
+              f"{statistics.median(samples):>10.1f}{percentile(samples, 95):>10.1f}"
+              f"{percentile(samples, 99):>10.1f}{max(samples):>10.1f}")
+    every = [value for samples in latencies.values() for value in samples]
+    print(f"\n✅ {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), "
+          f"overall p99 {percentile(every, 99):.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,172 @@
+"""
+Visual analytics dashboard benchmark.
+
+Builds the /visual-analytics/dashboard payload against the configured database
+(DATABASE_URL / tebita.db) twice per run:
+
+    per-section   every chart and KPI calculator called on its own, the way
+                  the endpoint used to assemble the payload
+    assembler     services.dashboard_assembler (rollup and aggregate queries)
+
+and reports SQL statements and wall time for each, plus any section whose
+numbers differ between the two.
+
+    cd backend
+    python scripts/benchmark_visual_dashboard.py --period monthly --repeat 5
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime
+sys.path.insert(0, '.')
+
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.kpi_calculator import (
+    calculate_sla_compliance_rate,
+    calculate_service_request_fulfillment_rate,
+    calculate_customer_satisfaction_score
+)
+from app.models import Request, RequestStatus
+from app.scorecard_calculator import calculate_integration_index
+from app.services.dashboard_assembler import assemble_visual_dashboard
+from app.services.trend_calculator import (
+    calculate_request_volume_trend,
+    calculate_sla_compliance_trend,
+    calculate_requests_by_division,
+    calculate_requests_by_priority,
+    calculate_request_status_distribution,
+    calculate_satisfaction_trend,
+    calculate_service_efficiency_trend,
+)
+
+
+def calculate_rejection_rate(db, start_date=None, end_date=None):
+    """The rejection rate as the endpoint computed it (two counts)"""
+    query = db.query(Request)
+    if start_date: query = query.filter(Request.created_at >= start_date)
+    if end_date: query = query.filter(Request.created_at <= end_date)
+
+    total = query.count()
+    if total == 0: return 0.0
+
+    rejected = query.filter(Request.status == RequestStatus.REJECTED).count()
+    return (rejected / total) * 100.0
+
+
+def per_section_dashboard(db, period, custom_start, custom_end):
+    """The payload as the endpoint built it before the assembler"""
+    completed_query = db.query(Request).filter(Request.status == RequestStatus.COMPLETED)
+    if custom_start: completed_query = completed_query.filter(Request.created_at >= custom_start)
+    if custom_end: completed_query = completed_query.filter(Request.created_at <= custom_end)
+
+    integration_data = calculate_integration_index(db, None, custom_start, custom_end)
+    return {
+        "period": period,
+        "request_volume": calculate_request_volume_trend(db, period, custom_start, custom_end),
+        "sla_compliance": calculate_sla_compliance_trend(db, period, custom_start, custom_end),
+        "requests_by_division": calculate_requests_by_division(db, custom_start, custom_end),
+        "requests_by_priority": calculate_requests_by_priority(db, period, custom_start, custom_end),
+        "service_efficiency": calculate_service_efficiency_trend(db, period, custom_start, custom_end),
+        "status_distribution": calculate_request_status_distribution(db, custom_start, custom_end),
+        "satisfaction_trend": calculate_satisfaction_trend(db, period, custom_start, custom_end),
+        "summary_kpis": {
+            "sla_compliance": calculate_sla_compliance_rate(db, None, None, custom_start, custom_end),
+            "fulfillment_rate": calculate_service_request_fulfillment_rate(db, None, custom_start, custom_end),
+            "completed_count": completed_query.count(),
+            "satisfaction": calculate_customer_satisfaction_score(db, None, custom_start, custom_end),
+            "integration_index": integration_data.get("integration_index", 0),
+            "resource_optimization": 85.0,
+            "avg_cost_per_request": 0.0,
+            "rejection_rate": calculate_rejection_rate(db, custom_start, custom_end)
+        }
+    }
+
+
+def as_comparable(section):
+    """Pie/donut sections as label -> value so ordering does not matter"""
+    if isinstance(section, dict) and "data" in section and "labels" in section:
+        return dict(zip(section["labels"], section["data"]))
+    return section
+
+
+def same(a, b):
+    """Equal up to last-digit rounding (SQL and Python hour arithmetic differ slightly)"""
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return abs(a - b) <= 0.011
+    return a == b
+
+
+def measure(build, repeat):
+    statements = []
+
+    def count(*_):
+        statements.append(1)
+
+    timings = []
+    counts = []
+    payload = None
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        for _ in range(repeat):
+            db = SessionLocal()
+            try:
+                statements.clear()
+                started = time.perf_counter()
+                payload = build(db)
+                timings.append((time.perf_counter() - started) * 1000)
+                counts.append(len(statements))
+            finally:
+                db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return payload, counts[-1], timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--period", default="monthly", choices=["daily", "weekly", "monthly", "yearly"])
+    parser.add_argument("--start-date", help="ISO date, as the endpoint's start_date")
+    parser.add_argument("--end-date", help="ISO date, as the endpoint's end_date")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    custom_start = datetime.fromisoformat(args.start_date) if args.start_date else None
+    custom_end = datetime.fromisoformat(args.end_date) if args.end_date else None
+
+    db = SessionLocal()
+    total_requests = db.query(Request).count()
+    db.close()
+    print(f"📊 {total_requests} requests, period={args.period}, {args.repeat} runs each\n")
+
+    results = {}
+    for name, build in (
+        ("per-section", lambda db: per_section_dashboard(db, args.period, custom_start, custom_end)),
+        ("assembler", lambda db: assemble_visual_dashboard(db, args.period, custom_start, custom_end)),
+    ):
+        results[name] = measure(build, args.repeat)
+
+    print(f"{'variant':<14}{'queries':>10}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for name, (_, queries, timings) in results.items():
+        print(f"{name:<14}{queries:>10}{statistics.median(timings):>12.1f}"
+              f"{min(timings):>10.1f}{max(timings):>10.1f}")
+
+    before, after = results["per-section"][0], results["assembler"][0]
+    mismatched = [
+        key for key in before
+        if not same(as_comparable(before[key]), as_comparable(after.get(key)))
+    ]
+    if mismatched:
+        print(f"\n⚠️ Sections that differ: {', '.join(mismatched)}")
+    else:
+        print("\n✅ Payloads match")
+
+
+if __name__ == "__main__":
+    main()
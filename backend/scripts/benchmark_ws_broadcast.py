@@ -0,0 +1,117 @@
+"""
+WebSocket broadcast benchmark.
+
+Connects thousands of simulated clients to a ConnectionManager in this
+process (no network: each client's send takes a small random delay, a few
+"slow" clients take much longer) and measures how long a broadcast takes to
+reach every healthy client.
+
+    python scripts/benchmark_ws_broadcast.py --clients 5000 --slow 50
+
+--sequential measures the old loop instead (await every send in turn), for
+comparison: there a single slow client delays everyone queued behind it.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.websocket.manager import ConnectionManager
+
+
+class SimulatedClient:
+    """Stands in for a starlette WebSocket; records when each message arrived"""
+
+    def __init__(self, send_delay: float):
+        self.send_delay = send_delay
+        self.received = {}
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, text: str):
+        await asyncio.sleep(self.send_delay * random.uniform(0.5, 1.5))
+        self.received[text] = time.perf_counter()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def sequential_broadcast(clients, text):
+    """The previous ConnectionManager.broadcast: one send at a time"""
+    for client in clients:
+        await client.send_text(text)
+
+
+async def run(args):
+    manager = ConnectionManager()
+    fast = [SimulatedClient(args.send_ms / 1000) for _ in range(args.clients - args.slow)]
+    slow = [SimulatedClient(args.slow_send_ms / 1000) for _ in range(args.slow)]
+    clients = fast + slow
+    random.shuffle(clients)
+    for i, client in enumerate(clients):
+        await manager.connect(client, str(i))
+
+    latencies = []  # per broadcast: time until every healthy client had it
+    call_ms = []
+    for n in range(args.broadcasts):
+        text = f'{{"type": "benchmark", "n": {n}}}'
+        started = time.perf_counter()
+        if args.sequential:
+            task = asyncio.create_task(sequential_broadcast(clients, text))
+            # Cap the wait: a sequential pass behind slow clients takes minutes
+            await asyncio.wait([task], timeout=args.timeout)
+            task.cancel()
+        else:
+            await manager.broadcast({"type": "benchmark", "n": n})
+        call_ms.append((time.perf_counter() - started) * 1000)
+
+        deadline = started + args.timeout
+        while time.perf_counter() < deadline and not all(text in c.received for c in fast):
+            await asyncio.sleep(0.001)
+        arrived = [c.received[text] for c in fast if text in c.received]
+        missing = len(fast) - len(arrived)
+        latencies.append(((max(arrived) - started) * 1000 if arrived else float("inf"), missing))
+        await asyncio.sleep(args.interval_ms / 1000)
+
+    mode = "sequential" if args.sequential else "queued"
+    totals = [latency for latency, _ in latencies]
+    print(f"{mode}: {args.clients} clients ({args.slow} slow), {args.broadcasts} broadcasts")
+    print(f"  broadcast call      p50 {statistics.median(call_ms):8.1f} ms   max {max(call_ms):8.1f} ms")
+    print(
+        f"  all healthy clients p50 {percentile(totals, 50):8.1f} ms   "
+        f"p99 {percentile(totals, 99):8.1f} ms   max {max(totals):8.1f} ms"
+    )
+    print(f"  healthy clients still waiting at timeout: {sum(missing for _, missing in latencies)}")
+    if not args.sequential:
+        print(f"  manager: {manager.stats()}")
+        for conns in list(manager.active_connections.values()):
+            for connection in conns:
+                connection.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--slow", type=int, default=50, help="clients that take --slow-send-ms per message")
+    parser.add_argument("--send-ms", type=float, default=1.0, help="average send time of a healthy client")
+    parser.add_argument("--slow-send-ms", type=float, default=500.0)
+    parser.add_argument("--broadcasts", type=int, default=20)
+    parser.add_argument("--interval-ms", type=float, default=50.0)
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for one broadcast")
+    parser.add_argument("--sequential", action="store_true", help="measure the old one-at-a-time loop")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.kpi_calculator import (
+    calculate_customer_satisfaction_score,
+    calculate_service_request_fulfillment_rate,
+    calculate_sla_compliance_rate,
+)
+from app.models import (
+    User, UserRole, Request, RequestStatus, Priority, ResourceType, Division, DivisionType
+)
+from app.services import daily_stats
+from app.services.dashboard_assembler import assemble_visual_dashboard
+from app.services.sla_outcomes import record_sla_outcomes
+from app.services.trend_calculator import (
+    calculate_request_volume_trend,
+    calculate_requests_by_priority,
+    calculate_satisfaction_trend,
+    calculate_service_efficiency_trend,
+    calculate_sla_compliance_trend,
+)
+
+# Whole days, so the rollup (by day) and the raw requests cover the same rows
+END = datetime(2026, 9, 30, 23, 59, 59)
+START = datetime(2026, 4, 1)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """In-memory database with 300 requests spread over 200 days in two divisions"""
+    monkeypatch.setattr(daily_stats, "_rollup_ready", False)
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    divisions = [Division(name=f"Division {i}", type=DivisionType.SUPPORT) for i in range(2)]
+    session.add_all(divisions)
+    session.flush()
+    user = User(username="staff", full_name="Staff", hashed_password="x", role=UserRole.SUB_DEPARTMENT_STAFF)
+    session.add(user)
+    session.flush()
+
+    rnd = random.Random(7)
+    for i in range(300):
+        created = END - timedelta(hours=rnd.randint(1, 24 * 200))
+        status = rnd.choice(list(RequestStatus))
+        request = Request(
+            request_id=f"REQ-TST-{i:04d}",
+            request_type="ICT",
+            resource_type=ResourceType.ICT,
+            requester_id=user.id,
+            requester_division_id=divisions[i % 2].id,
+            assigned_division_id=divisions[(i + 1) % 2].id,
+            priority=rnd.choice(list(Priority)),
+            status=status,
+            description="Assembler test",
+            sla_completion_time_hours=48,
+            created_at=created,
+        )
+        if status == RequestStatus.COMPLETED:
+            request.completed_at = request.actual_completion_time = created + timedelta(hours=rnd.randint(4, 96))
+            request.sla_completion_deadline = created + timedelta(hours=48)
+            request.satisfaction_rating = rnd.randint(1, 5)
+        record_sla_outcomes(request)
+        session.add(request)
+    session.commit()
+    yield session
+    session.close()
+
+
+def expected_charts(db, period):
+    args = (db, period, START, END)
+    return {
+        "request_volume": calculate_request_volume_trend(*args),
+        "sla_compliance": calculate_sla_compliance_trend(*args),
+        "requests_by_priority": calculate_requests_by_priority(*args),
+        "service_efficiency": calculate_service_efficiency_trend(*args),
+        "satisfaction_trend": calculate_satisfaction_trend(*args),
+    }
+
+
+@pytest.mark.parametrize("period", ["daily", "weekly", "monthly", "yearly"])
+def test_matches_the_individual_calculators_with_and_without_the_rollup(db, period):
+    raw = assemble_visual_dashboard(db, period, START, END)
+    for section, expected in expected_charts(db, period).items():
+        assert raw[section] == expected, section
+
+    summary = raw["summary_kpis"]
+    assert summary["sla_compliance"] == calculate_sla_compliance_rate(db, start_date=START, end_date=END)
+    assert summary["fulfillment_rate"] == calculate_service_request_fulfillment_rate(db, start_date=START, end_date=END)
+    assert summary["satisfaction"] == calculate_customer_satisfaction_score(db, start_date=START, end_date=END)
+    in_window = db.query(Request).filter(Request.created_at.between(START, END)).count()
+    assert sum(raw["status_distribution"]["data"]) == sum(raw["requests_by_division"]["data"]) == in_window
+
+    daily_stats.rebuild_daily_stats(db)
+    rolled_up = assemble_visual_dashboard(db, period, START, END)
+    raw.pop("generated_at"), rolled_up.pop("generated_at")
+    assert rolled_up == raw
+
+
+def test_loads_no_request_rows(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assemble_visual_dashboard(db, "monthly")  # default windows, open-ended summary
+
+    request_reads = [s for s in statements if "FROM requests" in s]
+    assert len(request_reads) == 3
+    # Every read of the requests table is an aggregate
+    assert all("GROUP BY" in s or "count(" in s for s in request_reads)
@@ -0,0 +1,243 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import datetime
+import socket
+import ssl
+import tempfile
+import time
+
+import pytest
+
+# Local SMTP server for the sender to talk to (pip install aiosmtpd)
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base
+from app.models import OutboundEmail, OutboundEmailStatus, SystemSettings
+from app.services import email_queue
+from app.services.email_queue import EmailSender, enqueue_email, queue_depth
+
+
+def tls_context(directory):
+    """Server TLS context with a throwaway self-signed certificate"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Mailbox:
+    """aiosmtpd handler: keeps delivered messages, rejects some on request"""
+
+    def __init__(self):
+        self.messages = []
+        self.logins = 0
+        self.reject_data = []  # replies for the next DATA commands
+        self.bad_recipients = set()
+
+    def authenticate(self, server, session, envelope, mechanism, auth_data):
+        self.logins += 1
+        return AuthResult(success=auth_data.password == b"secret")
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.bad_recipients:
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.reject_data:
+            return self.reject_data.pop(0)
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture
+def smtp_server():
+    mailbox = Mailbox()
+    with tempfile.TemporaryDirectory() as directory:
+        controller = Controller(
+            mailbox,
+            hostname="127.0.0.1",
+            port=free_port(),
+            tls_context=tls_context(directory),
+            require_starttls=True,
+            authenticator=mailbox.authenticate,
+            auth_required=True,
+        )
+        controller.start()
+        try:
+            yield controller, mailbox
+        finally:
+            controller.stop()
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path, smtp_server):
+    """Database whose SMTP settings point at the local server"""
+    controller, _ = smtp_server
+    # A file, not :memory:, so the sender thread has its own connection
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'email.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(email_queue, "SessionLocal", Session)
+    monkeypatch.setattr(settings, "email_smtp_connections", 2)
+    monkeypatch.setattr(settings, "email_batch_size", 50)
+    monkeypatch.setattr(settings, "email_poll_seconds", 0.05)
+
+    session = Session()
+    for key, value in {
+        "smtp_host": "127.0.0.1",
+        "smtp_port": str(controller.port),
+        "smtp_email": "sla@example.com",
+        "smtp_password": "secret",
+    }.items():
+        session.add(SystemSettings(setting_key=key, setting_value=value))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def enqueue(db, count, recipient="head@example.com"):
+    return [
+        enqueue_email(db, [recipient], f"Request {i}", f"<p>Request {i}</p>").id
+        for i in range(count)
+    ]
+
+
+def statuses(db, ids):
+    db.expire_all()
+    return [db.get(OutboundEmail, email_id).status for email_id in ids]
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_sender_reuses_pooled_sessions(db, smtp_server):
+    _, mailbox = smtp_server
+    sender = EmailSender()
+    sender.start()
+    try:
+        enqueue(db, 30)
+        wait_until(lambda: len(mailbox.messages) == 30)
+        # Later mail goes over the sessions that are already logged in
+        enqueue(db, 10)
+        wait_until(lambda: len(mailbox.messages) == 40)
+        wait_until(lambda: queue_depth(db)["by_status"]["SENT"] == 40)
+    finally:
+        sender.stop()
+
+    assert 1 <= mailbox.logins <= settings.email_smtp_connections
+    assert queue_depth(db)["waiting"] == 0
+    stats = sender.stats()
+    assert stats["sent"] == 40
+    assert stats["send_ms"]["count"] == 40
+    assert stats["open_sessions"] == 0
+
+
+def test_transient_failure_is_retried_with_backoff(db, smtp_server):
+    _, mailbox = smtp_server
+    mailbox.reject_data = ["451 Try again later"]
+    sender = EmailSender()
+    try:
+        (email_id,) = enqueue(db, 1)
+        assert sender.drain_once() == 1
+        email = db.get(OutboundEmail, email_id)
+        db.refresh(email)
+        assert email.status == OutboundEmailStatus.PENDING
+        assert email.attempts == 1
+        assert "451" in email.last_error
+        # Not due yet
+        assert sender.drain_once() == 0
+
+        email.next_attempt_at = datetime.datetime.now(datetime.timezone.utc)
+        db.commit()
+        assert sender.drain_once() == 1
+        assert statuses(db, [email_id]) == [OutboundEmailStatus.SENT]
+        assert len(mailbox.messages) == 1
+        assert sender.stats()["retried"] == 1
+    finally:
+        sender.stop()
+
+
+def test_permanent_rejection_fails_without_retry(db, smtp_server):
+    _, mailbox = smtp_server
+    mailbox.bad_recipients.add("nobody@example.com")
+    sender = EmailSender()
+    try:
+        bad = enqueue(db, 1, recipient="nobody@example.com")
+        good = enqueue(db, 2)
+        assert sender.drain_once() == 3
+        assert statuses(db, bad) == [OutboundEmailStatus.FAILED]
+        assert statuses(db, good) == [OutboundEmailStatus.SENT] * 2
+        assert len(mailbox.messages) == 2
+    finally:
+        sender.stop()
+
+
+def test_unreachable_server_backs_off_whole_batch(db, smtp_server):
+    controller, mailbox = smtp_server
+    setting = db.query(SystemSettings).filter(SystemSettings.setting_key == "smtp_port").one()
+    setting.setting_value = str(free_port())
+    db.commit()
+    sender = EmailSender()
+    try:
+        ids = enqueue(db, 4)
+        assert sender.drain_once() == 4
+        assert statuses(db, ids) == [OutboundEmailStatus.PENDING] * 4
+        assert sender.drain_once() == 0
+        assert sender.stats()["open_sessions"] == 0
+    finally:
+        sender.stop()
+
+
+def test_retry_delay_doubles_up_to_cap(monkeypatch):
+    monkeypatch.setattr(settings, "email_retry_base_seconds", 30)
+    assert 24 <= email_queue.retry_delay(1) <= 36
+    assert 48 <= email_queue.retry_delay(2) <= 72
+    assert email_queue.retry_delay(20) <= email_queue.MAX_RETRY_DELAY_SECONDS * 1.2
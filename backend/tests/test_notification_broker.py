@@ -0,0 +1,99 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+
+from app.config import settings
+from app.websocket.broker import InProcessBroker, NotificationBroker, probe_backends
+from app.websocket.manager import manager
+
+
+class FakeSocket:
+    def __init__(self):
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, text: str):
+        self.received.append(text)
+
+
+class BrokenBroker(NotificationBroker):
+    """A remote broker whose server is down"""
+
+    name = "broken"
+
+    async def _publish(self, channel, text):
+        raise ConnectionError("connection refused")
+
+
+def deliver_with(broker, scenario):
+    async def run():
+        alice, bob = FakeSocket(), FakeSocket()
+        await manager.connect(alice, "1")
+        await manager.connect(bob, "2")
+        try:
+            await scenario(broker)
+            await asyncio.sleep(0.01)  # let the writer tasks send
+        finally:
+            manager.disconnect(alice, "1")
+            manager.disconnect(bob, "2")
+        return alice, bob
+    return asyncio.run(run())
+
+
+def test_inprocess_broker_delivers_without_a_hop():
+    broker = InProcessBroker()
+
+    async def scenario(broker):
+        await broker.send_to_user("1", {"type": "request_created"})
+        await broker.broadcast({"type": "announcement"})
+
+    alice, bob = deliver_with(broker, scenario)
+    assert alice.received == ['{"type": "request_created", "user_id": "1"}', '{"type": "announcement"}']
+    assert bob.received == ['{"type": "announcement"}']
+    health = broker.health()
+    assert health["published"] == 2 and health["errors"] == 0
+    assert health["publish_ms"]["count"] == 2
+
+
+def test_failed_publish_is_reported_and_delivered_locally():
+    broker = BrokenBroker()
+
+    async def scenario(broker):
+        await broker.send_to_user("1", {"type": "request_created"})
+
+    alice, bob = deliver_with(broker, scenario)
+    assert alice.received == ['{"type": "request_created", "user_id": "1"}']
+    assert bob.received == []
+    health = broker.health()
+    assert health["published"] == 0 and health["errors"] == 1
+    assert "connection refused" in health["last_error"]
+
+
+def test_probe_reports_every_backend():
+    results = asyncio.run(probe_backends())
+    assert results["inprocess"]["ok"]
+    assert set(results) == {"inprocess", "redis", "postgres"}
+    # The test database is SQLite
+    assert not results["postgres"]["ok"]
+
+
+def test_inprocess_broker_warns_when_several_workers_run(monkeypatch, capsys):
+    monkeypatch.setattr(settings, "web_concurrency", 1)
+    single = InProcessBroker()
+    asyncio.run(single.start())
+    assert single.health()["warning"] is None
+
+    monkeypatch.setattr(settings, "web_concurrency", 4)
+    several = InProcessBroker()
+    asyncio.run(several.start())
+    assert "WEB_CONCURRENCY=4" in several.health()["warning"]
+    assert "NOTIFICATION_BROKER=inprocess" in capsys.readouterr().out
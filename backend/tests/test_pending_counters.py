@@ -0,0 +1,176 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import json
+
+import anyio.to_thread
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import (
+    User, UserRole, Request, RequestStatus, Priority, ResourceType,
+    Division, DivisionType, Department, SubDepartment
+)
+from app.services import pending_counters
+from app.services.pending_counters import (
+    count_new_request, pending_counts, push_pending_counts, rebuild_pending_counters, track_pending_counts
+)
+from app.websocket.manager import manager
+
+
+class FakeSocket:
+    def __init__(self):
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, text: str):
+        self.received.append(json.loads(text))
+
+
+@pytest.fixture
+def org(monkeypatch):
+    """In-memory database with one division > department > sub-department and a user per role"""
+    monkeypatch.setattr(pending_counters, "_counters_ready", False)
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    division = Division(name="Division", type=DivisionType.SUPPORT)
+    db.add(division)
+    db.flush()
+    department = Department(name="Department", division_id=division.id)
+    db.add(department)
+    db.flush()
+    subdepartment = SubDepartment(name="Sub", department_id=department.id)
+    db.add(subdepartment)
+    db.flush()
+
+    users = {
+        "admin": User(username="admin", full_name="Admin", hashed_password="x", role=UserRole.ADMIN),
+        "manager": User(username="manager", full_name="Manager", hashed_password="x",
+                        role=UserRole.DIVISION_MANAGER, division_id=division.id),
+        "head": User(username="head", full_name="Head", hashed_password="x",
+                     role=UserRole.DEPARTMENT_HEAD, division_id=division.id, department_id=department.id),
+        "staff": User(username="staff", full_name="Staff", hashed_password="x",
+                      role=UserRole.SUB_DEPARTMENT_STAFF, division_id=division.id,
+                      department_id=department.id, subdepartment_id=subdepartment.id),
+    }
+    db.add_all(users.values())
+    db.commit()
+    yield db, users, {"division": division.id, "department": department.id, "subdepartment": subdepartment.id}
+    db.close()
+
+
+def create_request(db, users, n, division_id, department_id=None, subdepartment_id=None, assignee=None):
+    request = Request(
+        request_id=f"REQ-TST-{n:04d}",
+        request_type="ICT",
+        resource_type=ResourceType.ICT,
+        requester_id=users["admin"].id,
+        requester_division_id=division_id,
+        assigned_division_id=division_id,
+        assigned_department_id=department_id,
+        assigned_subdepartment_id=subdepartment_id,
+        assigned_to_user_id=assignee.id if assignee else None,
+        priority=Priority.MEDIUM,
+        status=RequestStatus.PENDING,
+        description="Pending counter test",
+    )
+    db.add(request)
+    db.flush()
+    count_new_request(db, request)
+    db.commit()
+    return request
+
+
+def transition(db, request, status):
+    with track_pending_counts(db, request):
+        request.status = status
+    db.commit()
+
+
+def badges(db, users):
+    return {name: pending_counts(db, user) for name, user in users.items()}
+
+
+def test_counters_match_counting_requests(org):
+    db, users, units = org
+    rebuild_pending_counters(db)  # empty, but marks the counters ready
+
+    to_division = create_request(db, users, 1, units["division"])
+    to_department = create_request(db, users, 2, units["division"], units["department"])
+    to_sub = create_request(db, users, 3, units["division"], units["department"], units["subdepartment"],
+                            assignee=users["staff"])
+    create_request(db, users, 4, units["division"], units["department"], units["subdepartment"])
+
+    transition(db, to_division, RequestStatus.IN_PROGRESS)  # still open
+    transition(db, to_department, RequestStatus.COMPLETED)
+    transition(db, to_sub, RequestStatus.REJECTED)
+
+    counted = badges(db, users)
+    assert counted == {
+        "admin": {"count": 2, "assigned_to_me": 0},
+        "manager": {"count": 1, "assigned_to_me": 0},
+        "head": {"count": 0, "assigned_to_me": 0},
+        "staff": {"count": 1, "assigned_to_me": 0},
+    }
+
+    # Same answers from COUNT queries over the requests before any backfill...
+    pending_counters._counters_ready = False
+    db.query(pending_counters.PendingCounter).delete()
+    db.query(pending_counters.SystemSettings).delete()
+    db.commit()
+    assert badges(db, users) == counted
+
+    # ...and from the rebuilt counters
+    rebuild_pending_counters(db)
+    assert badges(db, users) == counted
+
+
+def test_changes_are_pushed_to_affected_users(org):
+    db, users, units = org
+    rebuild_pending_counters(db)
+    sockets = {name: FakeSocket() for name in users}
+
+    def create_and_acknowledge():
+        request = create_request(db, users, 1, units["division"], units["department"], units["subdepartment"],
+                                 assignee=users["staff"])
+        push_pending_counts(db)
+        transition(db, request, RequestStatus.COMPLETED)
+        push_pending_counts(db)
+
+    async def scenario():
+        for name, socket in sockets.items():
+            await manager.connect(socket, str(users[name].id))
+        try:
+            await anyio.to_thread.run_sync(create_and_acknowledge)
+            await asyncio.sleep(0.01)  # let the writer tasks send
+        finally:
+            for name, socket in sockets.items():
+                manager.disconnect(socket, str(users[name].id))
+
+    asyncio.run(scenario())
+
+    staff_id = str(users["staff"].id)
+    assert sockets["staff"].received == [
+        {"type": "pending_counts", "count": 1, "assigned_to_me": 1, "user_id": staff_id},
+        {"type": "pending_counts", "count": 0, "assigned_to_me": 0, "user_id": staff_id},
+    ]
+    assert [message["count"] for message in sockets["admin"].received] == [1, 0]
+    # Not assigned to their division or department directly
+    assert sockets["manager"].received == []
+    assert sockets["head"].received == []
@@ -0,0 +1,75 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import User, UserRole
+from app.services.principal_cache import PrincipalCache
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(username="head", full_name="Head", hashed_password="x",
+                     role=UserRole.DEPARTMENT_HEAD, division_id=1, department_id=2))
+    session.commit()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session.info["statements"] = statements
+    yield session
+    session.close()
+
+
+def deactivate(db, username):
+    db.query(User).filter(User.username == username).update({"is_active": False})
+    db.commit()
+
+
+def test_hits_need_no_query_until_invalidated(db):
+    cache = PrincipalCache(ttl_seconds=60)
+    statements = db.info["statements"]
+
+    principal = cache.get(db, "head")
+    assert (principal.role, principal.division_id, principal.department_id) == (UserRole.DEPARTMENT_HEAD, 1, 2)
+    assert principal.is_active
+    statements.clear()
+    assert cache.get(db, "head") == principal
+    assert statements == []
+
+    deactivate(db, "head")
+    assert cache.get(db, "head").is_active  # still cached
+    cache.invalidate("head")
+    assert not cache.get(db, "head").is_active
+
+    assert cache.get(db, "nobody") is None
+
+
+def test_entries_expire(db):
+    cache = PrincipalCache(ttl_seconds=0)
+    assert cache.get(db, "head").is_active
+    deactivate(db, "head")
+    assert not cache.get(db, "head").is_active
+
+
+def test_lookup_racing_an_invalidation_is_not_stored(db):
+    cache = PrincipalCache(ttl_seconds=60)
+
+    # The admin's update commits and invalidates while this lookup reads the old row
+    @event.listens_for(db.get_bind(), "after_cursor_execute", once=True)
+    def invalidate_meanwhile(*args):
+        cache.invalidate("head")
+
+    assert cache.get(db, "head").is_active
+    deactivate(db, "head")
+    assert not cache.get(db, "head").is_active
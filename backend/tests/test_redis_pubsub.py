@@ -0,0 +1,104 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+
+import pytest
+
+# In-process stand-in for Redis (pip install fakeredis)
+pytest.importorskip("fakeredis")
+
+from app.websocket.broker import BROADCAST_CHANNEL, user_channel
+from app.websocket.manager import manager
+from app.websocket.redis_pubsub import RedisBroker
+
+
+class FakeSocket:
+    def __init__(self):
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, text: str):
+        self.received.append(text)
+
+
+async def eventually(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def subscribed_channels(broker):
+    return set(await broker.redis.pubsub_channels())
+
+
+async def wait_for_channels(broker, expected, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while await subscribed_channels(broker) != expected:
+        assert asyncio.get_running_loop().time() < deadline, await subscribed_channels(broker)
+        await asyncio.sleep(0.01)
+
+
+def run(scenario):
+    async def with_broker():
+        broker = RedisBroker("fakeredis://")
+        await broker.start()
+        try:
+            await scenario(broker)
+        finally:
+            for user_id, conns in list(manager.active_connections.items()):
+                for connection in list(conns):
+                    manager.disconnect(connection.websocket, user_id)
+            await broker.stop()
+    asyncio.run(with_broker())
+
+
+def test_worker_subscribes_only_to_connected_users():
+    async def scenario(broker):
+        alice, bob = FakeSocket(), FakeSocket()
+        await manager.connect(alice, "1")
+        await manager.connect(bob, "2")
+        await wait_for_channels(broker, {BROADCAST_CHANNEL, user_channel("1"), user_channel("2")})
+
+        await broker.send_to_user("1", {"type": "request_created"})
+        await broker.send_to_user("3", {"type": "request_created"})
+        await eventually(lambda: alice.received)
+        assert alice.received == ['{"type": "request_created", "user_id": "1"}']
+        assert bob.received == []
+
+        # Nobody on this worker listens for user 3
+        assert await broker.redis.publish(user_channel("3"), "{}") == 0
+
+        manager.disconnect(bob, "2")
+        await wait_for_channels(broker, {BROADCAST_CHANNEL, user_channel("1")})
+        assert broker.health()["published"] == 2
+
+    run(scenario)
+
+
+def test_broadcast_reaches_every_socket():
+    async def scenario(broker):
+        sockets = [FakeSocket() for _ in range(3)]
+        for i, socket in enumerate(sockets):
+            await manager.connect(socket, str(i))
+        await wait_for_channels(broker, {BROADCAST_CHANNEL} | {user_channel(str(i)) for i in range(3)})
+
+        await broker.broadcast({"type": "announcement"})
+        await eventually(lambda: all(socket.received for socket in sockets))
+        assert all(socket.received == ['{"type": "announcement"}'] for socket in sockets)
+
+    run(scenario)
+
+
+def test_probe_times_a_round_trip():
+    result = asyncio.run(RedisBroker.probe("fakeredis://"))
+    assert result["ok"] and result["round_trip_ms"] >= 0
@@ -0,0 +1,97 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import csv
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import (
+    User, UserRole, Request, RequestActivityLog, RequestActivityAction, RequestItem,
+    RequestStatus, Priority, ResourceType, Division, DivisionType
+)
+from app.services import reporting_service
+from app.services.reporting_service import stream_request_export
+
+END = datetime(2026, 9, 30)
+START = END - timedelta(days=30)
+
+
+@pytest.fixture
+def users(monkeypatch):
+    """Two divisions with one request (and item and activity log) each"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    monkeypatch.setattr(reporting_service, "SessionLocal", SessionLocal)
+    session = SessionLocal()
+
+    divisions = [Division(name=f"Division {i}", type=DivisionType.SUPPORT) for i in range(2)]
+    session.add_all(divisions)
+    session.flush()
+    admin = User(username="admin", full_name="Admin", hashed_password="x", role=UserRole.ADMIN)
+    manager = User(username="manager", full_name="Manager", hashed_password="x",
+                   role=UserRole.DIVISION_MANAGER, division_id=divisions[0].id)
+    session.add_all([admin, manager])
+    session.flush()
+
+    for i, division in enumerate(divisions):
+        request = Request(
+            request_id=f"REQ-TST-{i:04d}",
+            request_type="ICT",
+            resource_type=ResourceType.ICT,
+            requester_id=admin.id,
+            requester_division_id=division.id,
+            assigned_division_id=division.id,
+            priority=Priority.LOW,
+            status=RequestStatus.PENDING,
+            description="Export test",
+            created_at=END - timedelta(days=1),
+        )
+        session.add(request)
+        session.flush()
+        session.add(RequestItem(request_id=request.id, item_description=f"Item {i}", quantity=1))
+        session.add(RequestActivityLog(
+            request_id=request.id, action=RequestActivityAction.SENT, performed_by_user_id=admin.id,
+            performed_by_division_id=division.id, details="Sent", created_at=END - timedelta(days=1),
+        ))
+    session.commit()
+    yield admin, manager
+    session.close()
+
+
+def xlsx_sheets(user):
+    workbook = load_workbook(io.BytesIO(b"".join(stream_request_export(START, END, user, "xlsx"))))
+    return {sheet.title: [row for row in sheet.iter_rows(min_row=2, values_only=True)] for sheet in workbook}
+
+
+def test_admin_export_has_every_request_and_the_activity_log(users):
+    admin, _ = users
+    sheets = xlsx_sheets(admin)
+
+    assert list(sheets) == ["Requests", "Items", "Activity"]
+    assert sorted(row[0] for row in sheets["Requests"]) == ["REQ-TST-0000", "REQ-TST-0001"]
+    assert len(sheets["Items"]) == len(sheets["Activity"]) == 2
+
+
+def test_export_is_limited_to_what_the_user_may_see(users):
+    _, manager = users
+    sheets = xlsx_sheets(manager)
+
+    assert list(sheets) == ["Requests", "Items"]
+    assert [row[0] for row in sheets["Requests"]] == ["REQ-TST-0000"]
+    assert [row[:2] for row in sheets["Items"]] == [("REQ-TST-0000", "Item 0")]
+
+    rows = list(csv.reader(io.StringIO(b"".join(stream_request_export(START, END, manager)).decode())))
+    assert [row[0] for row in rows[1:]] == ["REQ-TST-0000"]
@@ -0,0 +1,102 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import (
+    User, UserRole, Request, RequestIdSequence, RequestStatus, Priority, ResourceType, Division, DivisionType
+)
+from app.services import request_ids
+from app.services.request_ids import allocate_request_id, request_id_prefix
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    division = Division(name="Division", type=DivisionType.SUPPORT)
+    session.add(division)
+    session.flush()
+    user = User(username="staff", full_name="Staff", hashed_password="x", role=UserRole.SUB_DEPARTMENT_STAFF)
+    session.add(user)
+    session.commit()
+    session.info["ids"] = (user.id, division.id)
+    yield session
+    session.close()
+
+
+def add_request(db, request_id):
+    user_id, division_id = db.info["ids"]
+    db.add(Request(
+        request_id=request_id,
+        request_type="ICT",
+        resource_type=ResourceType.ICT,
+        requester_id=user_id,
+        requester_division_id=division_id,
+        assigned_division_id=division_id,
+        priority=Priority.LOW,
+        status=RequestStatus.PENDING,
+        description="Request number test",
+    ))
+    db.commit()
+
+
+def test_counter_is_seeded_from_numbers_issued_before_it(db):
+    prefix = request_id_prefix("ICT")
+    add_request(db, f"{prefix}005")
+    add_request(db, f"{prefix}012")
+    add_request(db, f"{prefix}manual")
+    add_request(db, f"{request_id_prefix('FINANCE')}099")  # another prefix
+
+    assert allocate_request_id(db, "ict") == f"{prefix}013"
+    assert allocate_request_id(db, "FINANCE") == f"{request_id_prefix('FINANCE')}100"
+
+
+def test_allocations_on_one_prefix_are_consecutive(db):
+    prefix = request_id_prefix("ICT")
+    first = allocate_request_id(db, "ICT")
+    add_request(db, first)
+    second = allocate_request_id(db, "ICT")
+    add_request(db, second)
+
+    assert (first, second) == (f"{prefix}001", f"{prefix}002")
+    assert db.get(RequestIdSequence, prefix).last_value == 2
+
+
+def test_rolled_back_allocation_is_reused(db):
+    prefix = request_id_prefix("ICT")
+    add_request(db, allocate_request_id(db, "ICT"))
+    allocate_request_id(db, "ICT")
+    db.rollback()
+
+    assert allocate_request_id(db, "ICT") == f"{prefix}002"
+
+
+def test_portable_path_bumps_when_another_worker_inserted_first(db, engine, monkeypatch):
+    # As on a database without upserts or UPDATE ... RETURNING
+    monkeypatch.setattr(engine.dialect, "update_returning", False)
+    prefix = request_id_prefix("ICT")
+
+    assert request_ids._insert_or_bump_counter(db, prefix, 1) == 1
+    # The row exists now, as if created by a concurrent worker
+    assert request_ids._insert_or_bump_counter(db, prefix, 1) == 2
+    assert request_ids.next_request_sequence(db, prefix) == 3
+
+    # The duplicate insert only rolled back its savepoint
+    add_request(db, f"{prefix}003")
+    assert db.get(RequestIdSequence, prefix).last_value == 3
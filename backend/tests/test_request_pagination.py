@@ -0,0 +1,155 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import User, UserRole, Request, RequestStatus, Priority, ResourceType, Division, DivisionType
+from app.services.pagination import (
+    BY_CREATED_AT, BY_SUBMITTED_AT, NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER,
+    RequestListParams, apply_request_filters, paginate_requests
+)
+
+
+@pytest.fixture
+def db():
+    """In-memory database with 7 requests, several sharing a created_at"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    division = Division(name="Division", type=DivisionType.SUPPORT)
+    session.add(division)
+    session.flush()
+    user = User(username="staff", full_name="Staff", hashed_password="x", role=UserRole.SUB_DEPARTMENT_STAFF)
+    session.add(user)
+    session.flush()
+
+    base = datetime(2026, 3, 1, 9, 30)
+    # Three requests at the same instant straddle the page boundaries below
+    created = [base, base + timedelta(hours=1), base + timedelta(hours=1), base + timedelta(hours=1),
+               base + timedelta(hours=2), base + timedelta(hours=3), base + timedelta(hours=3)]
+    for i, created_at in enumerate(created):
+        session.add(Request(
+            request_id=f"REQ-TST-{i:04d}",
+            request_type="ICT",
+            resource_type=ResourceType.ICT,
+            requester_id=user.id,
+            requester_division_id=division.id,
+            assigned_division_id=division.id,
+            priority=Priority.HIGH if i % 2 else Priority.LOW,
+            status=RequestStatus.PENDING,
+            description="Pagination test",
+            created_at=created_at,
+        ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def page(db, sort=BY_CREATED_AT, **params):
+    response = Response()
+    params = RequestListParams(**params)
+    rows = paginate_requests(apply_request_filters(db.query(Request), params), params, response, sort=sort)
+    return rows, response.headers
+
+
+def walk(db, sort=BY_CREATED_AT):
+    """Ids of every page of two, and the number of pages"""
+    seen, cursor, pages = [], None, 0
+    while pages < 20:
+        rows, headers = page(db, sort, limit=2, cursor=cursor)
+        seen += [r.id for r in rows]
+        pages += 1
+        cursor = headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    return seen, pages
+
+
+def newest_first(db):
+    return [r.id for r in db.query(Request).order_by(Request.created_at.desc(), Request.id.desc())]
+
+
+def test_cursor_walks_every_row_once_across_equal_timestamps(db):
+    assert walk(db) == (newest_first(db), 4)
+
+
+def test_cursor_walks_rows_stored_without_microseconds(db):
+    # CURRENT_TIMESTAMP (the server default) stores '2026-03-01 10:30:00', the
+    # ORM '2026-03-01 10:30:00.000000'; both are the same instant
+    db.query(Request).delete()
+    template = db.query(User).one(), db.query(Division).one()
+    for i in range(5):
+        db.execute(insert(Request).values(
+            request_id=f"REQ-RAW-{i:04d}",
+            request_type="ICT",
+            resource_type=ResourceType.ICT,
+            requester_id=template[0].id,
+            requester_division_id=template[1].id,
+            assigned_division_id=template[1].id,
+            priority=Priority.LOW,
+            status=RequestStatus.PENDING,
+            description="Server default timestamp",
+        ))
+    db.commit()
+    stamped = db.query(Request).filter(Request.request_id == "REQ-RAW-0002").one()
+    db.add(Request(
+        request_id="REQ-ORM-0000", request_type="ICT", resource_type=ResourceType.ICT,
+        requester_id=template[0].id, requester_division_id=template[1].id,
+        assigned_division_id=template[1].id, priority=Priority.LOW,
+        status=RequestStatus.PENDING, description="ORM timestamp", created_at=stamped.created_at,
+    ))
+    db.commit()
+
+    seen, pages = walk(db)
+    assert sorted(seen) == sorted(r.id for r in db.query(Request))
+    assert len(set(seen)) == len(seen) == 6
+    assert pages == 3
+
+
+def test_submitted_at_order_falls_back_to_created_at(db):
+    requests = db.query(Request).order_by(Request.id).all()
+    # Submitted in reverse order of creation; the last one was never stamped
+    for offset, request in enumerate(requests[:-1]):
+        request.submitted_at = datetime(2026, 4, 1) - timedelta(minutes=offset)
+    db.commit()
+
+    seen, _ = walk(db, BY_SUBMITTED_AT)
+    unstamped = requests[-1].id
+    assert seen == [r.id for r in requests[:-1]] + [unstamped]
+
+
+def test_include_total_counts_the_filtered_rows_not_the_page(db):
+    rows, headers = page(db, limit=2, include_total=True, priority=Priority.HIGH)
+    assert len(rows) == 2
+    assert headers[TOTAL_COUNT_HEADER] == "3"
+
+    rows, headers = page(db)
+    assert len(rows) == 7
+    assert TOTAL_COUNT_HEADER not in headers and NEXT_CURSOR_HEADER not in headers
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor!",
+    base64.urlsafe_b64encode(b"2026-03-01T10:30:00").decode(),  # no id
+    base64.urlsafe_b64encode(b"yesterday|5").decode(),
+    base64.urlsafe_b64encode(b"2026-03-01T10:30:00|five").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe|1").decode(),
+])
+def test_malformed_cursor_is_a_400(db, cursor):
+    with pytest.raises(HTTPException) as error:
+        page(db, limit=2, cursor=cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,64 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models import User, UserRole
+from app.services.access_control import role_scope_key
+from app.services.result_cache import ResultCache
+
+
+def counting(value):
+    """compute() returning value and recording each call"""
+    calls = []
+
+    def compute():
+        calls.append(value)
+        return {"value": value}
+    return compute, calls
+
+
+def test_bump_invalidates_only_dependent_entries():
+    cache = ResultCache(ttl_seconds=60)
+    by_requests, request_calls = counting(1)
+    by_resources, resource_calls = counting(2)
+
+    for _ in range(2):
+        assert cache.get_or_compute("kpis", "admin", {"period": "monthly"}, by_requests,
+                                    depends_on=("requests",)) == {"value": 1}
+        assert cache.get_or_compute("resources", "admin", {}, by_resources,
+                                    depends_on=("resources",)) == {"value": 2}
+    assert (len(request_calls), len(resource_calls)) == (1, 1)
+
+    cache.bump("requests")
+    cache.get_or_compute("kpis", "admin", {"period": "monthly"}, by_requests, depends_on=("requests",))
+    cache.get_or_compute("resources", "admin", {}, by_resources, depends_on=("resources",))
+    assert (len(request_calls), len(resource_calls)) == (2, 1)
+
+    # Entries depending on both generations follow either
+    both, both_calls = counting(3)
+    cache.get_or_compute("dashboard", "admin", {}, both)
+    cache.bump("resources")
+    cache.get_or_compute("dashboard", "admin", {}, both)
+    assert len(both_calls) == 2
+
+
+def test_entries_are_isolated_per_scope():
+    cache = ResultCache(ttl_seconds=60)
+    manager = User(id=1, role=UserRole.DIVISION_MANAGER, division_id=10)
+    same_division = User(id=2, role=UserRole.DIVISION_MANAGER, division_id=10)
+    other_division = User(id=3, role=UserRole.DIVISION_MANAGER, division_id=11)
+    staff = User(id=4, role=UserRole.SUB_DEPARTMENT_STAFF, division_id=10, subdepartment_id=5)
+
+    def lookup(user):
+        scope = role_scope_key(user)
+        return cache.get_or_compute("kpis", scope, {"period": "monthly"}, lambda: {"scope": scope})
+
+    assert lookup(manager) == {"scope": "division:10"}
+    assert lookup(other_division) == {"scope": "division:11"}
+    assert lookup(staff) == {"scope": "staff:4:5"}
+    # Users seeing the same requests share the entry
+    assert lookup(same_division) == {"scope": "division:10"}
+    assert cache.stats()["endpoints"]["kpis"]["hits"] == 1
+    assert cache.stats()["endpoints"]["kpis"]["misses"] == 3
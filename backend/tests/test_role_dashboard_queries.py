@@ -0,0 +1,126 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import (
+    User, UserRole, Request, RequestStatus, Priority, ResourceType,
+    Division, DivisionType, Department, SubDepartment
+)
+from app.routers.role_dashboard import (
+    get_admin_dashboard, get_division_dashboard, get_department_dashboard
+)
+from app.services.org_cache import org_cache
+
+
+def build_org(departments_per_division):
+    """In-memory database with 2 divisions, N departments (and sub-departments) each, and some requests"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    divisions = [Division(name=f"Division {i}", type=DivisionType.SUPPORT) for i in range(2)]
+    db.add_all(divisions)
+    db.flush()
+    departments = []
+    for division in divisions:
+        for i in range(departments_per_division):
+            departments.append(Department(name=f"{division.name} / Dept {i}", division_id=division.id))
+    db.add_all(departments)
+    db.flush()
+    subdepartments = [SubDepartment(name=f"{d.name} / Sub", department_id=d.id) for d in departments]
+    # The department head's department grows too
+    subdepartments += [
+        SubDepartment(name=f"{departments[0].name} / Extra {i}", department_id=departments[0].id)
+        for i in range(departments_per_division)
+    ]
+    db.add_all(subdepartments)
+    db.flush()
+
+    users = {
+        "admin": User(username="admin", full_name="Admin", hashed_password="x", role=UserRole.ADMIN),
+        "manager": User(username="manager", full_name="Manager", hashed_password="x",
+                        role=UserRole.DIVISION_MANAGER, division_id=divisions[0].id),
+        "head": User(username="head", full_name="Head", hashed_password="x",
+                     role=UserRole.DEPARTMENT_HEAD, division_id=divisions[0].id,
+                     department_id=departments[0].id),
+    }
+    db.add_all(users.values())
+    db.flush()
+
+    statuses = [RequestStatus.PENDING, RequestStatus.IN_PROGRESS, RequestStatus.COMPLETED]
+    for i, department in enumerate(departments):
+        db.add(Request(
+            request_id=f"REQ-TST-{i:04d}",
+            request_type="ICT",
+            resource_type=ResourceType.ICT,
+            requester_id=users["admin"].id,
+            requester_division_id=divisions[0].id,
+            assigned_division_id=department.division_id,
+            assigned_department_id=department.id,
+            assigned_subdepartment_id=subdepartments[i].id,
+            priority=Priority.MEDIUM,
+            status=statuses[i % len(statuses)],
+            description="Query count test",
+        ))
+    db.commit()
+    return engine, db, users
+
+
+def count_queries(engine, db, endpoint, user):
+    statements = []
+
+    def record(*_):
+        statements.append(1)
+
+    org_cache.invalidate()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = endpoint(current_user=user, db=db)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return len(statements), result
+
+
+@pytest.mark.parametrize("endpoint,user_key", [
+    (get_admin_dashboard, "admin"),
+    (get_division_dashboard, "manager"),
+    (get_department_dashboard, "head"),
+])
+def test_role_dashboard_query_count_does_not_grow_with_org_size(endpoint, user_key):
+    """Dashboards issue the same number of queries for a small and a large organization"""
+    counts = []
+    for departments_per_division in (2, 25):
+        engine, db, users = build_org(departments_per_division)
+        try:
+            queries, _ = count_queries(engine, db, endpoint, users[user_key])
+            counts.append(queries)
+        finally:
+            db.close()
+            engine.dispose()
+    org_cache.invalidate()
+
+    assert counts[0] == counts[1], f"{endpoint.__name__}: {counts[0]} vs {counts[1]} queries"
+
+
+def test_admin_dashboard_breakdowns_match_request_counts():
+    engine, db, users = build_org(3)
+    try:
+        _, result = count_queries(engine, db, get_admin_dashboard, users["admin"])
+    finally:
+        db.close()
+        engine.dispose()
+        org_cache.invalidate()
+
+    assert result["summary"] == {"total_requests": 6, "pending": 2, "in_progress": 2, "completed": 2}
+    assert [d["total_requests"] for d in result["divisions"]] == [3, 3]
+    assert [d["total_requests"] for d in result["departments"]] == [1] * 6
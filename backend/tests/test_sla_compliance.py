@@ -0,0 +1,118 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.kpi_calculator import calculate_sla_compliance_rate
+from app.models import User, UserRole, Request, RequestStatus, Priority, ResourceType, Division, DivisionType
+from app.routers.dashboard import get_dashboard_stats
+from app.routers.kpis import calculate_scorecard
+from app.services import sla_outcomes
+from app.services.kpi_calculator import calculate_kpi_metrics, calculate_overdue_requests
+from app.services.sla_expressions import completed_with_sla, completed_within_sla
+from app.services.sla_outcomes import backfill_sla_outcomes, compliance_counts, outcomes_ready, record_sla_outcomes
+
+NOW = datetime.utcnow()
+CREATED = NOW - timedelta(days=5)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Three requests with a 48 hour completion SLA"""
+    monkeypatch.setattr(sla_outcomes, "_outcomes_ready", False)
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    division = Division(name="Division", type=DivisionType.SUPPORT)
+    session.add(division)
+    session.flush()
+    user = User(username="staff", full_name="Staff", hashed_password="x", role=UserRole.SUB_DEPARTMENT_STAFF)
+    session.add(user)
+    session.flush()
+
+    def add(request_id, status, completed_after=None, validated_after=None):
+        request = Request(
+            request_id=request_id,
+            request_type="ICT",
+            resource_type=ResourceType.ICT,
+            requester_id=user.id,
+            requester_division_id=division.id,
+            assigned_division_id=division.id,
+            priority=Priority.LOW,
+            status=status,
+            description="Compliance test",
+            sla_completion_time_hours=48,
+            created_at=CREATED,
+        )
+        if completed_after is not None:
+            request.completed_at = request.actual_completion_time = CREATED + completed_after
+        if validated_after is not None:
+            # validate_request_completion moves actual_completion_time, not completed_at
+            request.actual_completion_time = CREATED + validated_after
+        record_sla_outcomes(request)
+        session.add(request)
+
+    add("REQ-ON-TIME", RequestStatus.COMPLETED, completed_after=timedelta(hours=10))
+    add("REQ-LATE-VALIDATION", RequestStatus.COMPLETED,
+        completed_after=timedelta(hours=10), validated_after=timedelta(hours=60))
+    add("REQ-OVERDUE", RequestStatus.IN_PROGRESS)
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_every_compliance_figure_uses_the_same_definition(db):
+    counts = compliance_counts(db.query(Request))
+    assert counts == {"compliant": 1, "non_compliant": 1, "overdue_active": 1}
+
+    assert calculate_sla_compliance_rate(db) == 33.33
+    assert calculate_kpi_metrics(db)["sla_compliance_rate"] == 33.3
+    scorecard = calculate_scorecard(db, CREATED - timedelta(days=1), NOW)
+    assert round(float(scorecard["compliance"]), 2) == 33.33
+    assert calculate_overdue_requests(db) == 1
+
+
+def test_sql_expressions_match_the_stored_outcomes(db):
+    on_time = {
+        request_id: within
+        for request_id, within in db.query(Request.request_id, completed_within_sla).filter(completed_with_sla)
+    }
+    stored = {
+        request_id: met
+        for request_id, met in db.query(Request.request_id, Request.completion_met).filter(
+            Request.completion_met.isnot(None)
+        )
+    }
+    assert on_time == stored == {"REQ-ON-TIME": True, "REQ-LATE-VALIDATION": False}
+
+
+def test_outcomes_are_computed_from_the_timestamps_until_backfilled(db):
+    # As after the migration: the outcome columns of existing requests are NULL
+    db.query(Request).update({
+        "response_met": None, "completion_met": None, "completion_delay_hours": None, "breached_at": None
+    })
+    db.commit()
+    admin = User(id=99, role=UserRole.ADMIN)
+
+    for backfilled in (False, True):
+        assert outcomes_ready(db) is backfilled
+        assert compliance_counts(db.query(Request)) == {"compliant": 1, "non_compliant": 1, "overdue_active": 1}
+        assert calculate_kpi_metrics(db)["sla_compliance_rate"] == 33.3
+        # The dashboard leaves active requests out of its compliance figure
+        assert get_dashboard_stats(db=db, current_user=admin)["sla_compliance"] == 50.0
+
+        assert backfill_sla_outcomes(db) == 3
+
+    assert db.query(Request.completion_met).filter(Request.request_id == "REQ-ON-TIME").scalar() is True
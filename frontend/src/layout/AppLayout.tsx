@@ -23,12 +23,17 @@ export const AppLayout = () => {
         setMobileMenuOpen(false);
     };
 
-    // Fetch unread notification count
+    // Unread notification count: fetched once, then pushed over the user's WebSocket
+    const userId = user?.id;
     useEffect(() => {
+        if (!token || !userId) return;
+        const API_BASE = getApiUrl();
+        let socket: WebSocket | null = null;
+        let reconnectTimer: ReturnType<typeof setTimeout>;
+        let stopped = false;
+
         const fetchUnreadCount = async () => {
-            if (!token) return;
             try {
-                const API_BASE = getApiUrl();
                 const response = await axios.get(`${API_BASE}/notifications/unread-count`, {
                     headers: { Authorization: `Bearer ${token}` }
                 });
@@ -37,11 +42,38 @@ export const AppLayout = () => {
                 console.error('Failed to fetch unread count:', err);
             }
         };
+
+        const connect = () => {
+            const wsBase = API_BASE.replace(/^http/, 'ws');
+            socket = new WebSocket(`${wsBase}/ws/${userId}?token=${encodeURIComponent(token)}`);
+            // Catch up on changes missed while disconnected
+            socket.onopen = fetchUnreadCount;
+            socket.onmessage = (event) => {
+                try {
+                    const message = JSON.parse(event.data);
+                    if (message.type === 'pending_counts') {
+                        setUnreadCount(message.count || 0);
+                    }
+                } catch (err) {
+                    console.error('Invalid notification message:', err);
+                }
+            };
+            socket.onclose = (event) => {
+                // 4401/4403: token rejected, reconnecting will not help
+                if (!stopped && event.code < 4000) {
+                    reconnectTimer = setTimeout(connect, 5000);
+                }
+            };
+        };
+
         fetchUnreadCount();
-        // Poll every 30 seconds
-        const interval = setInterval(fetchUnreadCount, 30000);
-        return () => clearInterval(interval);
-    }, [token]);
+        connect();
+        return () => {
+            stopped = true;
+            clearTimeout(reconnectTimer);
+            socket?.close();
+        };
+    }, [token, userId]);
 
     // Auto-logout on inactivity (15 minutes)
     useEffect(() => {